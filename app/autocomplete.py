@@ -0,0 +1,353 @@
+"""
+Prefix autocomplete over product and category names.
+
+Names are normalized: accents are stripped, case is folded and punctuation
+becomes spaces. Each name is indexed once per word it contains, under the
+text from that word to the end, so "pro" finds "Wireless Pro Headphones".
+Keys are cut to AUTOCOMPLETE_MAX_KEY_LENGTH characters.
+
+The product index is a sorted array of keys packed into one bytes blob with
+an offsets array; a prefix is found with two bisects. Product ids, names and
+popularity (units sold) sit in compact arrays rather than Python objects, so
+1M products take roughly 100 MB. The best-selling matches for a prefix are
+picked with NumPy. Prefixes that match many keys (short ones like "a") have
+their result memoized, so every lookup stays well under a millisecond.
+
+Products created or renamed through the API go into a small overlay on top of
+the sorted array; other workers pick these up through the invalidation bus
+and read the new names from the database. The first request starts a build from the database, and
+suggestions stay empty until it finishes (about 15s for 1M products). When the
+overlay grows past AUTOCOMPLETE_MAX_PENDING, or AUTOCOMPLETE_REBUILD_INTERVAL
+has passed, the index is rebuilt in the background and swapped in. Readers
+never take a lock. Each worker keeps its own index.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import (
+    AUTOCOMPLETE_MAX_KEY_LENGTH, AUTOCOMPLETE_MAX_WORDS, AUTOCOMPLETE_MAX_PENDING, AUTOCOMPLETE_REBUILD_INTERVAL
+)
+from app.database import SessionLocal
+from app.invalidation import invalidation_bus
+from app.logger import logger
+from app.models import Category, OrderItem, Product
+
+_NOT_WORD = re.compile(r"[\W_]+")
+# Past this many matching keys the top products for a prefix are memoized
+_MEMO_MIN_RANGE = 2048
+_MEMO_MAX_ENTRIES = 20000
+# No UTF-8 byte is 0xff, so prefix + this sorts after every key starting with prefix
+_AFTER_PREFIX = b"\xff"
+
+
+def normalize(text: str) -> str:
+    """Lower-case words without accents or punctuation, separated by single spaces"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NOT_WORD.sub(" ", stripped.casefold()).strip()
+
+
+def index_keys(name: str) -> list:
+    """The keys a name is found under: its text from each word onwards"""
+    words = normalize(name).split(" ")
+    return list(dict.fromkeys(
+        " ".join(words[i:])[:AUTOCOMPLETE_MAX_KEY_LENGTH].encode()
+        for i in range(min(len(words), AUTOCOMPLETE_MAX_WORDS)) if words[i]
+    ))
+
+
+class _Segment:
+    """Immutable sorted prefix index over a set of products"""
+
+    def __init__(self, products: Iterable[tuple]):
+        """products: (id, name, popularity) rows"""
+        ids, scores, names, keys, rows = array("i"), array("f"), [], [], array("i")
+        for row, (product_id, name, popularity) in enumerate(sorted(products)):
+            ids.append(product_id)
+            scores.append(popularity)
+            names.append(name.encode())
+            for key in index_keys(name):
+                keys.append(key)
+                rows.append(row)
+
+        self.ids = np.frombuffer(ids, np.int32) if ids else np.empty(0, np.int32)
+        self.scores = np.frombuffer(scores, np.float32) if scores else np.empty(0, np.float32)
+        self.names = b"".join(names)
+        self.name_offsets = array("Q", accumulate((len(name) for name in names), initial=0))
+        del names
+
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = b"".join(keys[i] for i in order)
+        self.key_offsets = array("Q", accumulate((len(keys[i]) for i in order), initial=0))
+        self.rows = np.frombuffer(rows, np.int32)[order] if rows else np.empty(0, np.int32)
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _key(self, i: int) -> bytes:
+        return self.keys[self.key_offsets[i]:self.key_offsets[i + 1]]
+
+    def name(self, row: int) -> str:
+        return self.names[self.name_offsets[row]:self.name_offsets[row + 1]].decode()
+
+    def row(self, product_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self.ids, product_id))
+        if row < len(self.ids) and self.ids[row] == product_id:
+            return row
+        return None
+
+    def score(self, product_id: int) -> Optional[float]:
+        row = self.row(product_id)
+        return None if row is None else float(self.scores[row])
+
+    def match_range(self, prefix: bytes) -> tuple:
+        n = len(self.rows)
+        lo = bisect_left(range(n), prefix, key=self._key)
+        hi = bisect_left(range(n), prefix + _AFTER_PREFIX, lo, key=self._key)
+        return lo, hi
+
+    def top_rows(self, prefix: bytes, count: int) -> list:
+        """Rows of the `count` most popular products with a key starting with prefix"""
+        lo, hi = self.match_range(prefix)
+        if hi - lo < _MEMO_MIN_RANGE:
+            return self._top_rows(lo, hi, count)
+        memo_key = (lo, hi, count)
+        rows = self._memo.get(memo_key)
+        if rows is None:
+            if len(self._memo) >= _MEMO_MAX_ENTRIES:
+                self._memo.clear()
+            rows = self._memo[memo_key] = self._top_rows(lo, hi, count)
+        return rows
+
+    def _top_rows(self, lo: int, hi: int, count: int) -> list:
+        rows = self.rows[lo:hi]
+        # A product has at most AUTOCOMPLETE_MAX_WORDS keys, so this many candidates hold `count` products
+        candidates = count * AUTOCOMPLETE_MAX_WORDS
+        if len(rows) > candidates:
+            rows = rows[np.argpartition(-self.scores[rows], candidates)[:candidates]]
+        rows = np.unique(rows)
+        return rows[np.argsort(-self.scores[rows], kind="stable")][:count].tolist()
+
+
+@dataclass(frozen=True)
+class _State:
+    """Everything a lookup reads, swapped as a whole"""
+    segment: _Segment
+    # Sorted (key, product id, name, popularity) for products changed since the segment was built
+    overlay: tuple = ()
+    # Products whose segment entries are out of date
+    replaced: frozenset = frozenset()
+    # Sorted (key, category id, name)
+    categories: tuple = ()
+    built_at: float = field(default_factory=time.monotonic)
+
+    def product_name(self, product_id: int) -> Optional[str]:
+        """The name a product is indexed under, None if it is not indexed"""
+        name = next((entry[2] for entry in self.overlay if entry[1] == product_id), None)
+        if name is not None or product_id in self.replaced:
+            return name
+        row = self.segment.row(product_id)
+        return None if row is None else self.segment.name(row)
+
+    def category_name(self, category_id: int) -> Optional[str]:
+        return next((entry[2] for entry in self.categories if entry[1] == category_id), None)
+
+    def with_product(self, product_id: int, name: str) -> "_State":
+        segment_score = self.segment.score(product_id)
+        popularity = next((entry[3] for entry in self.overlay if entry[1] == product_id), segment_score or 0.0)
+        overlay = [entry for entry in self.overlay if entry[1] != product_id]
+        for key in index_keys(name):
+            insort(overlay, (key, product_id, name, popularity))
+        replaced = self.replaced | {product_id} if segment_score is not None else self.replaced
+        return _State(self.segment, tuple(overlay), replaced, self.categories, self.built_at)
+
+    def with_category(self, category_id: int, name: str) -> "_State":
+        categories = [entry for entry in self.categories if entry[1] != category_id]
+        for key in index_keys(name):
+            insort(categories, (key, category_id, name))
+        return _State(self.segment, self.overlay, self.replaced, tuple(categories), self.built_at)
+
+
+def _prefix_matches(entries: tuple, prefix: bytes):
+    for i in range(bisect_left(entries, (prefix,)), len(entries)):
+        if not entries[i][0].startswith(prefix):
+            break
+        yield entries[i]
+
+
+class AutocompleteIndex:
+    """Per-worker autocomplete index with API-driven updates and background rebuilds"""
+
+    def __init__(self, session_factory=None, rebuild_interval: float = AUTOCOMPLETE_REBUILD_INTERVAL,
+                 max_pending: int = AUTOCOMPLETE_MAX_PENDING):
+        self.session_factory = session_factory
+        self.rebuild_interval = rebuild_interval
+        self.max_pending = max_pending
+        self._state = None
+        self._lock = threading.Lock()
+        self._rebuilding = threading.Lock()
+        # Changes made while a rebuild reads the database, re-applied on top of its result
+        self._replay = None
+
+    @staticmethod
+    def load(db: Session) -> _State:
+        """A fresh index from the database: every product with its units sold, and every category"""
+        popularity = dict(
+            db.query(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(OrderItem.product_id).all()
+        )
+        products = (
+            (product_id, name, float(popularity.get(product_id) or 0))
+            for product_id, name in db.query(Product.id, Product.name).yield_per(50000)
+        )
+        categories = sorted(
+            (key, category_id, name)
+            for category_id, name in db.query(Category.id, Category.name)
+            for key in index_keys(name)
+        )
+        return _State(_Segment(products), categories=tuple(categories))
+
+    def build(self, db: Session):
+        started = time.perf_counter()
+        with self._lock:
+            self._replay = []
+        try:
+            state = self.load(db)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            for change in self._replay:
+                state = change(state)
+            self._replay = None
+            self._state = state
+        logger.info(f"Built autocomplete index of {len(state.segment)} products in {time.perf_counter() - started:.2f}s")
+
+    def _rebuild_in_background(self):
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        def rebuild():
+            try:
+                with self.session_factory() as db:
+                    self.build(db)
+            except Exception as e:
+                logger.error(f"Autocomplete index rebuild failed, keeping the current index: {e}")
+            finally:
+                self._rebuilding.release()
+
+        threading.Thread(target=rebuild, name="autocomplete-rebuild", daemon=True).start()
+
+    def ensure_built(self, db: Session):
+        """Start a build on first use and a rebuild when due; both run in the background when possible"""
+        state = self._state
+        if state is None:
+            # A large catalog takes seconds to index; suggestions are empty until it is ready
+            if self.session_factory:
+                self._rebuild_in_background()
+            else:
+                self.build(db)
+        elif self.session_factory and (
+            time.monotonic() - state.built_at > self.rebuild_interval or len(state.overlay) > self.max_pending
+        ):
+            self._rebuild_in_background()
+
+    def _apply(self, change):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(change)
+            if self._state is not None:
+                self._state = change(self._state)
+
+    def upsert_product(self, product_id: int, name: str):
+        """Index a created or renamed product"""
+        self._apply(lambda state: state.with_product(product_id, name))
+
+    def upsert_category(self, category_id: int, name: str):
+        self._apply(lambda state: state.with_category(category_id, name))
+
+    def refresh(self, model, ids: Optional[set]):
+        """Re-read the names of products or categories changed by another worker (None: all of them)"""
+        if self._state is None or self.session_factory is None:
+            return
+        if ids is None:
+            self._rebuild_in_background()
+            return
+        if model is Product:
+            upsert, indexed_name = self.upsert_product, self._state.product_name
+        else:
+            upsert, indexed_name = self.upsert_category, self._state.category_name
+        with self.session_factory() as db:
+            for row_id, name in db.query(model.id, model.name).filter(model.id.in_(ids)):
+                # Most product events are price or stock changes; those would only grow the overlay
+                if name != indexed_name(row_id):
+                    upsert(row_id, name)
+
+    def suggest(self, query: str, limit: int = 10, max_categories: int = 3) -> list:
+        """Matching categories (at most max_categories) then products, most popular first"""
+        state = self._state
+        prefix = normalize(query)[:AUTOCOMPLETE_MAX_KEY_LENGTH].encode()
+        if state is None or not prefix:
+            return []
+
+        suggestions = []
+        seen = set()
+        for _, category_id, name in _prefix_matches(state.categories, prefix):
+            if category_id not in seen and len(suggestions) < min(max_categories, limit):
+                seen.add(category_id)
+                suggestions.append({"type": "category", "id": category_id, "name": name})
+
+        count = limit - len(suggestions)
+        segment = state.segment
+        candidates = [
+            (float(segment.scores[row]), int(segment.ids[row]), row)
+            for row in segment.top_rows(prefix, count + len(state.replaced))
+            if int(segment.ids[row]) not in state.replaced
+        ]
+        candidates.extend((popularity, product_id, name) for _, product_id, name, popularity in _prefix_matches(state.overlay, prefix))
+
+        seen = set()
+        for _, product_id, row_or_name in sorted(candidates, key=lambda candidate: (-candidate[0], candidate[1])):
+            if product_id in seen:
+                continue
+            seen.add(product_id)
+            name = segment.name(row_or_name) if isinstance(row_or_name, int) else row_or_name
+            suggestions.append({"type": "product", "id": product_id, "name": name})
+            if len(seen) == count:
+                break
+        return suggestions
+
+    def stats(self) -> dict:
+        state = self._state
+        if state is None:
+            return {"built": False}
+        segment = state.segment
+        return {
+            "built": True,
+            "products": len(segment),
+            "keys": len(segment.rows),
+            "pending": len(state.overlay),
+            "memory_bytes": (
+                segment.ids.nbytes + segment.scores.nbytes + segment.rows.nbytes + len(segment.names) + len(segment.keys)
+                + segment.name_offsets.itemsize * len(segment.name_offsets) + segment.key_offsets.itemsize * len(segment.key_offsets)
+            ),
+            "age_seconds": round(time.monotonic() - state.built_at, 1),
+        }
+
+
+autocomplete_index = AutocompleteIndex(SessionLocal)
+invalidation_bus.subscribe("product", lambda ids: autocomplete_index.refresh(Product, ids))
+invalidation_bus.subscribe("category", lambda ids: autocomplete_index.refresh(Category, ids))
@@ -0,0 +1,213 @@
+"""
+Bulk loading, and bulk generation of unique coupon codes for campaigns.
+
+bulk_insert() loads rows in one transaction with COPY on Postgres and with
+batched executemany elsewhere; it is shared with scripts/seed_data.py.
+
+Codes are generated from a template such as "SPRING24-########", where each
+'#' becomes a random character from a 32-letter alphabet without look-alike
+characters (no 0/O, 1/I). Codes are de-duplicated in memory against each
+other and against existing codes of the template's prefix, suffix and length,
+then bulk inserted. A coupon created concurrently with the same code makes the
+insert fail with IntegrityError and the whole batch roll back.
+
+Run with:
+    python -m app.bulk 1000000 --template "SPRING24-########" --percent 10 --out codes.csv
+"""
+
+import argparse
+import csv
+import enum
+import io
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import BULK_INSERT_BATCH_SIZE
+from app.coupons import forget_missing_coupons
+from app.models import Coupon
+
+ALPHABET = b"ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+# Maps every random byte onto the alphabet; 256 is a multiple of 32 so there is no bias
+_TO_ALPHABET = bytes(ALPHABET[byte % len(ALPHABET)] for byte in range(256))
+
+# Literal parts are limited to characters that need no quoting in CSV
+_TEMPLATE = re.compile(r"^([A-Za-z0-9_-]*)(#+)([A-Za-z0-9_-]*)$")
+
+# Generated codes must not use up more than 1% of the template's code space
+_MAX_FILL = 0.01
+
+_COUPON_COLUMNS = (
+    "code", "discount_percentage", "discount_amount", "max_uses",
+    "current_uses", "is_active", "expiry_date", "created_at"
+)
+
+
+def parse_template(template: str) -> tuple:
+    """(prefix, number of random characters, suffix) of a code template"""
+    match = _TEMPLATE.match(template)
+    if not match:
+        raise ValueError("Template must be letters, digits, '-' or '_' around a single run of '#' placeholders")
+    if len(template) > Coupon.code.type.length:
+        raise ValueError(f"Template is longer than {Coupon.code.type.length} characters")
+    prefix, slots, suffix = match.groups()
+    return prefix, len(slots), suffix
+
+
+def generate_codes(template: str, count: int, taken: Iterable[str] = ()) -> list:
+    """`count` distinct random codes matching `template` that are not in `taken`"""
+    prefix, slots, suffix = parse_template(template)
+    if count > len(ALPHABET) ** slots * _MAX_FILL:
+        raise ValueError(f"Template has too few '#' placeholders for {count} unique codes")
+
+    taken = set(taken)
+    codes = set()
+    while len(codes) < count:
+        needed = count - len(codes)
+        chars = os.urandom(needed * slots).translate(_TO_ALPHABET).decode("ascii")
+        batch = {prefix + chars[i:i + slots] + suffix for i in range(0, len(chars), slots)}
+        codes |= batch - taken
+    return list(codes)
+
+
+def existing_codes(db: Session, template: str) -> set:
+    """Codes already in the database that `template` could generate"""
+    prefix, _, suffix = parse_template(template)
+    # Generated codes are as long as the template; without a prefix this keeps hand-made codes out
+    query = db.query(Coupon.code).filter(func.length(Coupon.code) == len(template))
+    if prefix:
+        query = query.filter(Coupon.code.startswith(prefix, autoescape=True))
+    if suffix:
+        query = query.filter(Coupon.code.endswith(suffix, autoescape=True))
+    return {code for code, in query}
+
+
+def _copy_value(value):
+    """A value as COPY's CSV format expects it (empty unquoted field is NULL)"""
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.name  # SQLAlchemy Enum columns store member names
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+
+def bulk_insert(db: Session, table, columns: tuple, rows: Iterable[tuple], batch_size: int = BULK_INSERT_BATCH_SIZE) -> int:
+    """
+    Insert `rows` (tuples in `columns` order) into `table` in the session's transaction,
+    with COPY on Postgres and batched executemany elsewhere; returns the row count
+    """
+    connection = db.connection()
+    count = 0
+
+    if connection.dialect.name == "postgresql":
+        statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = connection.connection.cursor()
+        try:
+            for batch in _batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows([_copy_value(value) for value in row] for row in batch)
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+                count += len(batch)
+        finally:
+            cursor.close()
+    else:
+        insert = table.insert()
+        for batch in _batches(rows, batch_size):
+            connection.execute(insert, [dict(zip(columns, row)) for row in batch])
+            count += len(batch)
+
+    return count
+
+
+def _batches(rows: Iterable[tuple], batch_size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_coupons(
+    db: Session,
+    template: str,
+    count: int,
+    discount_percentage: Optional[float] = None,
+    discount_amount: Optional[float] = None,
+    max_uses: Optional[int] = 1,
+    expiry_date: Optional[datetime] = None,
+    batch_size: int = BULK_INSERT_BATCH_SIZE,
+) -> list:
+    """Generate and insert `count` coupons in one transaction; returns their codes"""
+    if not discount_percentage and not discount_amount:
+        raise ValueError("Must provide either discount_percentage or discount_amount")
+
+    codes = generate_codes(template, count, existing_codes(db, template))
+
+    now = datetime.utcnow()
+    shared = {
+        # The column is NOT NULL; 0 makes amount-only coupons fall through to discount_amount
+        "discount_percentage": discount_percentage or 0.0,
+        "discount_amount": discount_amount,
+        "max_uses": max_uses,
+        "current_uses": 0,
+        "is_active": True,
+        "expiry_date": expiry_date,
+        "created_at": now,
+    }
+    values = tuple(shared[column] for column in _COUPON_COLUMNS[1:])
+    bulk_insert(db, Coupon.__table__, _COUPON_COLUMNS, ((code,) + values for code in codes), batch_size)
+    db.commit()
+
+    # Any of the new codes may have been looked up (and cached as missing) before
+    forget_missing_coupons()
+    return codes
+
+
+def iter_csv(codes: list, chunk_size: int = 10000) -> Iterator[str]:
+    """CSV lines ("code" header, one code per line) in chunks for streaming"""
+    yield "code\n"
+    for start in range(0, len(codes), chunk_size):
+        yield "\n".join(codes[start:start + chunk_size]) + "\n"
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Generate unique single-use coupon codes")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--template", default="########")
+    parser.add_argument("--percent", type=float, help="Discount percentage")
+    parser.add_argument("--amount", type=float, help="Discount amount")
+    parser.add_argument("--max-uses", type=int, default=1)
+    parser.add_argument("--expires", type=datetime.fromisoformat, help="Expiry date (ISO format)")
+    parser.add_argument("--out", help="CSV file to write the codes to (default: stdout)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        codes = create_coupons(
+            db, args.template, args.count,
+            discount_percentage=args.percent, discount_amount=args.amount,
+            max_uses=args.max_uses, expiry_date=args.expires
+        )
+    elapsed = time.perf_counter() - started
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        out.writelines(iter_csv(codes))
+    finally:
+        if args.out:
+            out.close()
+    print(f"Created {len(codes)} coupons in {elapsed:.1f}s", file=sys.stderr)
@@ -0,0 +1,137 @@
+"""
+gzip / brotli response compression.
+
+Only bodies of an allowlisted content type and at least COMPRESSION_MIN_SIZE
+bytes are compressed. Compressed bodies are kept in a bounded LRU keyed by a
+hash of the uncompressed body and the encoding, so hot responses (the same
+catalog page served over and over) are hashed, not recompressed, on each hit.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from app.config import (
+    COMPRESSION_MIN_SIZE, COMPRESSION_CONTENT_TYPES, COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY, COMPRESSION_CACHE_ENTRIES, COMPRESSION_CACHE_MAX_BYTES
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding from an Accept-Encoding header (brotli preferred)"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressedBodyCache:
+    """Bounded LRU of compressed bodies keyed by (body hash, encoding)"""
+
+    def __init__(self, max_entries: int = COMPRESSION_CACHE_ENTRIES, max_bytes: int = COMPRESSION_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, body: bytes, encoding: str) -> bytes:
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = compress(body, encoding)
+        if self.max_entries <= 0 or len(compressed) > self.max_bytes:
+            return compressed
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._size += len(compressed)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return compressed
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+compressed_body_cache = CompressedBodyCache()
+
+
+class CompressionMiddleware(BaseHTTPMiddleware):
+    """Compress eligible responses with brotli or gzip depending on Accept-Encoding"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 content_types=COMPRESSION_CONTENT_TYPES, cache: CompressedBodyCache = compressed_body_cache):
+        super().__init__(app)
+        self.minimum_size = minimum_size
+        self.content_types = {content_type.strip() for content_type in content_types}
+        self.cache = cache
+
+    async def dispatch(self, request: Request, call_next):
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        response = await call_next(request)
+
+        content_type = response.headers.get("content-type", "").split(";")[0].strip()
+        if (
+            encoding is None
+            or content_type not in self.content_types
+            or "content-encoding" in response.headers
+            or response.status_code in (204, 304)
+        ):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = MutableHeaders(raw=[
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        ])
+        headers.add_vary_header("Accept-Encoding")
+
+        if len(body) >= self.minimum_size:
+            body = self.cache.get_or_compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=headers
+        )
@@ -16,3 +16,147 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # API configuration
 DEBUG = os.getenv("DEBUG", "True") == "True"
+
+# Query instrumentation
+# Requests that run the same statement shape more than this many times are flagged as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# Expose per-request query count and DB time as X-DB-* response headers
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", str(DEBUG)) == "True"
+
+# Admin API (profiles, pool stats, maintenance); disabled unless a token is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# On-demand request profiling
+# Requests carrying a valid signed X-Profile header are profiled; in addition a
+# random fraction PROFILE_SAMPLE_RATE (0.0 - 1.0) of all requests is sampled
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", SECRET_KEY)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+# Connection pool (per worker process; total connections = workers * (size + overflow))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True") == "True"
+# Per-statement timeout in milliseconds (Postgres only, 0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Read replicas (comma-separated URLs); read-only endpoints are spread across them
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+# Seconds between health checks of a replica (an unhealthy replica is skipped until it passes again)
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "10"))
+
+# Async database path (asyncpg on Postgres, aiosqlite on SQLite)
+# When enabled the hottest read handlers are served by async handlers on an AsyncSession
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "False") == "True"
+# Defaults to DATABASE_URL with the async driver swapped in
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Startup
+# Import router modules on the first request under their prefix instead of at startup
+LAZY_ROUTERS = os.getenv("LAZY_ROUTERS", "True") == "True"
+# Schema version check at startup: "warn" logs a mismatch, "strict" refuses to start, "off" skips it
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "warn")
+
+# Response compression
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True") == "True"
+# Bodies smaller than this are sent uncompressed (not worth the CPU or the header bytes)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_CONTENT_TYPES = os.getenv(
+    "COMPRESSION_CONTENT_TYPES",
+    "application/json,text/html,text/plain,text/css,application/javascript"
+).split(",")
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# Compressed bodies kept in memory, keyed by a hash of the uncompressed body
+COMPRESSION_CACHE_ENTRIES = int(os.getenv("COMPRESSION_CACHE_ENTRIES", "512"))
+COMPRESSION_CACHE_MAX_BYTES = int(os.getenv("COMPRESSION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# CDN caching of catalog responses (Cache-Control directives after "public, ")
+CACHE_POLICY_PRODUCT_LIST = os.getenv("CACHE_POLICY_PRODUCT_LIST", "max-age=60, stale-while-revalidate=300")
+CACHE_POLICY_PRODUCT = os.getenv("CACHE_POLICY_PRODUCT", "max-age=300, stale-while-revalidate=600")
+CACHE_POLICY_REVIEWS = os.getenv("CACHE_POLICY_REVIEWS", "max-age=60, stale-while-revalidate=300")
+CACHE_POLICY_CATEGORIES = os.getenv("CACHE_POLICY_CATEGORIES", "max-age=600, stale-while-revalidate=3600")
+# Surrogate-key purging on writes: "noop", "log" or "http" (POST to CDN_PURGE_URL)
+CDN_PURGER = os.getenv("CDN_PURGER", "noop")
+CDN_PURGE_URL = os.getenv("CDN_PURGE_URL")
+CDN_PURGE_TOKEN = os.getenv("CDN_PURGE_TOKEN")
+
+# In-process coupon lookups: valid codes, and briefly the codes that do not exist
+COUPON_CACHE_TTL = float(os.getenv("COUPON_CACHE_TTL", "60"))
+COUPON_NEGATIVE_CACHE_TTL = float(os.getenv("COUPON_NEGATIVE_CACHE_TTL", "10"))
+COUPON_CACHE_ENTRIES = int(os.getenv("COUPON_CACHE_ENTRIES", "10000"))
+
+# In-process product reads (GET /products/ and /products/{id}); concurrent identical loads always share
+# one query, and with a TTL above 0 results are also cached for that many seconds
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "0"))
+PRODUCT_LIST_CACHE_TTL = float(os.getenv("PRODUCT_LIST_CACHE_TTL", "0"))
+PRODUCT_CACHE_ENTRIES = int(os.getenv("PRODUCT_CACHE_ENTRIES", "10000"))
+# Probabilistic early refresh of cached entries before they expire (0 disables)
+CACHE_EARLY_REFRESH_BETA = float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0"))
+
+# Rows per COPY / executemany batch for bulk inserts
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "50000"))
+
+# Shipping rate table (CSV of postal-code ranges); unset means the flat rate everywhere
+SHIPPING_RATES_FILE = os.getenv("SHIPPING_RATES_FILE")
+# How often (seconds) the rate table file is checked for changes
+SHIPPING_RATES_CHECK_INTERVAL = float(os.getenv("SHIPPING_RATES_CHECK_INTERVAL", "30"))
+# Cart and checkout bill weight rounded up to this step (kg); quotes are memoized per step
+SHIPPING_WEIGHT_STEP = float(os.getenv("SHIPPING_WEIGHT_STEP", "0.1"))
+SHIPPING_QUOTE_CACHE_SIZE = int(os.getenv("SHIPPING_QUOTE_CACHE_SIZE", "4096"))
+
+# Admission control: per-client token buckets and a cap on in-flight requests (off by default)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "False") == "True"
+# "requests/seconds" per client for each route class; the bucket holds up to `requests`
+RATE_LIMIT_AUTH = os.getenv("RATE_LIMIT_AUTH", "10/60")
+RATE_LIMIT_READ = os.getenv("RATE_LIMIT_READ", "600/60")
+RATE_LIMIT_WRITE = os.getenv("RATE_LIMIT_WRITE", "120/60")
+# Requests being handled at once by this worker before new ones get 503 (0 disables)
+RATE_LIMIT_MAX_IN_FLIGHT = int(os.getenv("RATE_LIMIT_MAX_IN_FLIGHT", "0"))
+# "memory" (per worker) or "redis" (shared through RATE_LIMIT_REDIS_URL)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Clients tracked in memory before idle buckets are dropped
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+# Key anonymous clients by the last X-Forwarded-For hop (only behind a proxy that sets it)
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "False") == "True"
+
+# "Frequently bought together" index built by `python -m app.recommendations`
+RECOMMENDATIONS_DIR = os.getenv("RECOMMENDATIONS_DIR", "data/recommendations")
+RECOMMENDATIONS_TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "20"))
+# Pairs bought together in fewer orders than this are not recommended
+RECOMMENDATIONS_MIN_COUNT = int(os.getenv("RECOMMENDATIONS_MIN_COUNT", "2"))
+# Order ids read per query while building, and the largest basket that is counted
+RECOMMENDATIONS_CHUNK_ORDERS = int(os.getenv("RECOMMENDATIONS_CHUNK_ORDERS", "50000"))
+RECOMMENDATIONS_MAX_BASKET = int(os.getenv("RECOMMENDATIONS_MAX_BASKET", "100"))
+# How often (seconds) workers check for a rebuilt index file
+RECOMMENDATIONS_CHECK_INTERVAL = float(os.getenv("RECOMMENDATIONS_CHECK_INTERVAL", "60"))
+
+# Product name autocomplete (GET /search/autocomplete)
+# Keys are the text from each of a name's first AUTOCOMPLETE_MAX_WORDS words onwards, cut to this length
+AUTOCOMPLETE_MAX_KEY_LENGTH = int(os.getenv("AUTOCOMPLETE_MAX_KEY_LENGTH", "48"))
+AUTOCOMPLETE_MAX_WORDS = int(os.getenv("AUTOCOMPLETE_MAX_WORDS", "6"))
+# Products created or renamed since the last rebuild before a background rebuild starts
+AUTOCOMPLETE_MAX_PENDING = int(os.getenv("AUTOCOMPLETE_MAX_PENDING", "5000"))
+# Seconds between background rebuilds (refreshes popularity and changes made by other workers)
+AUTOCOMPLETE_REBUILD_INTERVAL = float(os.getenv("AUTOCOMPLETE_REBUILD_INTERVAL", "3600"))
+CACHE_POLICY_AUTOCOMPLETE = os.getenv("CACHE_POLICY_AUTOCOMPLETE", "max-age=60, stale-while-revalidate=300")
+
+# Cross-worker cache invalidation: "local" (this process only), "postgres" (LISTEN/NOTIFY) or "redis"
+INVALIDATION_TRANSPORT = os.getenv("INVALIDATION_TRANSPORT", "local")
+INVALIDATION_REDIS_URL = os.getenv("INVALIDATION_REDIS_URL", "redis://localhost:6379/0")
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+# Events published or received within this many milliseconds are sent and handled together
+INVALIDATION_COALESCE_MS = float(os.getenv("INVALIDATION_COALESCE_MS", "50"))
+
+# Abandoned cart sweep (app/maintenance.py); carts with no item touched for this many days are deleted
+CART_SWEEP_MAX_AGE_DAYS = float(os.getenv("CART_SWEEP_MAX_AGE_DAYS", "30"))
+# Items per keyed DELETE, and the pause between batches
+CART_SWEEP_BATCH_SIZE = int(os.getenv("CART_SWEEP_BATCH_SIZE", "500"))
+CART_SWEEP_PAUSE_MS = float(os.getenv("CART_SWEEP_PAUSE_MS", "100"))
+# Also sweep in-process every CART_SWEEP_INTERVAL seconds (otherwise run `python -m app.maintenance sweep-carts`)
+CART_SWEEP_ENABLED = os.getenv("CART_SWEEP_ENABLED", "False") == "True"
+CART_SWEEP_INTERVAL = float(os.getenv("CART_SWEEP_INTERVAL", "3600"))
@@ -0,0 +1,136 @@
+"""
+Cached coupon lookups shared by coupon validation, the cart and checkout.
+
+Existing coupons are cached as immutable snapshots for COUPON_CACHE_TTL and
+codes that do not exist for COUPON_NEGATIVE_CACHE_TTL, so repeated lookups
+(including brute-forced codes) are answered without a query. The two kinds
+live in separate caches so a flood of misses cannot evict valid coupons.
+Expiry, active and usage checks run against the snapshot on every call;
+anything that changes a coupon must call invalidate_coupon() after commit,
+which also tells the other workers through the invalidation bus.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.cache import MISSING, TTLCache
+from app.config import COUPON_CACHE_TTL, COUPON_NEGATIVE_CACHE_TTL, COUPON_CACHE_ENTRIES
+from app.invalidation import invalidation_bus
+from app.models import Coupon
+
+
+@dataclass(frozen=True)
+class CouponSnapshot:
+    id: int
+    code: str
+    discount_percentage: Optional[float]
+    discount_amount: Optional[float]
+    max_uses: Optional[int]
+    current_uses: int
+    is_active: bool
+    expiry_date: Optional[datetime]
+
+
+coupon_cache = TTLCache(COUPON_CACHE_ENTRIES, COUPON_CACHE_TTL)
+missing_coupon_cache = TTLCache(COUPON_CACHE_ENTRIES, COUPON_NEGATIVE_CACHE_TTL)
+
+_SNAPSHOT_COLUMNS = [getattr(Coupon, name) for name in CouponSnapshot.__dataclass_fields__]
+
+
+def lookup_coupon(db: Session, code: str) -> Optional[CouponSnapshot]:
+    """Coupon with `code`, or None if it does not exist (both results are cached)"""
+    coupon = coupon_cache.get(code)
+    if coupon is not MISSING:
+        return coupon
+    if missing_coupon_cache.get(code) is not MISSING:
+        return None
+
+    row = db.query(*_SNAPSHOT_COLUMNS).filter(Coupon.code == code).first()
+    if row is None:
+        missing_coupon_cache.set(code, None)
+        return None
+
+    coupon = CouponSnapshot(**row._asdict())
+    coupon_cache.set(code, coupon)
+    return coupon
+
+
+def invalidate_coupon(code: str):
+    """Drop any cached result for `code`, here and in every other worker"""
+    coupon_cache.delete(code)
+    missing_coupon_cache.delete(code)
+    invalidation_bus.publish("coupon", code)
+
+
+def forget_missing_coupons():
+    """Drop every cached miss (after creating many codes at once), here and in every other worker"""
+    missing_coupon_cache.clear()
+    invalidation_bus.publish("coupon")
+
+
+def _drop_coupons(codes: Optional[set]):
+    if codes is None:
+        coupon_cache.clear()
+        missing_coupon_cache.clear()
+        return
+    for code in codes:
+        coupon_cache.delete(code)
+        missing_coupon_cache.delete(code)
+
+
+invalidation_bus.subscribe("coupon", _drop_coupons)
+
+
+def coupon_problem(coupon: CouponSnapshot) -> Optional[str]:
+    """Why `coupon` cannot be used right now, or None if it can"""
+    if not coupon.is_active:
+        return "Coupon is inactive"
+    if coupon.expiry_date and coupon.expiry_date < datetime.utcnow():
+        return "Coupon has expired"
+    if coupon.max_uses and coupon.current_uses >= coupon.max_uses:
+        return "Coupon usage limit reached"
+    return None
+
+
+def get_usable_coupon(db: Session, code: str) -> CouponSnapshot:
+    """Coupon with `code`; 404 if it does not exist, 400 if it cannot be used"""
+    coupon = lookup_coupon(db, code)
+
+    if coupon is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Coupon not found"
+        )
+
+    problem = coupon_problem(coupon)
+    if problem:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=problem
+        )
+
+    return coupon
+
+
+def calculate_discount(coupon: CouponSnapshot, subtotal: float) -> float:
+    if coupon.discount_percentage:
+        return subtotal * (coupon.discount_percentage / 100)
+    if coupon.discount_amount:
+        return coupon.discount_amount
+    return 0.0
+
+
+def redeem_coupon(db: Session, coupon: CouponSnapshot) -> bool:
+    """Count one use of `coupon` in the current transaction; False if the usage limit was reached meanwhile"""
+    result = db.execute(
+        update(Coupon)
+        .where(Coupon.id == coupon.id)
+        .where(or_(Coupon.max_uses.is_(None), Coupon.max_uses == 0, Coupon.current_uses < Coupon.max_uses))
+        .values(current_uses=Coupon.current_uses + 1)
+    )
+    return result.rowcount == 1
@@ -1,12 +1,149 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL
+from sqlalchemy.pool import QueuePool
+from app.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS,
+    REPLICA_DATABASE_URLS, REPLICA_HEALTH_CHECK_INTERVAL, ASYNC_DATABASE_URL
+)
+from app.logger import logger
 
-engine = create_engine(DATABASE_URL, echo=False)
+def create_db_engine(url: str, **overrides):
+    """Create an engine with pool settings from config (keyword arguments take precedence)"""
+    options = {
+        "echo": False,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    
+    backend = make_url(url)
+    
+    # In-memory SQLite has no real pool to tune
+    if backend.get_backend_name() == "sqlite" and backend.database not in (None, "", ":memory:"):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                       pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE,
+                       connect_args={"check_same_thread": False}, poolclass=QueuePool)
+    elif backend.get_backend_name() == "postgresql":
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                       pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE)
+        if DB_STATEMENT_TIMEOUT_MS:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    
+    options.update(overrides)
+    db_engine = create_engine(url, **options)
+    _track_pool_events(db_engine)
+    return db_engine
+
+def async_database_url(url: str) -> str:
+    """Swap the driver of a sync database URL for its asyncio counterpart"""
+    backend = make_url(url)
+    drivers = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+    name = backend.get_backend_name()
+    if name not in drivers:
+        raise ValueError(f"No async driver configured for {name!r} databases")
+    return backend.set(drivername=f"{name}+{drivers[name]}").render_as_string(hide_password=False)
+
+def create_async_db_engine(url: str, **overrides):
+    """Create an AsyncEngine with the same pool settings as create_db_engine"""
+    # Imported lazily so the sync path works without greenlet/asyncpg/aiosqlite installed
+    from sqlalchemy.ext.asyncio import create_async_engine
+    
+    options = {
+        "echo": False,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    
+    if make_url(url).get_backend_name() == "postgresql":
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                       pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE)
+        if DB_STATEMENT_TIMEOUT_MS:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    
+    options.update(overrides)
+    db_engine = create_async_engine(url, **options)
+    _track_pool_events(db_engine.sync_engine)
+    return db_engine
+
+def _track_pool_events(db_engine):
+    """Count connection churn so pool stats show reconnects after failover"""
+    counters = db_engine.pool_events = {"connects": 0, "invalidated": 0}
+    
+    @event.listens_for(db_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        counters["connects"] += 1
+    
+    @event.listens_for(db_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        counters["invalidated"] += 1
+
+def get_pool_stats(db_engine=None) -> dict:
+    """Live connection pool statistics for an engine (default: the primary engine)"""
+    db_engine = db_engine or engine
+    pool = db_engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout=pool.timeout(),
+        )
+    stats.update(getattr(db_engine, "pool_events", {}))
+    return stats
+
+class ReplicaRouter:
+    """Round-robin selection of healthy read replicas, falling back to the primary"""
+    
+    def __init__(self, primary, replicas=(), health_check_interval: float = REPLICA_HEALTH_CHECK_INTERVAL):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.health_check_interval = health_check_interval
+        self._healthy = {}
+        self._last_checked = {}
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+    
+    def _is_healthy(self, replica) -> bool:
+        """Cached health state, re-checked with SELECT 1 at most once per interval"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_checked.get(replica, float("-inf")) < self.health_check_interval:
+                return self._healthy.get(replica, True)
+            self._last_checked[replica] = now
+        
+        try:
+            with replica.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            healthy = True
+        except exc.SQLAlchemyError as e:
+            healthy = False
+            logger.warning(f"Read replica {replica.url!r} failed health check: {e}")
+        
+        self._healthy[replica] = healthy
+        return healthy
+    
+    def read_engine(self):
+        """Next healthy replica in round-robin order, or the primary if none is healthy"""
+        count = len(self.replicas)
+        if count:
+            start = next(self._next)
+            for offset in range(count):
+                replica = self.replicas[(start + offset) % count]
+                if self._is_healthy(replica):
+                    return replica
+        return self.primary
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+replica_router = ReplicaRouter(engine, [create_db_engine(url) for url in REPLICA_DATABASE_URLS])
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -14,3 +151,32 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """Dependency to get a session for read-only endpoints (routed to a replica if configured).
+    
+    Replicas may lag the primary, so paths that must see their own writes
+    (cart, checkout, orders) keep using get_db.
+    """
+    db = SessionLocal(bind=replica_router.read_engine())
+    try:
+        yield db
+    finally:
+        db.close()
+
+_async_sessionmaker = None
+
+def get_async_sessionmaker():
+    """Session factory for the async engine, created on first use"""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        
+        async_engine = create_async_db_engine(ASYNC_DATABASE_URL or async_database_url(DATABASE_URL))
+        _async_sessionmaker = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with get_async_sessionmaker()() as db:
+        yield db
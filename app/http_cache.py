@@ -0,0 +1,126 @@
+"""
+HTTP caching for CDN-served catalog responses.
+
+Read endpoints set a public Cache-Control policy and Surrogate-Key tags
+(product-123, category-4, ...). Write endpoints call purge() with the keys
+whose cached responses they invalidate; the configured purger forwards them
+to the CDN.
+"""
+
+import threading
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from fastapi import Response
+
+from app.config import CDN_PURGER, CDN_PURGE_URL, CDN_PURGE_TOKEN
+from app.logger import logger
+
+
+def product_key(product_id: int) -> str:
+    return f"product-{product_id}"
+
+
+def category_key(category_id: int) -> str:
+    return f"category-{category_id}"
+
+
+def reviews_key(product_id: int) -> str:
+    return f"product-{product_id}-reviews"
+
+
+# Tags every product listing page and the category list respectively
+PRODUCTS_KEY = "products"
+CATEGORIES_KEY = "categories"
+
+
+def set_cache_headers(response: Response, policy: str, keys: Iterable[str]):
+    """Mark a response as publicly cacheable under `policy` and tag it with surrogate keys"""
+    response.headers["Cache-Control"] = f"public, {policy}"
+    response.headers["Surrogate-Key"] = " ".join(dict.fromkeys(keys))
+
+
+class Purger(ABC):
+    """Sends surrogate-key purges to a CDN"""
+
+    @abstractmethod
+    def purge(self, keys: list):
+        """Invalidate every cached response tagged with any of `keys`"""
+
+
+class NoopPurger(Purger):
+    """Discards purges (no CDN in front of the app)"""
+
+    def purge(self, keys: list):
+        pass
+
+
+class LoggingPurger(Purger):
+    """Logs purges instead of sending them"""
+
+    def purge(self, keys: list):
+        logger.info(f"CDN purge: {' '.join(keys)}")
+
+
+class RecordingPurger(Purger):
+    """Keeps every purge in memory (tests)"""
+
+    def __init__(self):
+        self.purged = []
+        self._lock = threading.Lock()
+
+    def purge(self, keys: list):
+        with self._lock:
+            self.purged.append(list(keys))
+
+    @property
+    def keys(self) -> set:
+        return {key for keys in self.purged for key in keys}
+
+
+class HttpPurger(Purger):
+    """POSTs keys to a purge endpoint (Fastly-style Surrogate-Key header) from a background thread"""
+
+    def __init__(self, url: str, token: str = None):
+        self.url = url
+        self.token = token
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cdn-purge")
+
+    def purge(self, keys: list):
+        self._executor.submit(self._send, list(keys))
+
+    def _send(self, keys: list):
+        request = urllib.request.Request(self.url, method="POST", headers={"Surrogate-Key": " ".join(keys)})
+        if self.token:
+            request.add_header("Fastly-Key", self.token)
+        try:
+            with urllib.request.urlopen(request, timeout=5):
+                pass
+        except OSError as e:
+            logger.warning(f"CDN purge of {' '.join(keys)} failed: {e}")
+
+
+def create_purger(name: str = CDN_PURGER) -> Purger:
+    if name == "http":
+        if not CDN_PURGE_URL:
+            raise ValueError("CDN_PURGER=http requires CDN_PURGE_URL")
+        return HttpPurger(CDN_PURGE_URL, CDN_PURGE_TOKEN)
+    if name == "log":
+        return LoggingPurger()
+    return NoopPurger()
+
+
+purger = create_purger()
+
+
+def purge(*keys: str):
+    """Purge cached responses tagged with any of `keys` (never fails the calling request)"""
+    keys = list(dict.fromkeys(key for key in keys if key))
+    if not keys:
+        return
+    try:
+        purger.purge(keys)
+    except Exception as e:
+        logger.warning(f"CDN purge of {' '.join(keys)} failed: {e}")
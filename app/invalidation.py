@@ -0,0 +1,326 @@
+"""
+Cross-worker cache invalidation.
+
+Each worker keeps its own in-process caches (coupon lookups, the autocomplete
+index, the shipping rate table). A worker that changes something drops its own
+copy right away and publishes an (entity, id) event. Every other worker, on
+this node or another, receives it and runs the handlers subscribed to that
+entity. An id of None means "everything of this kind".
+
+Events are coalesced in both directions: publishes within INVALIDATION_COALESCE_MS
+go out as one message with duplicates removed, and messages arriving within
+the same window reach each handler as one call with the set of ids.
+
+The transport is picked with INVALIDATION_TRANSPORT:
+
+- local:    in this process only (single worker, tests)
+- postgres: LISTEN/NOTIFY on the application database
+- redis:    pub/sub on INVALIDATION_REDIS_URL (needs the redis package)
+
+Delivery is best effort. While the transport is down, events are lost and the
+caches' own TTLs bound how stale another worker can get. After reconnecting,
+a worker cannot know what it missed, so it flushes every subscribed cache.
+"""
+
+import json
+import select
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Callable, Optional
+
+import psycopg2
+from sqlalchemy.engine import make_url
+
+from app.config import (
+    DATABASE_URL, INVALIDATION_TRANSPORT, INVALIDATION_REDIS_URL, INVALIDATION_CHANNEL, INVALIDATION_COALESCE_MS
+)
+from app.logger import logger
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# NOTIFY payloads must stay under 8000 bytes; larger bursts are split
+_MAX_EVENTS_PER_MESSAGE = 100
+_RECONNECT_DELAY = 1.0
+_MAX_RECONNECT_DELAY = 30.0
+
+
+class LocalTransport:
+    """Delivers to every bus started on the same instance, inside this process"""
+
+    def __init__(self):
+        self._listeners = []
+        self.connected = True
+
+    def start(self, on_message: Callable, on_connect: Callable):
+        self._listeners.append((on_message, on_connect))
+        on_connect()
+
+    def send(self, payload: str):
+        if not self.connected:
+            raise ConnectionError("local transport is disconnected")
+        for on_message, _ in list(self._listeners):
+            on_message(payload)
+
+    def disconnect(self):
+        """Drop messages until reconnect(), like a lost connection"""
+        self.connected = False
+
+    def reconnect(self):
+        self.connected = True
+        for _, on_connect in list(self._listeners):
+            on_connect()
+
+    def stop(self):
+        self._listeners.clear()
+
+
+class _ListeningTransport(ABC):
+    """Runs `_listen` in a daemon thread and reconnects with backoff when it fails"""
+
+    name = "transport"
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self, on_message: Callable, on_connect: Callable):
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(on_message, on_connect), name=f"invalidation-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, on_message, on_connect):
+        delay = _RECONNECT_DELAY
+        while not self._stopping.is_set():
+            try:
+                self._listen(on_message, on_connect)
+                delay = _RECONNECT_DELAY
+            except Exception as e:
+                logger.error(f"Invalidation bus ({self.name}) disconnected, retrying in {delay:.0f}s: {e}")
+                self._stopping.wait(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+    @abstractmethod
+    def _listen(self, on_message, on_connect):
+        """Connect, call on_connect, then pass payloads to on_message until stopped; raise when the connection fails"""
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+class PostgresTransport(_ListeningTransport):
+    """LISTEN/NOTIFY on its own two connections (one listening, one sending)"""
+
+    name = "postgres"
+
+    def __init__(self, database_url: str = DATABASE_URL, channel: str = INVALIDATION_CHANNEL):
+        super().__init__(channel)
+        # libpq does not understand SQLAlchemy driver suffixes such as postgresql+psycopg2://
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._sender = None
+        self._send_lock = threading.Lock()
+
+    def _connect(self):
+        connection = psycopg2.connect(self.dsn)
+        connection.autocommit = True
+        return connection
+
+    def _listen(self, on_message, on_connect):
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            on_connect()
+            while not self._stopping.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    on_message(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+    def send(self, payload: str):
+        with self._send_lock:
+            for attempt in range(2):
+                try:
+                    if self._sender is None or self._sender.closed:
+                        self._sender = self._connect()
+                    with self._sender.cursor() as cursor:
+                        cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    return
+                except psycopg2.OperationalError:
+                    self._sender = None
+                    if attempt:
+                        raise
+
+    def stop(self):
+        super().stop()
+        if self._sender is not None:
+            self._sender.close()
+
+
+class RedisTransport(_ListeningTransport):
+    """Pub/sub on any Redis-compatible server"""
+
+    name = "redis"
+
+    def __init__(self, url: str = INVALIDATION_REDIS_URL, channel: str = INVALIDATION_CHANNEL):
+        if redis is None:
+            raise RuntimeError("INVALIDATION_TRANSPORT=redis requires the redis package")
+        super().__init__(channel)
+        self.client = redis.Redis.from_url(url)
+
+    def _listen(self, on_message, on_connect):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel)
+            on_connect()
+            while not self._stopping.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message and message["type"] == "message":
+                    on_message(message["data"].decode())
+        finally:
+            pubsub.close()
+
+    def send(self, payload: str):
+        self.client.publish(self.channel, payload)
+
+
+class InvalidationBus:
+    """Publishes invalidation events to other workers and runs local handlers for theirs"""
+
+    def __init__(self, transport, coalesce_ms: float = INVALIDATION_COALESCE_MS):
+        self.transport = transport
+        self.window = coalesce_ms / 1000
+        # Our own messages come back from postgres and redis; they are recognised by this id
+        self.origin = uuid.uuid4().hex
+        self.started = False
+        self._handlers = defaultdict(list)
+        self._lock = threading.Lock()
+        self._outbox = set()
+        self._inbox = defaultdict(set)
+        self._flush_timer = None
+        self._dispatch_timer = None
+        self._connections = 0
+        self.counts = {"published": 0, "sent": 0, "send_errors": 0, "received": 0, "handled": 0, "flushes": 0}
+
+    def subscribe(self, entity: str, handler: Callable[[Optional[set]], None]):
+        """Call handler(ids) when other workers change `entity`; ids is None for "everything" """
+        self._handlers[entity].append(handler)
+
+    def start(self):
+        if not self.started:
+            self.started = True
+            self.transport.start(self._on_message, self._on_connect)
+
+    def stop(self):
+        if self.started:
+            self.flush()
+            self.started = False
+            self.transport.stop()
+
+    def publish(self, entity: str, id=None):
+        """Queue an event for other workers; call after the change is committed"""
+        if not self.started:
+            return
+        with self._lock:
+            self._outbox.add((entity, id))
+            self.counts["published"] += 1
+            if self._flush_timer is None and self.window > 0:
+                self._flush_timer = threading.Timer(self.window, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if self.window <= 0:
+            self.flush()
+
+    def flush(self):
+        """Send queued events now"""
+        with self._lock:
+            events, self._outbox = sorted(self._outbox, key=repr), set()
+            self._flush_timer = None
+        for start in range(0, len(events), _MAX_EVENTS_PER_MESSAGE):
+            payload = json.dumps({"origin": self.origin, "events": events[start:start + _MAX_EVENTS_PER_MESSAGE]})
+            try:
+                self.transport.send(payload)
+                self.counts["sent"] += 1
+            except Exception as e:
+                # Other workers fall back to their cache TTLs for these entries
+                self.counts["send_errors"] += 1
+                logger.error(f"Invalidation events not sent: {e}")
+
+    def _on_connect(self):
+        self._connections += 1
+        if self._connections > 1:
+            # Events published while we were disconnected are lost
+            self.counts["flushes"] += 1
+            logger.warning("Invalidation bus reconnected; flushing all subscribed caches")
+            self._run_handlers({entity: None for entity in self._handlers})
+
+    def _on_message(self, payload: str):
+        try:
+            message = json.loads(payload)
+            if message["origin"] == self.origin:
+                return
+            events = [(entity, id) for entity, id in message["events"]]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed invalidation message: {payload[:200]}")
+            return
+        with self._lock:
+            self.counts["received"] += len(events)
+            for entity, id in events:
+                self._inbox[entity].add(id)
+            if self._dispatch_timer is not None:
+                return
+            if self.window > 0:
+                self._dispatch_timer = threading.Timer(self.window, self._dispatch)
+                self._dispatch_timer.daemon = True
+                self._dispatch_timer.start()
+                return
+        self._dispatch()
+
+    def _dispatch(self):
+        with self._lock:
+            inbox, self._inbox = self._inbox, defaultdict(set)
+            self._dispatch_timer = None
+        self._run_handlers({entity: None if None in ids else ids for entity, ids in inbox.items()})
+
+    def _run_handlers(self, changes: dict):
+        for entity, ids in changes.items():
+            for handler in self._handlers.get(entity, ()):
+                try:
+                    handler(ids)
+                    self.counts["handled"] += 1
+                except Exception as e:
+                    logger.error(f"Invalidation handler for {entity} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "transport": type(self.transport).__name__,
+            "started": self.started,
+            "connections": self._connections,
+            "subscriptions": {entity: len(handlers) for entity, handlers in self._handlers.items()},
+            **self.counts,
+        }
+
+
+def create_transport(name: str = INVALIDATION_TRANSPORT):
+    if name == "postgres":
+        return PostgresTransport()
+    if name == "redis":
+        return RedisTransport()
+    if name == "local":
+        return LocalTransport()
+    raise ValueError(f"Unknown INVALIDATION_TRANSPORT: {name}")
+
+
+invalidation_bus = InvalidationBus(create_transport())
@@ -3,20 +3,41 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.logger import logger
 
-from app.routers import auth, products, categories, cart, orders, reviews, coupons, shipping
 from app.middleware import LoggingMiddleware
-from app.database import engine, Base
+from app.profiling import ProfilingMiddleware
+from app.router_loader import RouterLoader, LazyRouterMiddleware
+from app.database import engine
+from app.migrations import verify_schema
+from app.compression import CompressionMiddleware
+from app.rate_limit import RateLimitMiddleware
+from app.invalidation import invalidation_bus
+from app.maintenance import cart_sweeper
+from app.config import (
+    ASYNC_DB_ENABLED, LAZY_ROUTERS, SCHEMA_CHECK, COMPRESSION_ENABLED, RATE_LIMIT_ENABLED, CART_SWEEP_ENABLED
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events"""
     logger.info("Application startup")
-    # Create database tables
-    try:
-        Base.metadata.create_all(bind=engine)
-    except Exception as e:
-        logger.warning(f"Could not create tables: {e}")
+    # Only verify the schema stamp; schema changes are applied with `python -m app.migrations upgrade`
+    if SCHEMA_CHECK != "off":
+        try:
+            problem = verify_schema(engine)
+        except Exception as e:
+            logger.warning(f"Could not verify schema version: {e}")
+        else:
+            if problem and SCHEMA_CHECK == "strict":
+                raise RuntimeError(problem)
+            if problem:
+                logger.error(problem)
+    # Evict this worker's caches when other workers change what they hold
+    invalidation_bus.start()
+    if CART_SWEEP_ENABLED:
+        cart_sweeper.start()
     yield
+    cart_sweeper.stop()
+    invalidation_bus.stop()
     logger.info("Application shutdown")
 
 app = FastAPI(
@@ -26,6 +47,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Per-client rate limits and load shedding; registered before CORS so 429/503 responses get CORS headers
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -33,20 +58,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# gzip/brotli compression of large JSON responses
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 # Custom logging middleware
 app.add_middleware(LoggingMiddleware)
 
+# On-demand profiling (signed X-Profile header or PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers
-app.include_router(auth.router)
-app.include_router(categories.router)
-app.include_router(products.router)
-app.include_router(cart.router)
-app.include_router(orders.router)
-app.include_router(reviews.router)
-app.include_router(coupons.router)
-app.include_router(shipping.router)
+if ASYNC_DB_ENABLED:
+    # Registered first so the async handlers take precedence over their sync twins
+    from app.routers import async_reads
+    app.include_router(async_reads.router, include_in_schema=False)
+
+# Router modules are imported on the first request under their prefix (see app.router_loader)
+router_loader = RouterLoader(app)
+if LAZY_ROUTERS:
+    app.add_middleware(LazyRouterMiddleware, loader=router_loader)
+else:
+    router_loader.load_all()
 
 @app.get("/")
 def root():
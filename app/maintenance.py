@@ -0,0 +1,207 @@
+"""
+Background maintenance: removing abandoned carts.
+
+A cart is abandoned when none of its items has been added or changed for
+CART_SWEEP_MAX_AGE_DAYS. The sweeper walks stale cart_items rows in
+(updated_at, id) order through ix_cart_items_updated_at, CART_SWEEP_BATCH_SIZE
+rows at a time. Rows of users who touched any item since the cutoff are
+skipped, so an active cart is never cut down. The rest are deleted by primary
+key in a short transaction of their own, and the sweeper pauses
+CART_SWEEP_PAUSE_MS between batches. No lock is held for longer than one small
+DELETE, and live traffic can run between batches.
+
+Run it once from cron:
+
+    python -m app.maintenance sweep-carts [--max-age-days 30] [--batch-size 500] [--dry-run]
+
+or in-process every CART_SWEEP_INTERVAL seconds with CART_SWEEP_ENABLED. On
+Postgres a run first takes an advisory lock, so only one worker sweeps at a
+time. Progress and totals are at GET /admin/maintenance.
+"""
+
+import argparse
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select, text, tuple_
+
+from app.config import (
+    CART_SWEEP_ENABLED, CART_SWEEP_MAX_AGE_DAYS, CART_SWEEP_BATCH_SIZE, CART_SWEEP_PAUSE_MS, CART_SWEEP_INTERVAL
+)
+from app.database import SessionLocal
+from app.logger import logger
+from app.models import CartItem
+
+# Arbitrary constant naming the cart sweep for pg_try_advisory_lock
+_ADVISORY_LOCK_KEY = 7_301_001
+
+
+class CartSweeper:
+    """Deletes abandoned carts in small keyed batches; one run at a time per process"""
+
+    def __init__(self, session_factory=SessionLocal, max_age_days: float = CART_SWEEP_MAX_AGE_DAYS,
+                 batch_size: int = CART_SWEEP_BATCH_SIZE, pause_ms: float = CART_SWEEP_PAUSE_MS,
+                 interval: float = CART_SWEEP_INTERVAL, sleep=time.sleep):
+        self.session_factory = session_factory
+        self.max_age_days = max_age_days
+        self.batch_size = batch_size
+        self.pause = pause_ms / 1000
+        self.interval = interval
+        self._sleep = sleep
+        self._running = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.totals = {"runs": 0, "batches": 0, "rows_deleted": 0, "carts_deleted": 0, "rows_skipped": 0, "errors": 0}
+        self.last_run = None
+        self.current_run = None
+
+    def stale_items_query(self, cutoff: datetime, after: Optional[tuple] = None):
+        """The next batch of items older than cutoff, after the (updated_at, id) keyset position"""
+        query = select(CartItem.id, CartItem.user_id, CartItem.updated_at).where(CartItem.updated_at < cutoff)
+        if after is not None:
+            query = query.where(tuple_(CartItem.updated_at, CartItem.id) > tuple_(*after))
+        return query.order_by(CartItem.updated_at, CartItem.id).limit(self.batch_size)
+
+    def _sweep_batch(self, db, cutoff: datetime, rows: list, dry_run: bool) -> tuple:
+        """Delete the rows of abandoned carts among `rows`; returns (deleted row count, their users, skipped row count)"""
+        user_ids = {row.user_id for row in rows}
+        active = set(db.scalars(
+            select(CartItem.user_id).where(CartItem.user_id.in_(user_ids), CartItem.updated_at >= cutoff).distinct()
+        ))
+        ids = [row.id for row in rows if row.user_id not in active]
+        if ids and not dry_run:
+            # Re-checking updated_at keeps items touched since they were read
+            db.execute(delete(CartItem).where(CartItem.id.in_(ids), CartItem.updated_at < cutoff))
+            db.commit()
+        return len(ids), user_ids - active, len(rows) - len(ids)
+
+    @contextmanager
+    def _sweep_lock(self):
+        """True if this process may sweep; on Postgres only one session at a time holds the lock"""
+        with self.session_factory() as db:
+            bind = db.get_bind()
+        if bind.dialect.name != "postgresql":
+            yield True
+            return
+        # Autocommit, so holding the lock for the whole run does not keep a transaction open
+        with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            locked = conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            try:
+                yield bool(locked)
+            finally:
+                if locked:
+                    conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+    def run(self, dry_run: bool = False, max_batches: Optional[int] = None) -> dict:
+        """Sweep once; returns this run's progress (also kept as last_run)"""
+        if not self._running.acquire(blocking=False):
+            return {"skipped": "a sweep is already running in this process"}
+        cutoff = datetime.utcnow() - timedelta(days=self.max_age_days)
+        progress = self.current_run = {
+            "started_at": datetime.utcnow().isoformat(), "cutoff": cutoff.isoformat(), "dry_run": dry_run,
+            "batches": 0, "rows_deleted": 0, "carts_deleted": 0, "rows_skipped": 0, "finished_at": None,
+        }
+        started = time.perf_counter()
+        try:
+            with self._sweep_lock() as locked:
+                if locked:
+                    self._run_batches(cutoff, progress, dry_run, max_batches)
+                else:
+                    progress["skipped"] = "another worker holds the sweep lock"
+        except Exception as e:
+            self.totals["errors"] += 1
+            progress["error"] = str(e)
+            logger.error(f"Cart sweep failed after {progress['batches']} batches: {e}")
+        finally:
+            progress["finished_at"] = datetime.utcnow().isoformat()
+            progress["duration_seconds"] = round(time.perf_counter() - started, 3)
+            self.last_run, self.current_run = progress, None
+            self.totals["runs"] += 1
+            self._running.release()
+        logger.info(
+            f"Cart sweep {'(dry run) ' if dry_run else ''}removed {progress['rows_deleted']} items from "
+            f"{progress['carts_deleted']} carts in {progress['batches']} batches"
+        )
+        return progress
+
+    def _run_batches(self, cutoff: datetime, progress: dict, dry_run: bool, max_batches: Optional[int]):
+        after = None
+        # Dry runs delete nothing, so carts are counted by remembering their users
+        seen_users = set()
+        while not self._stopping.is_set() and (max_batches is None or progress["batches"] < max_batches):
+            with self.session_factory() as db:
+                rows = db.execute(self.stale_items_query(cutoff, after)).all()
+                if not rows:
+                    return
+                deleted, users, skipped = self._sweep_batch(db, cutoff, rows, dry_run)
+                if dry_run:
+                    carts = len(users - seen_users)
+                    seen_users |= users
+                else:
+                    # Carts whose last items went in this batch
+                    remaining = set(db.scalars(
+                        select(CartItem.user_id).where(CartItem.user_id.in_(users)).distinct()
+                    )) if users else set()
+                    carts = len(users - remaining)
+            # Deleted rows are gone; skipped (and dry-run) rows are passed by the keyset
+            after = (rows[-1].updated_at, rows[-1].id)
+            for key, value in (("batches", 1), ("rows_deleted", deleted), ("carts_deleted", carts), ("rows_skipped", skipped)):
+                progress[key] += value
+                if not dry_run:
+                    self.totals[key] += value
+            if len(rows) < self.batch_size:
+                return
+            self._sleep(self.pause)
+
+    def start(self):
+        """Sweep every `interval` seconds in a daemon thread, the first run one interval after startup"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+
+        def loop():
+            while not self._stopping.wait(self.interval):
+                self.run()
+
+        self._thread = threading.Thread(target=loop, name="cart-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the schedule; a sweep in progress ends after its current batch"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": CART_SWEEP_ENABLED,
+            "scheduled": self._thread is not None,
+            "max_age_days": self.max_age_days,
+            "batch_size": self.batch_size,
+            "interval_seconds": self.interval,
+            "running": self.current_run,
+            "last_run": self.last_run,
+            "totals": dict(self.totals),
+        }
+
+
+cart_sweeper = CartSweeper()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["sweep-carts"])
+    parser.add_argument("--max-age-days", type=float, default=CART_SWEEP_MAX_AGE_DAYS)
+    parser.add_argument("--batch-size", type=int, default=CART_SWEEP_BATCH_SIZE)
+    parser.add_argument("--pause-ms", type=float, default=CART_SWEEP_PAUSE_MS)
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="count what would be deleted without deleting")
+    args = parser.parse_args()
+
+    sweeper = CartSweeper(max_age_days=args.max_age_days, batch_size=args.batch_size, pause_ms=args.pause_ms)
+    result = sweeper.run(dry_run=args.dry_run, max_batches=args.max_batches)
+    print(result)
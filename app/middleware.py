@@ -7,9 +7,11 @@ from app.utils import decode_token
 
 from app.utils import decode_token
 from app.logger import logger
+from app.config import QUERY_STATS_HEADERS, N_PLUS_ONE_THRESHOLD
+from app.query_stats import collect_queries
 
 class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log all requests with user_id, endpoint, timestamp, and status"""
+    """Middleware to log all requests with user_id, endpoint, timestamp, status and SQL stats"""
     
     async def dispatch(self, request: Request, call_next):
         start_time = time.time()
@@ -26,10 +28,12 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             except Exception:
                 pass
         
-        # Call the next middleware/endpoint
-        response = await call_next(request)
+        # Call the next middleware/endpoint, counting the SQL it executes
+        with collect_queries() as query_stats:
+            response = await call_next(request)
         
         process_time = time.time() - start_time
+        db_time_ms = query_stats.duration * 1000
         
         # Log request details
         log_data = {
@@ -38,9 +42,26 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             "path": request.url.path,
             "status_code": response.status_code,
             "process_time": f"{process_time:.3f}s",
+            "db_queries": query_stats.count,
+            "db_time": f"{db_time_ms:.1f}ms",
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
         
         logger.info(json.dumps(log_data))
         
+        # Flag statement shapes repeated often enough to look like N+1 lazy loads
+        for statement, count in query_stats.repeated().items():
+            logger.warning(json.dumps({
+                "event": "n_plus_one",
+                "method": request.method,
+                "path": request.url.path,
+                "count": count,
+                "threshold": N_PLUS_ONE_THRESHOLD,
+                "statement": statement
+            }))
+        
+        if QUERY_STATS_HEADERS:
+            response.headers["X-DB-Query-Count"] = str(query_stats.count)
+            response.headers["X-DB-Time-Ms"] = f"{db_time_ms:.1f}"
+        
         return response
@@ -0,0 +1,107 @@
+"""
+Schema management for the application database.
+
+Creates tables that are missing and any index declared on the models that
+the database does not have yet, then stamps the schema version. On Postgres
+indexes are built with CREATE INDEX CONCURRENTLY so live tables are not
+locked against writes. Application startup only compares the stamp with
+SCHEMA_VERSION; it never changes the schema itself.
+
+Run with:
+    python -m app.migrations upgrade   # create missing tables/indexes and stamp
+    python -m app.migrations current   # print the stamped version
+    python -m app.migrations check     # exit 1 if the database needs an upgrade
+"""
+
+import sys
+from typing import Optional
+
+from sqlalchemy import func, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from app.database import Base, engine
+from app.logger import logger
+from app.models import SchemaVersion
+
+# Bump whenever the models add or change tables or indexes
+SCHEMA_VERSION = 4
+
+
+def missing_indexes(db_engine) -> list:
+    """Indexes declared on the models that are absent from existing tables"""
+    inspector = inspect(db_engine)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue  # create_all builds the table together with its indexes
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def create_index(db_engine, index):
+    """Create one index, without blocking writes on Postgres"""
+    with db_engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # CONCURRENTLY cannot run inside a transaction block
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            ddl = str(CreateIndex(index).compile(dialect=conn.dialect))
+            conn.exec_driver_sql(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+        else:
+            index.create(bind=conn)
+            conn.commit()
+
+
+def current_version(db_engine=engine) -> Optional[int]:
+    """Stamped schema version, or None for an unmanaged database"""
+    if not inspect(db_engine).has_table(SchemaVersion.__tablename__):
+        return None
+    with Session(db_engine) as db:
+        return db.scalar(select(func.max(SchemaVersion.version)))
+
+
+def stamp(db_engine, version: int = SCHEMA_VERSION):
+    """Record `version` as applied"""
+    with Session(db_engine) as db:
+        if db.get(SchemaVersion, version) is None:
+            db.add(SchemaVersion(version=version))
+            db.commit()
+
+
+def upgrade(db_engine=engine) -> list:
+    """Bring a database up to the models and stamp it; returns the names of created indexes"""
+    indexes = missing_indexes(db_engine)
+    Base.metadata.create_all(bind=db_engine)
+    for index in indexes:
+        logger.info(f"Creating index {index.name} on {index.table.name}")
+        create_index(db_engine, index)
+    stamp(db_engine)
+    return [index.name for index in indexes]
+
+
+def verify_schema(db_engine=engine) -> Optional[str]:
+    """Compare the stamp with SCHEMA_VERSION; returns a problem description or None"""
+    version = current_version(db_engine)
+    if version == SCHEMA_VERSION:
+        return None
+    return (
+        f"Database schema version is {version}, application expects {SCHEMA_VERSION}; "
+        f"run 'python -m app.migrations upgrade'"
+    )
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "upgrade":
+        created = upgrade()
+        print(f"Schema at version {SCHEMA_VERSION}; created {len(created)} indexes: {', '.join(created) or 'none'}")
+    elif command == "current":
+        print(current_version())
+    elif command == "check":
+        problem = verify_schema()
+        print(problem or f"Schema is at version {SCHEMA_VERSION}")
+        sys.exit(1 if problem else 0)
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -32,6 +32,10 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Category listings filtered and ranged by price
+        Index("ix_products_category_price", "category_id", "price"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -51,6 +55,12 @@ class Product(Base):
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # Cart lookups by user, and the "already in cart" check by (user, product)
+        Index("ix_cart_items_user_product", "user_id", "product_id"),
+        # The abandoned cart sweep walks items by age (app/maintenance.py)
+        Index("ix_cart_items_updated_at", "updated_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -65,6 +75,13 @@ class CartItem(Base):
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # The one-review-per-user check by (product, user)
+        Index("ix_reviews_product_user", "product_id", "user_id"),
+        # Keyset pages of a product's reviews, newest first or by rating
+        Index("ix_reviews_product_created", "product_id", "created_at"),
+        Index("ix_reviews_product_rating", "product_id", "rating", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
@@ -89,7 +106,7 @@ class Order(Base):
     __tablename__ = "orders"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     total_amount = Column(Float, nullable=False)
     shipping_address = Column(Text, nullable=False)
     shipping_cost = Column(Float, default=0.0)
@@ -107,7 +124,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)  # Price at time of order
@@ -128,3 +145,10 @@ class Coupon(Base):
     is_active = Column(Boolean, default=True)
     expiry_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+    
+    # One row per applied upgrade; the highest version is the current one
+    version = Column(Integer, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,217 @@
+"""
+On-demand cProfile profiling of individual requests.
+
+A request is profiled when it carries a valid signed X-Profile header or is
+picked by PROFILE_SAMPLE_RATE. Profiles are written as .pstats files to
+PROFILE_DIR, which is pruned to the newest PROFILE_MAX_FILES entries.
+
+cProfile hooks a whole thread, so only one coroutine endpoint per event loop
+is profiled at a time; other sampled requests on the same loop run unprofiled
+rather than overwrite its hook.
+
+Generate a header value with: python -m app.profiling GET /products/
+"""
+
+import asyncio
+import cProfile
+import functools
+import hashlib
+import hmac
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+import weakref
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from app.config import PROFILE_SECRET, PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILE_MAX_FILES
+from app.logger import logger
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_SUFFIX = ".pstats"
+
+_current_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+# Event loops with a coroutine endpoint being profiled
+_profiling_loops = weakref.WeakSet()
+
+
+def sign_profile_request(method: str, path: str, expires: int) -> str:
+    """Return an X-Profile header value valid for `method path` until `expires` (unix time)"""
+    message = f"{method.upper()} {path} {expires}".encode()
+    signature = hmac.new(PROFILE_SECRET.encode(), message, hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_header(method: str, path: str, value: str) -> bool:
+    """Check an X-Profile header value against the request it was sent with"""
+    try:
+        expires, _ = value.split(".", 1)
+        expires = int(expires)
+    except ValueError:
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(value, sign_profile_request(method, path, expires))
+
+
+class ProfileSession:
+    """cProfile runs belonging to one request, possibly spread over worker threads"""
+
+    def __init__(self):
+        self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._profilers = []
+        self._lock = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Profile the current thread; None if another profiler already holds the hook"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: one cProfile at a time per interpreter
+            return None
+        with self._lock:
+            self._profilers.append(profiler)
+        return profiler
+
+    @staticmethod
+    def stop(profiler: Optional[cProfile.Profile]):
+        if profiler is not None:
+            profiler.disable()
+
+    def save(self, method: str, path: str) -> Optional[str]:
+        """Merge the collected runs into one .pstats file and prune old profiles"""
+        if not self._profilers:
+            return None
+        stats = pstats.Stats(*self._profilers)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = path.strip("/").replace("/", "_") or "root"
+        filename = f"{self.profile_id}-{method.lower()}-{slug}{PROFILE_SUFFIX}"
+        stats.dump_stats(os.path.join(PROFILE_DIR, filename))
+        prune_profiles()
+        return filename
+
+
+def list_profiles() -> list:
+    """Stored profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    entries = [entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(PROFILE_SUFFIX)]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return entries
+
+
+def prune_profiles(max_files: int = PROFILE_MAX_FILES):
+    """Delete the oldest profiles beyond `max_files`"""
+    for entry in list_profiles()[max_files:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def profiled(endpoint):
+    """Wrap an endpoint so it is profiled when its request has an active session.
+
+    The wrapper runs wherever FastAPI runs the endpoint (the event loop or a
+    threadpool worker), so the profile covers the handler's own thread. When no
+    session is active it costs a single context variable lookup.
+    """
+    if getattr(endpoint, "__profiled__", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            session = _current_session.get()
+            loop = asyncio.get_running_loop()
+            if session is None or loop in _profiling_loops:
+                return await endpoint(*args, **kwargs)
+            _profiling_loops.add(loop)
+            profiler = session.start()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                session.stop(profiler)
+                _profiling_loops.discard(loop)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            session = _current_session.get()
+            if session is None:
+                return endpoint(*args, **kwargs)
+            profiler = session.start()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                session.stop(profiler)
+
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+class ProfilingRoute(APIRoute):
+    """Route class that makes its endpoint profilable on demand"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that opens a profile session for selected requests.
+
+    Written as plain ASGI so untriggered requests only pay for a header scan.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _should_profile(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return verify_profile_header(scope["method"], scope["path"], value.decode("latin-1"))
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession()
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", session.profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current_session.set(session)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _current_session.reset(token)
+            try:
+                # Writing and pruning files must not block the event loop
+                filename = await run_in_threadpool(session.save, scope["method"], scope["path"])
+                if filename:
+                    logger.info(f"Saved request profile {filename}")
+            except OSError as e:
+                logger.warning(f"Could not save request profile: {e}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python -m app.profiling METHOD PATH [TTL_SECONDS]")
+        sys.exit(1)
+    ttl = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    print(sign_profile_request(sys.argv[1], sys.argv[2], int(time.time()) + ttl))
@@ -0,0 +1,102 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import N_PLUS_ONE_THRESHOLD
+
+# Collapse expanded IN lists and whitespace so that the same query issued with
+# different parameters (or a different number of IN values) has one shape
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a SQL statement so repeated executions compare equal"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _IN_LIST.sub("(?)", shape)
+
+
+class QueryStats:
+    """Statements and database time collected while a collector is active"""
+
+    def __init__(self, parent: Optional["QueryStats"] = None, record: bool = False):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.statements = [] if record else None
+
+    def add(self, statement: str, parameters, duration: float):
+        """Record one executed statement here and in every enclosing collector"""
+        shape = statement_shape(statement)
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.shapes[shape] += 1
+            if stats.statements is not None:
+                stats.statements.append((statement, parameters))
+            stats = stats.parent
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict:
+        """Statement shapes executed more than `threshold` times (likely N+1 loads)"""
+        return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+
+@contextmanager
+def collect_queries(record: bool = False):
+    """Count every statement executed in the current context.
+
+    Collectors nest: statements are also counted by any enclosing collector,
+    so a test can wrap a request that the middleware is already measuring.
+    """
+    stats = QueryStats(parent=_current_stats.get(), record=record)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Test helper: fail if the wrapped block executes more than `limit` statements"""
+    with collect_queries(record=True) as stats:
+        yield stats
+    if stats.count > limit:
+        executed = "\n".join(statement for statement, _ in stats.statements)
+        raise AssertionError(
+            f"Expected at most {limit} queries, {stats.count} were executed:\n{executed}"
+        )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    stats.add(statement, parameters, time.perf_counter() - start_times.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
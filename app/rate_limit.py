@@ -0,0 +1,295 @@
+"""
+Admission control: per-client token buckets and load shedding.
+
+Every request is put in a route class with its own budget per client:
+
+- auth:  POST /auth/login and /auth/register (each one costs a bcrypt hash)
+- read:  GET and HEAD
+- write: everything else
+
+A client is the user id in a valid Bearer token, otherwise the connecting IP
+(or the last X-Forwarded-For hop with RATE_LIMIT_TRUST_FORWARDED_FOR). A
+client over its budget gets 429; once RATE_LIMIT_MAX_IN_FLIGHT requests are
+being handled, new ones get 503. Both carry Retry-After.
+
+Buckets live in memory per worker, or in Redis with RATE_LIMIT_BACKEND=redis so
+that all workers share one budget per client (the redis package is then
+required; Redis errors let requests through). The in-flight cap is always
+per worker. The whole layer is off unless RATE_LIMIT_ENABLED is set.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from app.config import (
+    RATE_LIMIT_AUTH, RATE_LIMIT_READ, RATE_LIMIT_WRITE, RATE_LIMIT_MAX_IN_FLIGHT, RATE_LIMIT_BACKEND,
+    RATE_LIMIT_REDIS_URL, RATE_LIMIT_MAX_CLIENTS, RATE_LIMIT_TRUST_FORWARDED_FOR
+)
+from app.logger import logger
+from app.utils import decode_token
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis_asyncio = None
+
+AUTH_PATHS = {"/auth/login", "/auth/register"}
+# Never limited or counted: health check and API docs
+EXEMPT_PATHS = {"/", "/docs", "/redoc", "/openapi.json"}
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: int
+    seconds: float
+
+    @property
+    def per_second(self) -> float:
+        return self.capacity / self.seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """Parse "requests/seconds", e.g. "10/60" for ten requests a minute"""
+        requests, _, seconds = value.partition("/")
+        rate = cls(int(requests), float(seconds or 1))
+        if rate.capacity < 1 or rate.seconds <= 0:
+            raise ValueError(f"Invalid rate limit {value!r}")
+        return rate
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Budget a request is charged to, or None if it is exempt"""
+    if path in EXEMPT_PATHS or method == "OPTIONS":
+        return None
+    if method == "POST" and path in AUTH_PATHS:
+        return "auth"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+
+@lru_cache(maxsize=4096)
+def _user_key(token: str) -> Optional[str]:
+    # Tokens are verified once per worker, not on every request
+    payload = decode_token(token)
+    user_id = payload.get("sub") if payload else None
+    return f"user:{user_id}" if user_id is not None else None
+
+
+def client_key(scope) -> str:
+    """The user in a valid Bearer token, else the client IP"""
+    forwarded_for = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                key = _user_key(token.strip())
+                if key:
+                    return key
+        elif name == b"x-forwarded-for" and RATE_LIMIT_TRUST_FORWARDED_FOR:
+            forwarded_for = value.decode("latin-1").rsplit(",", 1)[-1].strip()
+    if forwarded_for:
+        return f"ip:{forwarded_for}"
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class TokenBuckets:
+    """In-memory token buckets keyed by (route class, client)"""
+
+    def __init__(self, max_clients: int = RATE_LIMIT_MAX_CLIENTS, clock=time.monotonic):
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def acquire(self, key, rate: Rate) -> float:
+        """Take one token; returns 0 if it was taken, else the seconds until one is available"""
+        with self._lock:
+            now = self.clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._prune(now)
+                self._buckets[key] = [rate.capacity - 1, now, rate]
+                return 0.0
+
+            tokens = min(rate.capacity, bucket[0] + (now - bucket[1]) * rate.per_second)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0.0
+            bucket[0] = tokens
+            return (1 - tokens) / rate.per_second
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is the same as no bucket
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if bucket[0] + (now - bucket[1]) * bucket[2].per_second < bucket[2].capacity
+        }
+        if len(self._buckets) >= self.max_clients:
+            logger.warning(f"Rate limiter tracking {len(self._buckets)} active clients, resetting all buckets")
+            self._buckets = {}
+
+    def clear(self):
+        with self._lock:
+            self._buckets = {}
+
+
+# KEYS[1] = bucket, ARGV = capacity, tokens per second; returns the wait in seconds as a string
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1]) or capacity
+local at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - at) * per_second)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / per_second
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / per_second * 1000))
+return tostring(wait)
+"""
+
+
+class RedisTokenBuckets:
+    """Token buckets in Redis, shared by every worker; one round trip per request"""
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL, prefix: str = "ratelimit:"):
+        if redis_asyncio is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package")
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def __len__(self):
+        return 0  # Not tracked locally
+
+    async def acquire(self, key, rate: Rate) -> float:
+        route, client = key
+        try:
+            wait = await self._script(keys=[f"{self.prefix}{route}:{client}"], args=[rate.capacity, rate.per_second])
+        except Exception as e:
+            # Fail open: a Redis outage must not take the API down with it
+            logger.warning(f"Rate limit backend unavailable, admitting request: {e}")
+            return 0.0
+        return float(wait)
+
+    def clear(self):
+        pass
+
+
+class AdmissionControl:
+    """Budgets, buckets and in-flight accounting shared by the middleware and /admin"""
+
+    def __init__(self, rates: dict, buckets, max_in_flight: int = RATE_LIMIT_MAX_IN_FLIGHT):
+        self.rates = rates
+        self.buckets = buckets
+        self.shared = isinstance(buckets, RedisTokenBuckets)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.limited = Counter()
+        self.shed = 0
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self.shared else "memory",
+            "rates": {name: f"{rate.capacity}/{rate.seconds:g}" for name, rate in self.rates.items()},
+            "clients": len(self.buckets),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "limited": dict(self.limited),
+            "shed": self.shed,
+        }
+
+
+def create_admission_control() -> AdmissionControl:
+    rates = {
+        "auth": Rate.parse(RATE_LIMIT_AUTH),
+        "read": Rate.parse(RATE_LIMIT_READ),
+        "write": Rate.parse(RATE_LIMIT_WRITE),
+    }
+    buckets = RedisTokenBuckets() if RATE_LIMIT_BACKEND == "redis" else TokenBuckets()
+    return AdmissionControl(rates, buckets)
+
+
+_admission = None
+
+
+def get_admission_control() -> AdmissionControl:
+    """The worker's admission control, created on first use"""
+    global _admission
+    if _admission is None:
+        _admission = create_admission_control()
+    return _admission
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """ASGI middleware that sheds load past the in-flight cap and enforces per-client budgets.
+
+    Written as plain ASGI: an admitted request costs a header scan, a cached
+    token lookup and one bucket update.
+    """
+
+    def __init__(self, app, admission: Optional[AdmissionControl] = None):
+        self.app = app
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        route = route_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        admission = self.admission or get_admission_control()
+        if admission.max_in_flight and admission.in_flight >= admission.max_in_flight:
+            admission.shed += 1
+            await _reject(send, 503, "Server is busy, retry shortly", 1)
+            return
+
+        rate = admission.rates[route]
+        key = (route, client_key(scope))
+        if admission.shared:
+            wait = await admission.buckets.acquire(key, rate)
+        else:
+            wait = admission.buckets.acquire(key, rate)
+        if wait > 0:
+            admission.limited[route] += 1
+            await _reject(send, 429, "Too many requests", wait)
+            return
+
+        admission.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.in_flight -= 1
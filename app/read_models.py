@@ -0,0 +1,47 @@
+"""
+Read models: compact rows for read-only list paths.
+
+A read model is a slotted dataclass with one field per response schema field,
+filled positionally from a select() of exactly those columns. It carries no
+identity map entry, change tracking or relationship proxies, takes a fraction
+of the memory of an ORM instance (or of a dict per row), and orjson
+serializes it directly as a JSON object with the response_model's keys.
+
+Fields named in `related` (such as an order's items) are not columns; they
+start as empty lists and the caller fills them from a second query.
+
+    rows = load_rows(ProductRow, db.query(*ProductRow.columns).limit(100))
+    return FastJSONResponse(rows)
+
+benchmarks/bench_read_models.py compares this with the ORM path.
+"""
+
+from dataclasses import field, make_dataclass
+from itertools import starmap
+from typing import Iterable
+
+from app.models import Order, OrderItem, Product, Review
+from app.schemas import OrderItemResponse, OrderResponse, ProductResponse, ReviewResponse
+from app.serialization import schema_columns
+
+
+def read_model(name: str, model, schema, related=()) -> type:
+    """A slotted dataclass for `schema`, with `columns` to select from `model` in field order"""
+    columns = schema_columns(model, schema, exclude=related)
+    fields = [(column.key, schema.model_fields[column.key].annotation) for column in columns]
+    fields += [(key, schema.model_fields[key].annotation, field(default_factory=list)) for key in related]
+    cls = make_dataclass(name, fields, slots=True)
+    cls.__module__ = __name__
+    cls.columns = columns
+    return cls
+
+
+def load_rows(read_model: type, rows: Iterable) -> list:
+    """Read models for column rows (from a column query, select() result or list of tuples)"""
+    return list(starmap(read_model, rows))
+
+
+ProductRow = read_model("ProductRow", Product, ProductResponse)
+ReviewRow = read_model("ReviewRow", Review, ReviewResponse)
+OrderItemRow = read_model("OrderItemRow", OrderItem, OrderItemResponse)
+OrderRow = read_model("OrderRow", Order, OrderResponse, related=("items",))
@@ -0,0 +1,249 @@
+"""
+"Frequently bought together": a precomputed product co-occurrence index.
+
+An offline job reads order_items in chunks of order ids and counts, for every
+pair of products, the orders containing both. Counts are kept as a sparse COO
+matrix: sorted int64 keys (product_a << 32 | product_b) with a count each.
+Pairs are scored by cosine similarity, count / sqrt(orders_a * orders_b), so
+best-sellers do not become everyone's neighbour. The top
+RECOMMENDATIONS_TOP_K neighbours of each product are written to related.npy,
+an int32 matrix with one row per product id (0 pads short rows). The API
+memory-maps it, so a lookup is a single row read.
+
+The job is incremental. It saves the raw counts and the last order id it
+read, and the next run only reads newer orders:
+
+    python -m app.recommendations            # new orders since the last run
+    python -m app.recommendations --full     # rebuild from every order
+
+Cancelled orders and baskets larger than RECOMMENDATIONS_MAX_BASKET (bulk
+purchases that say little about affinity) are ignored. Orders whose status
+changes after they were counted are not revisited until a --full rebuild.
+"""
+
+import argparse
+import os
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import (
+    RECOMMENDATIONS_DIR, RECOMMENDATIONS_TOP_K, RECOMMENDATIONS_MIN_COUNT, RECOMMENDATIONS_CHUNK_ORDERS,
+    RECOMMENDATIONS_MAX_BASKET, RECOMMENDATIONS_CHECK_INTERVAL
+)
+from app.logger import logger
+from app.models import Order, OrderItem, OrderStatus
+
+STATE_FILE = "cooccurrence.npz"
+INDEX_FILE = "related.npy"
+_LOW_BITS = np.int64(0xFFFFFFFF)
+
+
+class CooccurrenceCounts:
+    """Sparse symmetric pair counts and per-product order counts"""
+
+    def __init__(self, pair_keys=None, pair_counts=None, products=None, product_counts=None, last_order_id: int = 0):
+        self.pair_keys = np.empty(0, np.int64) if pair_keys is None else pair_keys
+        self.pair_counts = np.empty(0, np.int64) if pair_counts is None else pair_counts
+        self.products = np.empty(0, np.int64) if products is None else products
+        self.product_counts = np.empty(0, np.int64) if product_counts is None else product_counts
+        self.last_order_id = last_order_id
+        self._pending = []
+
+    @classmethod
+    def load(cls, path: str) -> "CooccurrenceCounts":
+        with np.load(path) as state:
+            return cls(
+                state["pair_keys"], state["pair_counts"], state["products"], state["product_counts"],
+                int(state["last_order_id"])
+            )
+
+    def save(self, path: str):
+        self._reduce()
+        _atomic_write(path, lambda f: np.savez(
+            f, pair_keys=self.pair_keys, pair_counts=self.pair_counts, products=self.products,
+            product_counts=self.product_counts, last_order_id=self.last_order_id
+        ))
+
+    def add_orders(self, order_ids: np.ndarray, product_ids: np.ndarray):
+        """Count the baskets in (order id, product id) rows; every order must be complete"""
+        if not len(order_ids):
+            return
+        # One row per (order, product), grouped by order
+        baskets = np.unique(np.stack([order_ids, product_ids], axis=1), axis=0)
+        _, sizes = np.unique(baskets[:, 0], return_counts=True)
+        keep = np.repeat(sizes <= RECOMMENDATIONS_MAX_BASKET, sizes)
+        baskets = baskets[keep]
+        if not len(baskets):
+            return
+        _, starts, sizes = np.unique(baskets[:, 0], return_index=True, return_counts=True)
+        products = baskets[:, 1]
+
+        # Every ordered pair within a basket: item i is repeated once per item of its basket
+        item_sizes = np.repeat(sizes, sizes)
+        left = np.repeat(np.arange(len(products)), item_sizes)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(item_sizes) - item_sizes, item_sizes)
+        right = np.repeat(np.repeat(starts, sizes), item_sizes) + offsets
+        distinct = left != right
+
+        self._pending.append((
+            (products[left[distinct]] << 32) | products[right[distinct]],
+            np.ones(int(distinct.sum()), np.int64),
+            products,
+        ))
+        if sum(len(keys) for keys, _, _ in self._pending) > max(5_000_000, len(self.pair_keys)):
+            self._reduce()
+
+    def _reduce(self):
+        # Merge pending chunks into the sorted COO arrays, summing duplicate keys
+        if not self._pending:
+            return
+        keys = np.concatenate([self.pair_keys] + [keys for keys, _, _ in self._pending])
+        counts = np.concatenate([self.pair_counts] + [counts for _, counts, _ in self._pending])
+        self.pair_keys, inverse = np.unique(keys, return_inverse=True)
+        self.pair_counts = np.bincount(inverse, weights=counts, minlength=len(self.pair_keys)).astype(np.int64)
+
+        products = np.concatenate([self.products] + [products for _, _, products in self._pending])
+        counts = np.concatenate([self.product_counts] + [np.ones(len(p), np.int64) for _, _, p in self._pending])
+        self.products, inverse = np.unique(products, return_inverse=True)
+        self.product_counts = np.bincount(inverse, weights=counts, minlength=len(self.products)).astype(np.int64)
+        self._pending = []
+
+    def top_neighbours(self, top_k: int = RECOMMENDATIONS_TOP_K, min_count: int = RECOMMENDATIONS_MIN_COUNT) -> np.ndarray:
+        """int32 matrix: row p holds product p's neighbours, best first, 0-padded"""
+        self._reduce()
+        rows = int(self.products.max()) + 1 if len(self.products) else 1
+        related = np.zeros((rows, top_k), np.int32)
+
+        support = self.pair_counts >= min_count
+        keys, counts = self.pair_keys[support], self.pair_counts[support]
+        if not len(keys):
+            return related
+        left, right = keys >> 32, keys & _LOW_BITS
+        orders = self.product_counts[np.searchsorted(self.products, left)] * self.product_counts[np.searchsorted(self.products, right)]
+        scores = counts / np.sqrt(orders)
+
+        # Group by product, best score first (ties: more shared orders, then lower id)
+        order = np.lexsort((right, -counts, -scores, left))
+        left, right = left[order], right[order]
+        group_starts = np.flatnonzero(np.r_[True, left[1:] != left[:-1]])
+        rank = np.arange(len(left)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(left)]))
+        top = rank < top_k
+        related[left[top], rank[top]] = right[top]
+        return related
+
+
+def _atomic_write(path: str, write):
+    # Readers map the old file until they reopen, so replace it rather than rewrite it in place
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _order_item_chunks(db: Session, after_order_id: int, chunk_orders: int):
+    """(order ids, product ids) arrays for successive ranges of order ids, each holding whole orders"""
+    last_order_id = db.query(func.max(OrderItem.order_id)).scalar() or 0
+    start = after_order_id
+    while start < last_order_id:
+        end = min(start + chunk_orders, last_order_id)
+        rows = (
+            db.query(OrderItem.order_id, OrderItem.product_id)
+            .join(Order, Order.id == OrderItem.order_id)
+            .filter(OrderItem.order_id > start, OrderItem.order_id <= end, Order.status != OrderStatus.CANCELLED)
+            .all()
+        )
+        yield np.array([row[0] for row in rows], np.int64), np.array([row[1] for row in rows], np.int64), end
+        start = end
+
+
+def build_index(
+    db: Session,
+    directory: str = RECOMMENDATIONS_DIR,
+    full: bool = False,
+    chunk_orders: int = RECOMMENDATIONS_CHUNK_ORDERS,
+) -> dict:
+    """Count orders placed since the last build (or all of them) and rewrite the index"""
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    state_path = os.path.join(directory, STATE_FILE)
+    counts = CooccurrenceCounts() if full or not os.path.exists(state_path) else CooccurrenceCounts.load(state_path)
+
+    first_order_id = counts.last_order_id
+    for order_ids, product_ids, end in _order_item_chunks(db, counts.last_order_id, chunk_orders):
+        counts.add_orders(order_ids, product_ids)
+        counts.last_order_id = end
+
+    related = counts.top_neighbours()
+    counts.save(state_path)
+    _atomic_write(os.path.join(directory, INDEX_FILE), lambda f: np.save(f, related))
+
+    stats = {
+        "orders_from": first_order_id,
+        "orders_to": counts.last_order_id,
+        "pairs": len(counts.pair_keys),
+        "products": int((related[:, 0] > 0).sum()),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    logger.info(f"Built related products index: {stats}")
+    return stats
+
+
+class RelatedProductsIndex:
+    """The memory-mapped top-K matrix, reopened when the job replaces the file"""
+
+    def __init__(self, directory: str = RECOMMENDATIONS_DIR, check_interval: float = RECOMMENDATIONS_CHECK_INTERVAL):
+        self.path = os.path.join(directory, INDEX_FILE)
+        self.check_interval = check_interval
+        self.matrix = None
+        self._mtime = None
+        self._next_check = 0.0
+
+    def _current(self) -> Optional[np.ndarray]:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                self.matrix = np.load(self.path, mmap_mode="r") if mtime is not None else None
+                self._mtime = mtime
+        return self.matrix
+
+    def related(self, product_id: int, limit: int = RECOMMENDATIONS_TOP_K) -> list:
+        """Neighbour product ids, best first (empty before the first build or for unknown products)"""
+        matrix = self._current()
+        if matrix is None or not 0 <= product_id < len(matrix):
+            return []
+        row = matrix[product_id]
+        return row[row > 0][:limit].tolist()
+
+    def related_to_many(self, product_ids: list, limit: int = RECOMMENDATIONS_TOP_K) -> list:
+        """Neighbours of a set of products (e.g. a cart) ranked by summed rank, excluding the set itself"""
+        scores = {}
+        for product_id in product_ids:
+            for rank, neighbour in enumerate(self.related(product_id)):
+                scores[neighbour] = scores.get(neighbour, 0.0) + 1.0 / (rank + 1)
+        for product_id in product_ids:
+            scores.pop(product_id, None)
+        return sorted(scores, key=lambda neighbour: (-scores[neighbour], neighbour))[:limit]
+
+
+related_products = RelatedProductsIndex()
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Build the related products (co-occurrence) index")
+    parser.add_argument("--full", action="store_true", help="Recount every order instead of only new ones")
+    parser.add_argument("--dir", default=RECOMMENDATIONS_DIR)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        print(build_index(db, args.dir, full=args.full))
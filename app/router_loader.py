@@ -0,0 +1,71 @@
+"""
+Lazy router registration.
+
+Router modules (and the schemas and dependencies they pull in) are imported
+and included on the first request under their path prefix rather than when
+app.main is imported. Requesting the OpenAPI schema loads every router.
+"""
+
+import importlib
+import threading
+
+# First path segment -> router modules, in include order (earlier modules win on overlapping paths)
+ROUTER_GROUPS = {
+    "auth": ["app.routers.auth"],
+    "categories": ["app.routers.categories"],
+    "products": ["app.routers.products", "app.routers.reviews"],
+    "cart": ["app.routers.cart"],
+    "orders": ["app.routers.orders"],
+    "coupons": ["app.routers.coupons"],
+    "shipping": ["app.routers.shipping"],
+    "search": ["app.routers.search"],
+    "admin": ["app.routers.admin"],
+}
+
+
+class RouterLoader:
+    """Includes groups of routers into an app at most once"""
+
+    def __init__(self, app, groups=ROUTER_GROUPS):
+        self.app = app
+        self.groups = groups
+        self.loaded = set()
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return len(self.loaded) == len(self.groups)
+
+    def load(self, group: str):
+        if group in self.loaded:
+            return
+        with self._lock:
+            if group in self.loaded:
+                return
+            for module_name in self.groups[group]:
+                self.app.include_router(importlib.import_module(module_name).router)
+            # Regenerate the OpenAPI schema with the new routes on next request
+            self.app.openapi_schema = None
+            self.loaded.add(group)
+
+    def load_all(self):
+        for group in self.groups:
+            self.load(group)
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware that loads the router group for a request's path before routing it"""
+
+    def __init__(self, app, loader: RouterLoader):
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not self.loader.complete:
+            path = scope["path"]
+            group = path.split("/", 2)[1]
+            if group in self.loader.groups:
+                self.loader.load(group)
+            elif path == self.loader.app.openapi_url:
+                self.loader.load_all()
+        await self.app(scope, receive, send)
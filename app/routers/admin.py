@@ -0,0 +1,144 @@
+import hmac
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Header
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.config import ADMIN_TOKEN
+from app import database
+from app.database import get_db, get_pool_stats
+from app.bulk import create_coupons, iter_csv
+from app.profiling import list_profiles
+from app.shipping_rates import rate_tables
+from app.rate_limit import get_admission_control
+from app.invalidation import invalidation_bus
+from app.maintenance import cart_sweeper
+from app.schemas import ProfileInfo, BulkCouponCreate
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency that checks the X-Admin-Token header against ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API is disabled"
+        )
+    
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token"
+        )
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/profiles", response_model=List[ProfileInfo])
+def get_profiles():
+    """List stored request profiles, newest first"""
+    profiles = []
+    for entry in list_profiles():
+        stat = entry.stat()
+        profiles.append({
+            "name": entry.name,
+            "size_bytes": stat.st_size,
+            "created_at": datetime.utcfromtimestamp(stat.st_mtime)
+        })
+    return profiles
+
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    """Download a stored profile (.pstats, load with pstats or snakeviz)"""
+    # Only serve files that are actually listed, never arbitrary paths
+    for entry in list_profiles():
+        if entry.name == name:
+            return FileResponse(entry.path, media_type="application/octet-stream", filename=name)
+    
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Profile not found"
+    )
+
+@router.get("/pool")
+def pool_stats():
+    """Live connection pool statistics for this worker process"""
+    stats = get_pool_stats()
+    stats["replicas"] = [
+        {"url": replica.url.render_as_string(hide_password=True), **get_pool_stats(replica)}
+        for replica in database.replica_router.replicas
+    ]
+    return stats
+
+@router.post("/coupons/bulk", status_code=status.HTTP_201_CREATED)
+def bulk_create_coupons(coupon_data: BulkCouponCreate, db: Session = Depends(get_db)):
+    """Create `count` unique coupons from a code template and stream the codes back as CSV"""
+    try:
+        codes = create_coupons(
+            db,
+            coupon_data.template,
+            coupon_data.count,
+            discount_percentage=coupon_data.discount_percentage,
+            discount_amount=coupon_data.discount_amount,
+            max_uses=coupon_data.max_uses,
+            expiry_date=coupon_data.expiry_date
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except IntegrityError:
+        # A coupon with one of the generated codes was created meanwhile; nothing was inserted
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A generated code was created concurrently; retry the request"
+        )
+    
+    return StreamingResponse(
+        iter_csv(codes),
+        status_code=status.HTTP_201_CREATED,
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="coupons.csv"'}
+    )
+
+@router.get("/shipping-rates")
+def shipping_rates_stats():
+    """The shipping rate table currently in use by this worker"""
+    return rate_tables.stats()
+
+@router.post("/shipping-rates/reload")
+def reload_shipping_rates():
+    """Reload the shipping rate table file now"""
+    if not rate_tables.path:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="SHIPPING_RATES_FILE is not configured"
+        )
+    
+    try:
+        rate_tables.reload()
+    except (OSError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Rate table not reloaded: {e}"
+        )
+    
+    # Other workers reload their copy too
+    invalidation_bus.publish("shipping_rates")
+    return rate_tables.stats()
+
+@router.get("/rate-limits")
+def rate_limit_stats():
+    """Rate limit budgets and rejection counts for this worker"""
+    return get_admission_control().stats()
+
+@router.get("/invalidation")
+def invalidation_stats():
+    """Invalidation bus transport state and event counts for this worker"""
+    return invalidation_bus.stats()
+
+@router.get("/maintenance")
+def maintenance_stats():
+    """Abandoned cart sweep: schedule, the run in progress, the last run and totals for this worker"""
+    return {"cart_sweeper": cart_sweeper.stats()}
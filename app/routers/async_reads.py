@@ -0,0 +1,135 @@
+"""
+Async versions of the hottest read handlers, served from an AsyncSession.
+
+Included ahead of the sync routers when ASYNC_DB_ENABLED is set, so these
+handlers shadow the sync ones on the same paths and run on the event loop
+instead of occupying a threadpool worker for the whole request.
+"""
+
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+
+from app.database import get_async_db
+from app.models import Product, CartItem, Order, OrderItem, User
+from app.schemas import ProductResponse, CartResponse, OrderResponse
+from app.routers.auth import get_current_user_async
+from app.routers.cart import cart_totals_statement, cart_summary
+from app.routers.products import product_loader, product_list_loader, filter_products
+from app.read_models import OrderItemRow, OrderRow, ProductRow, load_rows
+from app.serialization import FastJSONResponse
+from app.http_cache import set_cache_headers, product_key, category_key, PRODUCTS_KEY
+from app.config import CACHE_POLICY_PRODUCT_LIST, CACHE_POLICY_PRODUCT
+from app.profiling import ProfilingRoute
+
+router = APIRouter(route_class=ProfilingRoute)
+
+@router.get("/products/", response_model=List[ProductResponse], tags=["Products"])
+async def get_products_async(
+    category_id: Optional[int] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    q: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get products with filtering and pagination"""
+    async def load():
+        query = filter_products(select(*ProductRow.columns), category_id, min_price, max_price, q)
+        return load_rows(ProductRow, await db.execute(query.offset(skip).limit(limit)))
+
+    products = await product_list_loader.get_async((category_id, min_price, max_price, q, skip, limit), load)
+    response = FastJSONResponse(products)
+
+    # Same CDN policy and purge keys as the sync handler
+    keys = [PRODUCTS_KEY] + [product_key(product.id) for product in products]
+    if category_id:
+        keys.append(category_key(category_id))
+    set_cache_headers(response, CACHE_POLICY_PRODUCT_LIST, keys)
+    return response
+
+@router.get("/products/{product_id}", response_model=ProductResponse, tags=["Products"])
+async def get_product_async(product_id: int, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Get product details by ID"""
+    async def load():
+        row = (await db.execute(select(*ProductRow.columns).where(Product.id == product_id))).first()
+        return ProductRow(*row) if row else None
+
+    product = await product_loader.get_async(product_id, load)
+
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+
+    set_cache_headers(response, CACHE_POLICY_PRODUCT, [product_key(product.id), category_key(product.category_id)])
+    return product
+
+@router.get("/cart/", response_model=CartResponse, tags=["Cart"])
+async def get_cart_async(
+    user_id: int = Query(...),
+    postal_code: Optional[str] = Query(None),
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get user's cart with all items, totals and the shipping quote"""
+    # Verify user exists
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    # Products are loaded eagerly: lazy loads are not possible on an AsyncSession
+    result = await db.execute(
+        select(CartItem)
+        .where(CartItem.user_id == user_id)
+        .options(selectinload(CartItem.product))
+    )
+    cart_items = result.scalars().all()
+
+    totals = (await db.execute(cart_totals_statement(user_id))).one()
+
+    return {
+        "items": cart_items,
+        **cart_summary(totals, postal_code)
+    }
+
+@router.get("/orders/", response_model=List[OrderResponse], tags=["Orders"])
+async def get_user_orders_async(
+    user_id: int = Query(...),
+    authorization: Optional[str] = Header(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get order history for a user"""
+    user = await get_current_user_async(authorization, db)
+
+    # Verify ownership
+    if user.id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view these orders"
+        )
+
+    orders = load_rows(OrderRow, await db.execute(
+        select(*OrderRow.columns).where(Order.user_id == user_id).offset(skip).limit(limit)
+    ))
+
+    items_by_order = {order.id: order.items for order in orders}
+    if items_by_order:
+        items = await db.execute(
+            select(OrderItem.order_id, *OrderItemRow.columns)
+            .where(OrderItem.order_id.in_(items_by_order))
+            .order_by(OrderItem.id)
+        )
+        for order_id, *item in items:
+            items_by_order[order_id].append(OrderItemRow(*item))
+
+    return FastJSONResponse(orders)
@@ -1,14 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Header
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Optional, TYPE_CHECKING
 
 from app.database import get_db
 from app.models import User
 from app.schemas import UserCreate, UserLogin, TokenResponse, UserResponse
 from app.utils import hash_password, verify_password, create_access_token, decode_token
 from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.profiling import ProfilingRoute
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=ProfilingRoute)
 
 @router.post("/register", response_model=TokenResponse)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
@@ -74,11 +79,8 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         "user": UserResponse.from_orm(user)
     }
 
-def get_current_user_from_header(
-    authorization: str = Header(None),
-    db: Session = Depends(get_db)
-) -> User:
-    """Dependency to get current user from Authorization header"""
+def _user_id_from_authorization(authorization: Optional[str]) -> int:
+    """Validate a Bearer Authorization header and return the user id it carries"""
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -105,8 +107,28 @@ def get_current_user_from_header(
             detail="Invalid or expired token"
         )
     
-    user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    return int(payload.get("sub"))
+
+def get_current_user_from_header(
+    authorization: str = Header(None),
+    db: Session = Depends(get_db)
+) -> User:
+    """Dependency to get current user from Authorization header"""
+    user_id = _user_id_from_authorization(authorization)
+    user = db.query(User).filter(User.id == user_id).first()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return user
+
+async def get_current_user_async(authorization: Optional[str], db: "AsyncSession") -> User:
+    """Async counterpart of get_current_user_from_header for AsyncSession handlers"""
+    user_id = _user_id_from_authorization(authorization)
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
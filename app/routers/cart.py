@@ -1,22 +1,60 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
-from sqlalchemy.orm import Session
-from typing import Optional
-from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
 
 from app.database import get_db
-from app.models import CartItem, Product, User, Coupon
-from app.schemas import CartItemCreate, CartItemUpdate, CartResponse, CartItemResponse, CartCouponRequest, CartCouponResponse
+from app.models import CartItem, Product, User
+from app.schemas import (
+    CartItemCreate, CartItemUpdate, CartResponse, CartItemResponse, CartCouponRequest, CartCouponResponse, ProductResponse
+)
 from app.routers.auth import get_current_user_from_header
+from app.profiling import ProfilingRoute
+from app.coupons import get_usable_coupon, calculate_discount
+from app.shipping_rates import rate_tables, quote_shipping
+from app.recommendations import related_products
+from app.routers.products import product_rows_in_order
+from app.serialization import FastJSONResponse
+from app.config import RECOMMENDATIONS_TOP_K
 
-router = APIRouter(prefix="/cart", tags=["Cart"])
+router = APIRouter(prefix="/cart", tags=["Cart"], route_class=ProfilingRoute)
+
+def cart_totals_statement(user_id: int):
+    """Item count, subtotal and total weight of a user's cart as one aggregate query"""
+    return (
+        select(
+            func.count(CartItem.id).label("item_count"),
+            func.coalesce(func.sum(Product.price * CartItem.quantity), 0.0).label("subtotal"),
+            func.coalesce(func.sum(func.coalesce(Product.weight, 0.0) * CartItem.quantity), 0.0).label("total_weight"),
+        )
+        .select_from(CartItem)
+        .join(Product, CartItem.product_id == Product.id)
+        .where(CartItem.user_id == user_id)
+    )
+
+def cart_summary(totals, postal_code: Optional[str] = None) -> dict:
+    """Cart totals and the shipping quote checkout will charge for them"""
+    zone = rate_tables.lookup(postal_code)
+    shipping_cost, estimated_days = quote_shipping(totals.total_weight, totals.subtotal, zone)
+    if not totals.item_count:
+        # Nothing to ship
+        shipping_cost = 0.0
+    return {
+        "total": totals.subtotal,
+        "total_weight": totals.total_weight,
+        "shipping_cost": shipping_cost,
+        "estimated_days": estimated_days,
+        "shipping_zone": zone.name
+    }
 
 @router.get("/", response_model=CartResponse)
 def get_cart(
     user_id: int = Query(...),
+    postal_code: Optional[str] = Query(None),
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Get user's cart with all items and total"""
+    """Get user's cart with all items, totals and the shipping quote"""
     # Verify user exists
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -25,17 +63,27 @@ def get_cart(
             detail="User not found"
         )
     
-    # Fetch cart items
-    cart_items = db.query(CartItem).filter(CartItem.user_id == user_id).all()
+    # Fetch cart items with their products in the same query (CartItemResponse includes the product)
+    cart_items = db.query(CartItem).options(joinedload(CartItem.product)).filter(CartItem.user_id == user_id).all()
     
-    # Calculate total
-    total = sum(item.product.price * item.quantity for item in cart_items)
+    # Totals come from the same aggregate query checkout uses
+    totals = db.execute(cart_totals_statement(user_id)).one()
     
     return {
         "items": cart_items,
-        "total": total
+        **cart_summary(totals, postal_code)
     }
 
+@router.get("/related", response_model=List[ProductResponse])
+def get_cart_related_products(
+    user_id: int = Query(...),
+    limit: int = Query(10, ge=1, le=RECOMMENDATIONS_TOP_K),
+    db: Session = Depends(get_db)
+):
+    """Products frequently bought together with what is in the cart"""
+    product_ids = [product_id for product_id, in db.query(CartItem.product_id).filter(CartItem.user_id == user_id)]
+    return FastJSONResponse(product_rows_in_order(db, related_products.related_to_many(product_ids, limit)))
+
 @router.post("/", response_model=CartItemResponse, status_code=status.HTTP_201_CREATED)
 def add_to_cart(
     cart_data: CartItemCreate,
@@ -167,51 +215,22 @@ def apply_coupon(
             detail="Not authorized to apply coupon for this user"
         )
     
-    # Get cart items
-    cart_items = db.query(CartItem).filter(CartItem.user_id == user.id).all()
+    # Cart size and subtotal
+    totals = db.execute(cart_totals_statement(user.id)).one()
     
-    if not cart_items:
+    if not totals.item_count:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cart is empty"
         )
     
-    # Calculate subtotal
-    subtotal = sum(item.product.price * item.quantity for item in cart_items)
+    subtotal = totals.subtotal
     
     # Find coupon
-    coupon = db.query(Coupon).filter(Coupon.code == request.coupon_code).first()
-    
-    if not coupon:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Coupon not found"
-        )
-    
-    if not coupon.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Coupon is inactive"
-        )
-    
-    if coupon.expiry_date and coupon.expiry_date < datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Coupon has expired"
-        )
-    
-    if coupon.max_uses and coupon.current_uses >= coupon.max_uses:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Coupon usage limit reached"
-        )
+    coupon = get_usable_coupon(db, request.coupon_code)
     
     # Calculate discount
-    discount = 0.0
-    if coupon.discount_percentage:
-        discount = subtotal * (coupon.discount_percentage / 100)
-    elif coupon.discount_amount:
-        discount = coupon.discount_amount
+    discount = calculate_discount(coupon, subtotal)
         
     # Ensure discount doesn't exceed subtotal
     if discount > subtotal:
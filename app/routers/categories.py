@@ -1,17 +1,23 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Category
 from app.schemas import CategoryCreate, CategoryResponse
+from app.profiling import ProfilingRoute
+from app.http_cache import set_cache_headers, purge, category_key, CATEGORIES_KEY
+from app.config import CACHE_POLICY_CATEGORIES
+from app.autocomplete import autocomplete_index
+from app.invalidation import invalidation_bus
 
-router = APIRouter(prefix="/categories", tags=["Categories"])
+router = APIRouter(prefix="/categories", tags=["Categories"], route_class=ProfilingRoute)
 
 @router.get("/", response_model=List[CategoryResponse])
-def get_all_categories(db: Session = Depends(get_db)):
+def get_all_categories(response: Response, db: Session = Depends(get_read_db)):
     """Get all product categories"""
     categories = db.query(Category).all()
+    set_cache_headers(response, CACHE_POLICY_CATEGORIES, [CATEGORIES_KEY])
     return categories
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -37,10 +43,14 @@ def create_category(category_data: CategoryCreate, db: Session = Depends(get_db)
     db.commit()
     db.refresh(db_category)
     
+    purge(CATEGORIES_KEY)
+    autocomplete_index.upsert_category(db_category.id, db_category.name)
+    invalidation_bus.publish("category", db_category.id)
+    
     return db_category
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+def get_category(category_id: int, response: Response, db: Session = Depends(get_read_db)):
     """Get category by ID"""
     category = db.query(Category).filter(Category.id == category_id).first()
     
@@ -50,4 +60,5 @@ def get_category(category_id: int, db: Session = Depends(get_db)):
             detail="Category not found"
         )
     
+    set_cache_headers(response, CACHE_POLICY_CATEGORIES, [category_key(category.id)])
     return category
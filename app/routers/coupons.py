@@ -1,14 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Header
 from sqlalchemy.orm import Session
 from typing import Optional
-from datetime import datetime
 
 from app.database import get_db
 from app.models import Coupon
 from app.schemas import CouponCreate, CouponResponse
 from app.routers.auth import get_current_user_from_header
+from app.profiling import ProfilingRoute
+from app.coupons import get_usable_coupon, invalidate_coupon
 
-router = APIRouter(prefix="/coupons", tags=["Coupons"])
+router = APIRouter(prefix="/coupons", tags=["Coupons"], route_class=ProfilingRoute)
 
 @router.post("/", response_model=CouponResponse, status_code=status.HTTP_201_CREATED)
 def create_coupon(
@@ -46,6 +47,9 @@ def create_coupon(
     db.commit()
     db.refresh(db_coupon)
     
+    # The code may have been cached as missing
+    invalidate_coupon(db_coupon.code)
+    
     return db_coupon
 
 @router.post("/validate", response_model=CouponResponse)
@@ -54,33 +58,7 @@ def validate_coupon(
     db: Session = Depends(get_db)
 ):
     """Validate a coupon code"""
-    coupon = db.query(Coupon).filter(Coupon.code == code).first()
-    
-    if not coupon:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Coupon not found"
-        )
-    
-    if not coupon.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Coupon is inactive"
-        )
-    
-    if coupon.expiry_date and coupon.expiry_date < datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Coupon has expired"
-        )
-    
-    if coupon.max_uses and coupon.current_uses >= coupon.max_uses:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Coupon usage limit reached"
-        )
-    
-    return coupon
+    return get_usable_coupon(db, code)
 
 @router.get("/{coupon_id}", response_model=CouponResponse)
 def get_coupon(
@@ -1,13 +1,20 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from typing import Optional, List
 
 from app.database import get_db
-from app.models import Order, OrderItem, CartItem, Product, User, Coupon, OrderStatus
+from app.models import Order, OrderItem, CartItem, Product, User, OrderStatus
 from app.schemas import OrderCreate, OrderResponse, OrderStatusEnum
 from app.routers.auth import get_current_user_from_header
+from app.profiling import ProfilingRoute
+from app.routers.cart import cart_totals_statement, cart_summary
+from app.shipping_rates import postal_code_from_address
+from app.coupons import lookup_coupon, coupon_problem, calculate_discount, redeem_coupon, invalidate_coupon
+from app.serialization import FastJSONResponse
+from app.read_models import OrderItemRow, OrderRow, load_rows
 
-router = APIRouter(prefix="/orders", tags=["Orders"])
+router = APIRouter(prefix="/orders", tags=["Orders"], route_class=ProfilingRoute)
 
 @router.post("/checkout", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 def checkout(
@@ -18,8 +25,10 @@ def checkout(
     """Convert cart to order, apply coupon, calculate totals, and clear cart"""
     user = get_current_user_from_header(authorization, db)
     
-    # Get user's cart items
-    cart_items = db.query(CartItem).filter(CartItem.user_id == user.id).all()
+    # Get user's cart items with the prices they are ordered at
+    cart_items = db.query(CartItem.product_id, CartItem.quantity, Product.price).join(
+        Product, CartItem.product_id == Product.id
+    ).filter(CartItem.user_id == user.id).all()
     
     if not cart_items:
         raise HTTPException(
@@ -27,48 +36,46 @@ def checkout(
             detail="Cart is empty"
         )
     
-    # Calculate subtotal
-    subtotal = sum(item.product.price * item.quantity for item in cart_items)
+    # Subtotal and weight in one aggregate query, in this transaction
+    totals = db.execute(cart_totals_statement(user.id)).one()
+    subtotal = totals.subtotal
     
     # Apply coupon if provided
     discount_amount = 0.0
+    coupon = None
     if order_data.coupon_code:
-        coupon = db.query(Coupon).filter(
-            (Coupon.code == order_data.coupon_code) & (Coupon.is_active == True)
-        ).first()
+        coupon = lookup_coupon(db, order_data.coupon_code)
         
-        if not coupon:
+        if not coupon or not coupon.is_active:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid or inactive coupon"
             )
         
-        # Check if coupon is expired
-        from datetime import datetime
-        if coupon.expiry_date and coupon.expiry_date < datetime.utcnow():
+        # Expiry and max uses, checked against the cached snapshot
+        problem = coupon_problem(coupon)
+        if problem:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Coupon has expired"
+                detail=problem
             )
         
-        # Check max uses
-        if coupon.max_uses and coupon.current_uses >= coupon.max_uses:
+        # Calculate discount
+        discount_amount = calculate_discount(coupon, subtotal)
+        
+        # Increment coupon usage; the database has the final say on max uses
+        if not redeem_coupon(db, coupon):
+            db.rollback()
+            invalidate_coupon(coupon.code)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Coupon usage limit reached"
             )
-        
-        # Calculate discount
-        if coupon.discount_percentage:
-            discount_amount = subtotal * (coupon.discount_percentage / 100)
-        elif coupon.discount_amount:
-            discount_amount = coupon.discount_amount
-        
-        # Increment coupon usage
-        coupon.current_uses += 1
     
-    # For now, shipping_cost is calculated as 0 (can be integrated with shipping router)
-    shipping_cost = 0.0
+    # Shipping is quoted on the cart (before discounts), as shown by GET /cart/
+    postal_code = order_data.postal_code or postal_code_from_address(order_data.shipping_address)
+    shipping = cart_summary(totals, postal_code)
+    shipping_cost = shipping["shipping_cost"]
     
     # Calculate total
     total_amount = subtotal - discount_amount + shipping_cost
@@ -87,23 +94,26 @@ def checkout(
     db.add(db_order)
     db.flush()  # Flush to get the order ID
     
-    # Create order items from cart items
-    for cart_item in cart_items:
-        order_item = OrderItem(
-            order_id=db_order.id,
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity,
-            price=cart_item.product.price
-        )
-        db.add(order_item)
+    # Create order items from cart items in one executemany
+    db.execute(insert(OrderItem), [
+        {
+            "order_id": db_order.id,
+            "product_id": cart_item.product_id,
+            "quantity": cart_item.quantity,
+            "price": cart_item.price
+        }
+        for cart_item in cart_items
+    ])
     
     # Clear cart
-    for cart_item in cart_items:
-        db.delete(cart_item)
+    db.query(CartItem).filter(CartItem.user_id == user.id).delete(synchronize_session=False)
     
     db.commit()
     db.refresh(db_order)
     
+    if coupon:
+        invalidate_coupon(coupon.code)
+    
     return db_order
 
 @router.get("/", response_model=List[OrderResponse])
@@ -124,11 +134,20 @@ def get_user_orders(
             detail="Not authorized to view these orders"
         )
     
-    orders = db.query(Order).filter(
+    # Fast path: order read models plus one query for all their items, no ORM objects
+    orders = load_rows(OrderRow, db.query(*OrderRow.columns).filter(
         Order.user_id == user_id
-    ).offset(skip).limit(limit).all()
+    ).offset(skip).limit(limit))
+    
+    items_by_order = {order.id: order.items for order in orders}
+    if items_by_order:
+        items = db.query(OrderItem.order_id, *OrderItemRow.columns).filter(
+            OrderItem.order_id.in_(items_by_order)
+        ).order_by(OrderItem.id)
+        for order_id, *item in items:
+            items_by_order[order_id].append(OrderItemRow(*item))
     
-    return orders
+    return FastJSONResponse(orders)
 
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order(
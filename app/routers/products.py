@@ -1,12 +1,52 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.database import get_db
-from app.models import Product, Category, Review
-from app.schemas import ProductCreate, ProductResponse, ProductUpdate, ReviewResponse
+from app.database import get_db, get_read_db
+from app.models import Product, Category
+from app.schemas import ProductCreate, ProductResponse, ProductUpdate
+from app.profiling import ProfilingRoute
+from app.serialization import FastJSONResponse
+from app.read_models import ProductRow, load_rows
+from app.http_cache import set_cache_headers, purge, product_key, category_key, PRODUCTS_KEY
+from app.config import (
+    CACHE_POLICY_PRODUCT_LIST, CACHE_POLICY_PRODUCT, RECOMMENDATIONS_TOP_K,
+    PRODUCT_CACHE_TTL, PRODUCT_LIST_CACHE_TTL, PRODUCT_CACHE_ENTRIES
+)
+from app.recommendations import related_products
+from app.autocomplete import autocomplete_index
+from app.invalidation import invalidation_bus
+from app.singleflight import CachedLoader
 
-router = APIRouter(prefix="/products", tags=["Products"])
+router = APIRouter(prefix="/products", tags=["Products"], route_class=ProfilingRoute)
+
+# Concurrent requests for the same product or listing page share one query (also used by async_reads)
+product_loader = CachedLoader(PRODUCT_CACHE_ENTRIES, PRODUCT_CACHE_TTL)
+product_list_loader = CachedLoader(PRODUCT_CACHE_ENTRIES, PRODUCT_LIST_CACHE_TTL)
+
+def invalidate_products(product_ids=None):
+    """Drop cached products (all of them for None) and every cached listing page"""
+    if product_ids is None:
+        product_loader.invalidate()
+    else:
+        for product_id in product_ids:
+            product_loader.invalidate(product_id)
+    product_list_loader.invalidate()
+
+invalidation_bus.subscribe("product", invalidate_products)
+
+def filter_products(query, category_id, min_price, max_price, q):
+    """Apply the listing filters to a query() or select() over Product"""
+    conditions = []
+    if category_id:
+        conditions.append(Product.category_id == category_id)
+    if min_price is not None:
+        conditions.append(Product.price >= min_price)
+    if max_price is not None:
+        conditions.append(Product.price <= max_price)
+    if q:
+        conditions.append(Product.name.ilike(f"%{q}%"))
+    return query.filter(*conditions)
 
 @router.get("/", response_model=List[ProductResponse])
 def get_products(
@@ -16,25 +56,23 @@ def get_products(
     q: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get products with filtering and pagination"""
-    query = db.query(Product)
+    def load():
+        # Fast path: only the response columns as read models, serialized without re-validation
+        query = filter_products(db.query(*ProductRow.columns), category_id, min_price, max_price, q)
+        return load_rows(ProductRow, query.offset(skip).limit(limit))
     
-    if category_id:
-        query = query.filter(Product.category_id == category_id)
-    
-    if min_price is not None:
-        query = query.filter(Product.price >= min_price)
-    
-    if max_price is not None:
-        query = query.filter(Product.price <= max_price)
-    
-    if q:
-        query = query.filter(Product.name.ilike(f"%{q}%"))
+    products = product_list_loader.get((category_id, min_price, max_price, q, skip, limit), load)
+    response = FastJSONResponse(products)
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    # Tag the page with every product on it so an update to any of them purges it
+    keys = [PRODUCTS_KEY] + [product_key(product.id) for product in products]
+    if category_id:
+        keys.append(category_key(category_id))
+    set_cache_headers(response, CACHE_POLICY_PRODUCT_LIST, keys)
+    return response
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
@@ -60,12 +98,22 @@ def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(db_product)
     
+    # New product appears on listing pages
+    purge(PRODUCTS_KEY, category_key(db_product.category_id))
+    autocomplete_index.upsert_product(db_product.id, db_product.name)
+    invalidate_products([db_product.id])
+    invalidation_bus.publish("product", db_product.id)
+    
     return db_product
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(product_id: int, response: Response, db: Session = Depends(get_read_db)):
     """Get product details by ID"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    def load():
+        row = db.query(*ProductRow.columns).filter(Product.id == product_id).first()
+        return ProductRow(*row) if row else None
+    
+    product = product_loader.get(product_id, load)
     
     if not product:
         raise HTTPException(
@@ -73,21 +121,29 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
             detail="Product not found"
         )
     
+    set_cache_headers(response, CACHE_POLICY_PRODUCT, [product_key(product.id), category_key(product.category_id)])
     return product
 
-@router.get("/{product_id}/reviews", response_model=List[ReviewResponse])
-def get_product_reviews(product_id: int, db: Session = Depends(get_db)):
-    """Get all reviews for a product"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
-    
-    reviews = db.query(Review).filter(Review.product_id == product_id).all()
-    return reviews
+def product_rows_in_order(db: Session, product_ids: list) -> list:
+    """Read models for product ids, in the given order (ids of deleted products are skipped)"""
+    if not product_ids:
+        return []
+    rows = load_rows(ProductRow, db.query(*ProductRow.columns).filter(Product.id.in_(product_ids)))
+    by_id = {row.id: row for row in rows}
+    return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+@router.get("/{product_id}/related", response_model=List[ProductResponse])
+def get_related_products(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=RECOMMENDATIONS_TOP_K),
+    db: Session = Depends(get_read_db)
+):
+    """Products frequently bought together with this one (see app.recommendations)"""
+    # The neighbours are one row of a memory-mapped matrix; only their details hit the database
+    products = product_rows_in_order(db, related_products.related(product_id, limit))
+    response = FastJSONResponse(products)
+    set_cache_headers(response, CACHE_POLICY_PRODUCT_LIST, [product_key(product_id)] + [product_key(p.id) for p in products])
+    return response
 
 @router.put("/{product_id}", response_model=ProductResponse)
 def update_product(
@@ -104,6 +160,8 @@ def update_product(
             detail="Product not found"
         )
     
+    previous_category_id = product.category_id
+    
     # Update only provided fields
     update_data = product_data.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -112,4 +170,11 @@ def update_product(
     db.commit()
     db.refresh(product)
     
+    # Product pages and every listing that shows it (old and new category)
+    purge(product_key(product.id), PRODUCTS_KEY, category_key(previous_category_id), category_key(product.category_id))
+    if "name" in update_data:
+        autocomplete_index.upsert_product(product.id, product.name)
+    invalidate_products([product.id])
+    invalidation_bus.publish("product", product.id)
+    
     return product
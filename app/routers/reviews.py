@@ -1,13 +1,23 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+import base64
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Dict, List, Optional
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Review, Product, User
 from app.schemas import ReviewCreate, ReviewResponse
 from app.routers.auth import get_current_user_from_header
+from app.profiling import ProfilingRoute
+from app.serialization import FastJSONResponse
+from app.read_models import ReviewRow, load_rows
+from app.http_cache import set_cache_headers, purge, reviews_key
+from app.config import CACHE_POLICY_REVIEWS
 
-router = APIRouter(prefix="/products", tags=["Reviews"])
+router = APIRouter(prefix="/products", tags=["Reviews"], route_class=ProfilingRoute)
 
 @router.post("/{product_id}/reviews", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 def create_review(
@@ -50,12 +60,81 @@ def create_review(
     db.commit()
     db.refresh(db_review)
     
+    purge(reviews_key(product_id))
+    
     return db_review
 
-@router.get("/{product_id}/reviews")
-def get_product_reviews(product_id: int, db: Session = Depends(get_db)):
-    """Get all reviews for a product"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+# Keyset orderings: the trailing columns make every position unique
+REVIEW_SORTS = {
+    "newest": (Review.created_at, Review.id),
+    "rating": (Review.rating, Review.created_at, Review.id),
+}
+
+def _encode_cursor(sort: str, row) -> str:
+    values = [getattr(row, column.key) for column in REVIEW_SORTS[sort]]
+    payload = json.dumps([sort] + [v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_cursor(sort: str, cursor: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_sort, *values = payload
+        if cursor_sort != sort or len(values) != len(REVIEW_SORTS[sort]):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(value) if column.key == "created_at" else int(value)
+            for column, value in zip(REVIEW_SORTS[sort], values)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+@router.get("/reviews/top", response_model=Dict[int, List[ReviewResponse]])
+def get_top_reviews(
+    product_ids: List[int] = Query(..., max_length=100),
+    sort: str = Query("rating", pattern="^(newest|rating)$"),
+    limit: int = Query(3, ge=1, le=20),
+    db: Session = Depends(get_read_db)
+):
+    """Get the top reviews for several products in one query"""
+    product_ids = list(dict.fromkeys(product_ids))
+    order = [column.desc() for column in REVIEW_SORTS[sort]]
+    ranked = (
+        select(
+            *ReviewRow.columns,
+            func.row_number().over(partition_by=Review.product_id, order_by=order).label("position")
+        )
+        .where(Review.product_id.in_(product_ids))
+        .subquery()
+    )
+    rows = db.execute(
+        select(*[ranked.c[column.key] for column in ReviewRow.columns])
+        .where(ranked.c.position <= limit)
+        .order_by(ranked.c.product_id, ranked.c.position)
+    ).all()
+    
+    # orjson only serializes string keys
+    grouped = {str(product_id): [] for product_id in product_ids}
+    for review in load_rows(ReviewRow, rows):
+        grouped[str(review.product_id)].append(review)
+    
+    response = FastJSONResponse(grouped)
+    set_cache_headers(response, CACHE_POLICY_REVIEWS, [reviews_key(product_id) for product_id in product_ids])
+    return response
+
+@router.get("/{product_id}/reviews", response_model=List[ReviewResponse])
+def get_product_reviews(
+    product_id: int,
+    sort: str = Query("newest", pattern="^(newest|rating)$"),
+    min_rating: Optional[int] = Query(None, ge=1, le=5),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Get a page of reviews for a product; the next page's cursor is in X-Next-Cursor"""
+    product = db.query(Product.id).filter(Product.id == product_id).first()
     
     if not product:
         raise HTTPException(
@@ -63,8 +142,23 @@ def get_product_reviews(product_id: int, db: Session = Depends(get_db)):
             detail="Product not found"
         )
     
-    reviews = db.query(Review).filter(Review.product_id == product_id).all()
-    return reviews
+    sort_columns = REVIEW_SORTS[sort]
+    query = db.query(*ReviewRow.columns).filter(Review.product_id == product_id)
+    
+    if min_rating is not None:
+        query = query.filter(Review.rating >= min_rating)
+    
+    if cursor:
+        query = query.filter(tuple_(*sort_columns) < tuple_(*_decode_cursor(sort, cursor)))
+    
+    # One extra row tells whether another page follows
+    reviews = load_rows(ReviewRow, query.order_by(*[column.desc() for column in sort_columns]).limit(limit + 1))
+    
+    response = FastJSONResponse(reviews[:limit])
+    if len(reviews) > limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(sort, reviews[limit - 1])
+    set_cache_headers(response, CACHE_POLICY_REVIEWS, [reviews_key(product_id)])
+    return response
 
 @router.put("/{product_id}/reviews/{review_id}", response_model=ReviewResponse)
 def update_review(
@@ -98,6 +192,8 @@ def update_review(
     db.commit()
     db.refresh(review)
     
+    purge(reviews_key(review.product_id))
+    
     return review
 
 @router.delete("/{product_id}/reviews/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -127,3 +223,5 @@ def delete_review(
     
     db.delete(review)
     db.commit()
+    
+    purge(reviews_key(review.product_id))
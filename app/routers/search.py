@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.schemas import AutocompleteResponse
+from app.profiling import ProfilingRoute
+from app.serialization import FastJSONResponse
+from app.autocomplete import autocomplete_index
+from app.http_cache import set_cache_headers, PRODUCTS_KEY, CATEGORIES_KEY
+from app.config import CACHE_POLICY_AUTOCOMPLETE
+
+router = APIRouter(prefix="/search", tags=["Search"], route_class=ProfilingRoute)
+
+@router.get("/autocomplete", response_model=AutocompleteResponse)
+def autocomplete(
+    q: str = Query(..., max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(get_read_db)
+):
+    """Categories and products whose name has a word starting with q, most popular first"""
+    # Served from the in-memory prefix index; the database is only read to build it
+    autocomplete_index.ensure_built(db)
+    response = FastJSONResponse({"query": q, "suggestions": autocomplete_index.suggest(q, limit)})
+    set_cache_headers(response, CACHE_POLICY_AUTOCOMPLETE, [PRODUCTS_KEY, CATEGORIES_KEY])
+    return response
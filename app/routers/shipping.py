@@ -1,33 +1,53 @@
+import numpy as np
 from fastapi import APIRouter, HTTPException, status
-from app.schemas import ShippingCalculateRequest, ShippingCalculateResponse
+from app.schemas import (
+    ShippingCalculateRequest, ShippingCalculateResponse, ShippingQuoteBatchRequest, ShippingQuoteBatchResponse
+)
+from app.profiling import ProfilingRoute
+from app.serialization import FastJSONResponse
+from app.shipping_rates import DEFAULT_ZONE, rate_tables, postal_code_from_address, calculate_shipping_cost
 
-router = APIRouter(prefix="/shipping", tags=["Shipping"])
+router = APIRouter(prefix="/shipping", tags=["Shipping"], route_class=ProfilingRoute)
 
-def calculate_shipping_cost(weight: float, total_amount: float) -> tuple[float, int]:
+# Quotes per batch request
+MAX_BATCH_QUOTES = 100_000
+
+def calculate_shipping_costs(weights, total_amounts, zones=None) -> tuple[np.ndarray, np.ndarray]:
     """
-    Calculate shipping cost and estimated delivery days based on weight and total amount
+    Vectorized calculate_shipping_cost over arrays of weights and total amounts
     
-    Rules:
-    - Base cost: $5.00
-    - Per kg: $2.00
-    - Free shipping for orders over $100
-    - Estimated delivery: 3-5 days standard
+    `zones` gives each quote's Zone (all default zone if omitted). Applies the
+    same float64 operations in the same order, so every element equals the
+    scalar result exactly.
     """
-    base_cost = 5.0
-    cost_per_kg = 2.0
+    weights = np.asarray(weights, dtype=np.float64)
+    total_amounts = np.asarray(total_amounts, dtype=np.float64)
     
-    # Calculate weight-based cost
-    weight_cost = weight * cost_per_kg
-    shipping_cost = base_cost + weight_cost
+    if zones is None:
+        zones = [DEFAULT_ZONE]
+        zone_index = np.zeros(len(weights), dtype=np.intp)
+    else:
+        # Gather per-quote rates from the handful of distinct zones
+        unique_zones = {}
+        zone_index = np.fromiter(
+            (unique_zones.setdefault(zone, len(unique_zones)) for zone in zones),
+            dtype=np.intp, count=len(weights)
+        )
+        zones = list(unique_zones)
     
-    # Free shipping for orders over $100
-    if total_amount >= 100:
-        shipping_cost = 0.0
+    base_costs = np.array([zone.base_cost for zone in zones], dtype=np.float64)[zone_index]
+    costs_per_kg = np.array([zone.cost_per_kg for zone in zones], dtype=np.float64)[zone_index]
+    thresholds = np.array([
+        np.inf if zone.free_shipping_threshold is None else zone.free_shipping_threshold for zone in zones
+    ], dtype=np.float64)[zone_index]
+    free_days = np.array([zone.free_shipping_days for zone in zones])[zone_index]
+    standard_days = np.array([zone.standard_days for zone in zones])[zone_index]
     
-    # Estimate delivery days
-    estimated_days = 3 if shipping_cost == 0 else 5
+    shipping_costs = base_costs + weights * costs_per_kg
+    shipping_costs[total_amounts >= thresholds] = 0.0
+    estimated_days = np.where(shipping_costs == 0, free_days, standard_days)
     
-    return shipping_cost, estimated_days
+    return shipping_costs, estimated_days
 
 @router.post("/calculate", response_model=ShippingCalculateResponse)
 def calculate_shipping(request: ShippingCalculateRequest):
@@ -38,13 +58,54 @@ def calculate_shipping(request: ShippingCalculateRequest):
             detail="Weight cannot be negative"
         )
     
+    zone = rate_tables.lookup(request.postal_code or postal_code_from_address(request.address))
     shipping_cost, estimated_days = calculate_shipping_cost(
         request.total_weight,
-        request.total_amount
+        request.total_amount,
+        zone
     )
     
     return {
         "shipping_cost": shipping_cost,
         "estimated_days": estimated_days,
-        "method": "Standard Shipping"
+        "method": "Standard Shipping",
+        "zone": zone.name
     }
+
+@router.post("/quotes", response_model=ShippingQuoteBatchResponse)
+def calculate_shipping_batch(request: ShippingQuoteBatchRequest):
+    """Calculate shipping for many (weight, total amount) pairs at once"""
+    if len(request.weights) != len(request.total_amounts) or (
+        request.postal_codes is not None and len(request.postal_codes) != len(request.weights)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="weights, total_amounts and postal_codes must have the same length"
+        )
+    
+    if len(request.weights) > MAX_BATCH_QUOTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_QUOTES} quotes per request"
+        )
+    
+    weights = np.asarray(request.weights, dtype=np.float64)
+    if (weights < 0).any():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Weight cannot be negative"
+        )
+    
+    zones = None
+    if request.postal_codes is not None:
+        table = rate_tables.current()
+        zones = [table.lookup(postal_code) for postal_code in request.postal_codes]
+    
+    shipping_costs, estimated_days = calculate_shipping_costs(weights, request.total_amounts, zones)
+    
+    return FastJSONResponse({
+        "shipping_costs": shipping_costs.tolist(),
+        "estimated_days": estimated_days.tolist(),
+        "zones": [zone.name for zone in zones] if zones is not None else [DEFAULT_ZONE.name] * len(weights),
+        "method": "Standard Shipping"
+    })
@@ -92,6 +92,10 @@ class CartItemResponse(BaseModel):
 class CartResponse(BaseModel):
     items: List[CartItemResponse]
     total: float
+    total_weight: float
+    shipping_cost: float
+    estimated_days: int
+    shipping_zone: str
 
 class CartCouponRequest(BaseModel):
     user_id: int
@@ -138,6 +142,7 @@ class OrderStatusEnum(str, PyEnum):
 
 class OrderCreate(BaseModel):
     shipping_address: str
+    postal_code: Optional[str] = None  # Taken from the end of the address if omitted
     coupon_code: Optional[str] = None
 
 class OrderResponse(BaseModel):
@@ -174,9 +179,18 @@ class CouponResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BulkCouponCreate(BaseModel):
+    count: int = Field(..., ge=1, le=5_000_000)
+    template: str = Field("########", max_length=50)
+    discount_percentage: Optional[float] = Field(None, ge=0, le=100)
+    discount_amount: Optional[float] = Field(None, ge=0)
+    max_uses: Optional[int] = 1
+    expiry_date: Optional[datetime] = None
+
 # Shipping Schemas
 class ShippingCalculateRequest(BaseModel):
     address: str
+    postal_code: Optional[str] = None  # Taken from the end of the address if omitted
     total_weight: float
     total_amount: float
 
@@ -184,3 +198,31 @@ class ShippingCalculateResponse(BaseModel):
     shipping_cost: float
     estimated_days: int
     method: str
+    zone: str
+
+class ShippingQuoteBatchRequest(BaseModel):
+    weights: List[float]
+    total_amounts: List[float]
+    postal_codes: Optional[List[str]] = None
+
+class ShippingQuoteBatchResponse(BaseModel):
+    shipping_costs: List[float]
+    estimated_days: List[int]
+    zones: List[str]
+    method: str
+
+# Search Schemas
+class AutocompleteSuggestion(BaseModel):
+    type: str  # "category" or "product"
+    id: int
+    name: str
+
+class AutocompleteResponse(BaseModel):
+    query: str
+    suggestions: List[AutocompleteSuggestion]
+
+# Admin Schemas
+class ProfileInfo(BaseModel):
+    name: str
+    size_bytes: int
+    created_at: datetime
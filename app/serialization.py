@@ -0,0 +1,52 @@
+"""
+Fast response path for large, read-only list endpoints.
+
+Instead of ORM objects -> Pydantic validation -> jsonable_encoder -> json,
+routes that opt in select just the response columns and return the rows as
+read models (app/read_models.py) or plain dicts through FastJSONResponse,
+serialized by orjson. The data comes
+straight from our own database, so it is not re-validated; the columns are
+derived from the response schema so the JSON shape matches response_model.
+"""
+
+import json
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime
+from enum import Enum
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(value):
+    """Fallback encoder matching orjson's output for the types our rows contain"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if is_dataclass(value):
+        return {field.name: getattr(value, field.name) for field in fields(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (stdlib json if orjson is unavailable)"""
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def schema_columns(model, schema, exclude=()) -> list:
+    """Model columns for every field of a response schema, in schema order"""
+    return [getattr(model, name) for name in schema.model_fields if name not in exclude]
+
+
+def rows_as_dicts(rows) -> list:
+    """Column rows (from a column query or select()) as dicts keyed by column name"""
+    return [row._asdict() for row in rows]
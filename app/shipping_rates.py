@@ -0,0 +1,245 @@
+"""
+Destination-based shipping rates.
+
+Zones are loaded from a CSV rate table (SHIPPING_RATES_FILE), one row per
+postal-code range:
+
+    postal_from,postal_to,zone,base_cost,cost_per_kg,free_shipping_threshold,free_shipping_days,standard_days
+    10000,14999,northeast,4.5,1.5,75,2,4
+
+Postal codes are normalized (upper case, no spaces or dashes) and ranges are
+compared as strings, so both ends of a range should have the same format.
+An empty free_shipping_threshold means the zone never ships for free.
+
+The ranges are kept as sorted arrays and looked up with bisect. Codes that
+match no range, and every lookup when no file is configured, fall back to
+DEFAULT_ZONE, the original flat rate. The table is rebuilt off to the side
+when the file changes and swapped in with a single assignment, so requests
+never wait for a reload and never see a half-built table.
+"""
+
+import csv
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from app.config import (
+    SHIPPING_RATES_FILE, SHIPPING_RATES_CHECK_INTERVAL, SHIPPING_WEIGHT_STEP, SHIPPING_QUOTE_CACHE_SIZE
+)
+from app.invalidation import invalidation_bus
+from app.logger import logger
+
+
+@dataclass(frozen=True)
+class Zone:
+    name: str
+    base_cost: float
+    cost_per_kg: float
+    free_shipping_threshold: Optional[float]
+    free_shipping_days: int
+    standard_days: int
+
+
+# The flat rate: $5 + $2/kg, free from $100, 3 days free / 5 days standard
+DEFAULT_ZONE = Zone("default", 5.0, 2.0, 100, 3, 5)
+
+_NOT_POSTAL = re.compile(r"[\s-]")
+# Trailing 4-6 digit group of an address, e.g. "..., Springfield, IL 62704"
+_ADDRESS_POSTAL_CODE = re.compile(r"(\d{4,6})(?:-\d{4})?\s*$")
+
+
+def normalize_postal_code(postal_code: str) -> str:
+    return _NOT_POSTAL.sub("", postal_code).upper()
+
+
+def postal_code_from_address(address: str) -> Optional[str]:
+    """Postal code at the end of a free-form address, if there is one"""
+    match = _ADDRESS_POSTAL_CODE.search(address)
+    return match.group(1) if match else None
+
+
+def calculate_shipping_cost(weight: float, total_amount: float, zone: Zone = DEFAULT_ZONE) -> tuple:
+    """
+    Calculate shipping cost and estimated delivery days based on weight and total amount
+
+    Rules (default zone; other zones come from the rate table):
+    - Base cost: $5.00
+    - Per kg: $2.00
+    - Free shipping for orders over $100
+    - Estimated delivery: 3-5 days standard
+    """
+    # Calculate weight-based cost
+    weight_cost = weight * zone.cost_per_kg
+    shipping_cost = zone.base_cost + weight_cost
+
+    # Free shipping for orders over the zone's threshold
+    if zone.free_shipping_threshold is not None and total_amount >= zone.free_shipping_threshold:
+        shipping_cost = 0.0
+
+    # Estimate delivery days
+    estimated_days = zone.free_shipping_days if shipping_cost == 0 else zone.standard_days
+
+    return shipping_cost, estimated_days
+
+
+def billable_weight_bucket(weight: float) -> int:
+    """Weight rounded up to whole SHIPPING_WEIGHT_STEP units"""
+    # round() first so 2.3 / 0.1 == 22.999999999999996 does not become 23
+    return max(0, math.ceil(round(weight / SHIPPING_WEIGHT_STEP, 6)))
+
+
+@lru_cache(maxsize=SHIPPING_QUOTE_CACHE_SIZE)
+def _bucket_quote(weight_bucket: int, free_shipping: bool, zone: Zone) -> tuple:
+    # Only whether the threshold is reached matters, so any amount in the tier gives the same quote
+    total_amount = zone.free_shipping_threshold if free_shipping else 0.0
+    return calculate_shipping_cost(round(weight_bucket * SHIPPING_WEIGHT_STEP, 6), total_amount, zone)
+
+
+def quote_shipping(weight: float, total_amount: float, zone: Zone = DEFAULT_ZONE) -> tuple:
+    """
+    (shipping cost, estimated days) for an order, billed on weight rounded up
+    to SHIPPING_WEIGHT_STEP; memoized per (weight bucket, free-shipping tier, zone)
+    """
+    free_shipping = zone.free_shipping_threshold is not None and total_amount >= zone.free_shipping_threshold
+    return _bucket_quote(billable_weight_bucket(weight), free_shipping, zone)
+
+
+class RateTable:
+    """Non-overlapping postal-code ranges mapped to zones"""
+
+    def __init__(self, ranges: list, default: Zone = DEFAULT_ZONE):
+        ranges = sorted(ranges, key=lambda entry: entry[0])
+        for (_, previous_end, _), (start, end, _) in zip(ranges, ranges[1:]):
+            if start <= previous_end:
+                raise ValueError(f"Postal code range starting at {start} overlaps the previous range")
+        for start, end, _ in ranges:
+            if end < start:
+                raise ValueError(f"Postal code range {start}-{end} ends before it starts")
+
+        self.default = default
+        self.starts = [start for start, _, _ in ranges]
+        self.ends = [end for _, end, _ in ranges]
+        self.zones = [zone for _, _, zone in ranges]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup(self, postal_code: Optional[str]) -> Zone:
+        """Zone for a postal code (the default zone if it is missing or unknown)"""
+        if not postal_code:
+            return self.default
+        code = normalize_postal_code(postal_code)
+        i = bisect_right(self.starts, code) - 1
+        if i >= 0 and code <= self.ends[i]:
+            return self.zones[i]
+        return self.default
+
+
+def load_rate_table(path: str) -> RateTable:
+    """Parse a rate table CSV; rows naming the same zone must use the same rates"""
+    zones = {}
+    ranges = []
+    with open(path, newline="") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                threshold = row["free_shipping_threshold"].strip()
+                zone = Zone(
+                    name=row["zone"].strip(),
+                    base_cost=float(row["base_cost"]),
+                    cost_per_kg=float(row["cost_per_kg"]),
+                    free_shipping_threshold=float(threshold) if threshold else None,
+                    free_shipping_days=int(row["free_shipping_days"]),
+                    standard_days=int(row["standard_days"]),
+                )
+                start = normalize_postal_code(row["postal_from"])
+                end = normalize_postal_code(row["postal_to"])
+            except (KeyError, ValueError, AttributeError) as e:
+                raise ValueError(f"{path}:{line}: invalid rate row ({e})")
+
+            # One shared Zone object per zone keeps tens of thousands of ranges small
+            existing = zones.setdefault(zone.name, zone)
+            if existing != zone:
+                raise ValueError(f"{path}:{line}: zone {zone.name} has conflicting rates")
+            ranges.append((start, end, existing))
+
+    return RateTable(ranges)
+
+
+class RateTableManager:
+    """Holds the current rate table and reloads it in the background when the file changes"""
+
+    def __init__(self, path: Optional[str] = SHIPPING_RATES_FILE, check_interval: float = SHIPPING_RATES_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.table = RateTable([])
+        self.loaded_mtime = None
+        self.loaded_at = None
+        self._next_check = 0.0
+        self._reloading = threading.Lock()
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self) -> RateTable:
+        """Load the file now; on error the current table stays in place and the error is raised"""
+        with self._reloading:
+            mtime = self._mtime()
+            table = load_rate_table(self.path)
+            self.table = table
+            self.loaded_mtime = mtime
+            self.loaded_at = time.time()
+        logger.info(f"Loaded {len(table)} shipping rate ranges from {self.path}")
+        return table
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        except (OSError, ValueError) as e:
+            logger.error(f"Shipping rate table reload failed, keeping the previous table: {e}")
+
+    def current(self) -> RateTable:
+        """The rate table to quote with; starts a background reload if the file changed"""
+        if self.path:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval
+                mtime = self._mtime()
+                if mtime is not None and mtime != self.loaded_mtime and not self._reloading.locked():
+                    if self.loaded_mtime is None:
+                        # First load: nothing to fall back on yet, so load inline
+                        self._reload_in_background()
+                    else:
+                        threading.Thread(target=self._reload_in_background, name="shipping-rates", daemon=True).start()
+        return self.table
+
+    def lookup(self, postal_code: Optional[str]) -> Zone:
+        return self.current().lookup(postal_code)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "ranges": len(self.table),
+            "zones": len(set(self.table.zones)),
+            "loaded_at": self.loaded_at,
+        }
+
+
+rate_tables = RateTableManager()
+
+
+def _reload_when_published(_):
+    """Another worker reloaded through the admin API"""
+    if rate_tables.path:
+        rate_tables._reload_in_background()
+
+
+invalidation_bus.subscribe("shipping_rates", _reload_when_published)
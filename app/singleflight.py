@@ -0,0 +1,174 @@
+"""
+Request coalescing (single-flight) for hot reads.
+
+When a popular key is not cached, every concurrent request for it would run
+the same query. SingleFlight.do(key, load) runs load() once: callers that
+arrive while it is in flight wait for it and share its result (or exception).
+AsyncSingleFlight does the same for coroutines, per event loop.
+
+CachedLoader puts a TTLCache in front of both. With a TTL of 0 nothing is
+cached and only concurrent loads are shared. With a TTL, entries can be
+refreshed early with probability rising towards expiry (XFetch: refresh when
+now - delta * beta * ln(random()) >= expiry, delta being how long the load
+took), so one request reloads a hot key shortly before it expires instead of
+all of them at once after. A beta of 0 disables early refresh.
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+import weakref
+from typing import Awaitable, Callable
+
+from app.cache import MISSING, TTLCache
+from app.config import CACHE_EARLY_REFRESH_BETA
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Shares one in-flight load per key between threads"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.shared = 0
+
+    def do(self, key, load: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.loads += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = load()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """Shares one in-flight load per key between coroutines on the same event loop"""
+
+    def __init__(self):
+        self._calls = weakref.WeakKeyDictionary()
+        self.loads = 0
+        self.shared = 0
+
+    async def do(self, key, load: Callable[[], Awaitable]):
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        task = calls.get(key)
+        if task is None:
+            task = calls[key] = asyncio.ensure_future(load())
+            task.add_done_callback(lambda _: calls.pop(key, None))
+            self.loads += 1
+        else:
+            self.shared += 1
+        # A cancelled caller must not cancel the load the others are waiting for
+        return await asyncio.shield(task)
+
+
+class CachedLoader:
+    """TTL cache with single-flight loads and optional early refresh"""
+
+    def __init__(self, max_entries: int, ttl: float, beta: float = CACHE_EARLY_REFRESH_BETA,
+                 clock=time.monotonic, random=random.random):
+        self.cache = TTLCache(max_entries, ttl, clock) if ttl > 0 else None
+        self.beta = beta
+        self.flight = SingleFlight()
+        self.async_flight = AsyncSingleFlight()
+        self.early_refreshes = 0
+        self._clock = clock
+        self._random = random
+        # Bumped by invalidate(); a load that started before it does not store its result
+        self._generation = 0
+
+    def _cached(self, key):
+        if self.cache is None:
+            return MISSING
+        entry = self.cache.get(key)
+        if entry is MISSING:
+            return MISSING
+        value, delta, expires_at = entry
+        # 1 - random() is in (0, 1], so the log is defined
+        if self.beta > 0 and self._clock() - delta * self.beta * math.log(1.0 - self._random()) >= expires_at:
+            # This caller reloads; everyone else keeps getting the cached value meanwhile
+            self.early_refreshes += 1
+            return MISSING
+        return value
+
+    def _store(self, key, value, started: float, generation: int):
+        if self.cache is not None and generation == self._generation:
+            now = self._clock()
+            self.cache.set(key, (value, now - started, now + self.cache.ttl))
+
+    def get(self, key, load: Callable):
+        """Cached value for key, or the result of load() shared with concurrent callers"""
+        value = self._cached(key)
+        if value is not MISSING:
+            return value
+
+        def load_and_store():
+            started, generation = self._clock(), self._generation
+            value = load()
+            self._store(key, value, started, generation)
+            return value
+
+        return self.flight.do(key, load_and_store)
+
+    async def get_async(self, key, load: Callable[[], Awaitable]):
+        """get() for async handlers; load is a coroutine function"""
+        value = self._cached(key)
+        if value is not MISSING:
+            return value
+
+        async def load_and_store():
+            started, generation = self._clock(), self._generation
+            value = await load()
+            self._store(key, value, started, generation)
+            return value
+
+        return await self.async_flight.do(key, load_and_store)
+
+    def invalidate(self, key=MISSING):
+        """Drop one key, or everything when no key is given"""
+        self._generation += 1
+        if self.cache is None:
+            return
+        if key is MISSING:
+            self.cache.clear()
+        else:
+            self.cache.delete(key)
+
+    def stats(self) -> dict:
+        return {
+            **(self.cache.stats() if self.cache is not None else {"entries": 0}),
+            "loads": self.flight.loads + self.async_flight.loads,
+            "shared": self.flight.shared + self.async_flight.shared,
+            "early_refreshes": self.early_refreshes,
+        }
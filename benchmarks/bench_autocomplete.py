@@ -0,0 +1,76 @@
+"""
+Benchmark: autocomplete lookups over a large synthetic catalog.
+
+Builds the prefix index in memory from --products generated names (no
+database) with Zipf-distributed popularity. Reports build time, index size,
+and lookup latency for prefixes of 1-8 characters taken from real names: once
+for the first lookup of each prefix and once when every prefix has been seen.
+
+    python benchmarks/bench_autocomplete.py [--products 1000000] [--lookups 20000]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from app.autocomplete import AutocompleteIndex, _Segment, _State, normalize
+
+ADJECTIVES = ["wireless", "portable", "classic", "smart", "organic", "vintage", "compact", "deluxe", "ultra", "eco",
+              "premium", "mini", "heavy duty", "waterproof", "ergonomic", "digital", "handmade", "travel", "pro", "kids"]
+NOUNS = ["headphones", "speaker", "backpack", "lamp", "kettle", "notebook", "sneakers", "watch", "blender", "jacket",
+         "camera", "charger", "mug", "desk", "chair", "tent", "bottle", "keyboard", "mouse", "pillow", "blanket",
+         "scarf", "drone", "router", "monitor", "tripod", "candle", "wallet", "sunglasses", "helmet"]
+
+
+def catalog(count: int, rng: random.Random):
+    for product_id in range(1, count + 1):
+        name = f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {rng.choice(['X', 'S', 'Max', 'Lite', ''])}{rng.randint(1, 9999)}"
+        yield product_id, name.strip(), float(int(rng.paretovariate(1.2)))
+
+
+def measure(index: AutocompleteIndex, prefixes: list) -> list:
+    latencies = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.suggest(prefix, 10)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return sorted(latencies)
+
+
+def report(name: str, latencies: list):
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<24}{statistics.median(latencies):>10.4f}{p99:>10.4f}{latencies[-1]:>10.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    index = AutocompleteIndex()
+    index._state = _State(_Segment(catalog(args.products, rng)))
+    stats = index.stats()
+    print(f"Built index of {stats['products']} products ({stats['keys']} keys) in {time.perf_counter() - started:.1f}s, "
+          f"{stats['memory_bytes'] / 2 ** 20:.0f} MiB")
+
+    names = [normalize(name) for _, name, _ in catalog(5000, random.Random(1))]
+    prefixes = []
+    for _ in range(args.lookups):
+        words = rng.choice(names).split(" ")
+        text = " ".join(words[rng.randrange(len(words)):])
+        prefixes.append(text[:rng.randint(1, 8)])
+
+    print(f"\n{'lookups (ms)':<24}{'p50':>10}{'p99':>10}{'max':>10}")
+    report("first time per prefix", measure(index, prefixes))
+    report("all prefixes seen", measure(index, prefixes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: CPU cost vs bytes saved for response compression.
+
+Builds representative JSON bodies (product pages and an order history page)
+and reports, for each codec/level, the compressed size, the ratio and the
+time to compress one body. The last rows show the cost of a cache hit in
+CompressedBodyCache, which only hashes the body.
+
+    python benchmarks/bench_compression.py
+"""
+
+import gzip
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, '.')
+
+from app.compression import CompressedBodyCache, brotli
+from app.serialization import FastJSONResponse
+
+
+def product_page(items: int) -> bytes:
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    return FastJSONResponse([
+        {
+            "id": i, "name": f"Wireless Headphones Model {i}",
+            "description": "High-quality wireless headphones with active noise cancellation and 30h battery",
+            "price": round(19.99 + i * 1.37, 2), "stock": i % 50, "weight": 0.25, "category_id": i % 12,
+            "created_at": (now - timedelta(days=i)).isoformat(), "updated_at": now.isoformat(),
+        }
+        for i in range(items)
+    ]).body
+
+
+def order_page(orders: int) -> bytes:
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    return FastJSONResponse([
+        {
+            "id": i, "user_id": 7, "total_amount": 120.5 + i, "shipping_address": "221B Baker Street, London NW1 6XE",
+            "shipping_cost": 0.0, "discount_amount": 12.05, "coupon_code": "SAVE10", "status": "delivered",
+            "created_at": (now - timedelta(days=i)).isoformat(),
+            "items": [{"id": i * 10 + j, "product_id": 100 + j, "quantity": 1 + j % 3, "price": 9.99 + j} for j in range(4)],
+        }
+        for i in range(orders)
+    ]).body
+
+
+def main():
+    bodies = {
+        "products x10": product_page(10),
+        "products x100": product_page(100),
+        "orders x50": order_page(50),
+    }
+    codecs = [(f"gzip-{level}", lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0)) for level in (1, 6, 9)]
+    if brotli is not None:
+        codecs += [(f"br-{quality}", lambda body, quality=quality: brotli.compress(body, quality=quality)) for quality in (1, 4, 11)]
+
+    print(f"{'body':<15} {'codec':<8} {'bytes':>9} {'ratio':>7} {'us/body':>10} {'MB/s':>8}")
+    for name, body in bodies.items():
+        print(f"{name:<15} {'none':<8} {len(body):>9}")
+        for codec, func in codecs:
+            number = 50
+            seconds = min(timeit.repeat(lambda: func(body), number=number, repeat=3)) / number
+            compressed = func(body)
+            print(f"{'':<15} {codec:<8} {len(compressed):>9} {len(body) / len(compressed):>7.1f} "
+                  f"{seconds * 1e6:>10.1f} {len(body) / seconds / 1e6:>8.1f}")
+
+    cache = CompressedBodyCache()
+    body = bodies["products x100"]
+    cache.get_or_compress(body, "gzip")
+    seconds = min(timeit.repeat(lambda: cache.get_or_compress(body, "gzip"), number=1000, repeat=3)) / 1000
+    print(f"\ncache hit (products x100, hash only): {seconds * 1e6:.1f} us/body")
+
+
+if __name__ == "__main__":
+    main()
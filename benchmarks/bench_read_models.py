@@ -0,0 +1,165 @@
+"""
+Microbenchmark: ORM objects vs read models on list pages.
+
+For product, review and order pages (orders with their items) of each
+--pages size, compares:
+- orm:   ORM instances (selectinload for order items) -> Pydantic from_attributes
+         validation -> jsonable_encoder -> json (what a response_model route does)
+- dicts: column query -> row dicts -> orjson (the previous fast path)
+- read:  column query -> read models (app/read_models.py) -> orjson
+
+Reports pages per second end to end (query + serialization) and the memory
+held by one loaded page, session identity map included (tracemalloc), against
+an in-memory SQLite database.
+
+    python benchmarks/bench_read_models.py --pages 100 1000 --iterations 50
+"""
+
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, '.')
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Category, Order, OrderItem, Product, Review, User
+from app.read_models import OrderItemRow, OrderRow, ProductRow, ReviewRow, load_rows
+from app.schemas import OrderResponse, ProductResponse, ReviewResponse
+from app.serialization import FastJSONResponse, rows_as_dicts
+
+ITEMS_PER_ORDER = 3
+
+
+def seed(Session, rows: int):
+    now = datetime.utcnow()
+    with Session() as db:
+        category = Category(name="Bench")
+        user = User(email="bench@example.com", username="bench", hashed_password="x")
+        db.add_all([category, user])
+        db.flush()
+        db.add_all(
+            Product(id=i, name=f"Product {i}", description="A fairly typical product description " * 3,
+                    price=9.99 + i, stock=i, weight=0.5, category_id=category.id, created_at=now, updated_at=now)
+            for i in range(1, rows + 1)
+        )
+        db.add_all(
+            Review(product_id=1, user_id=user.id, rating=1 + i % 5, comment="Works as described. " * 4, created_at=now)
+            for i in range(rows)
+        )
+        db.add_all(
+            Order(id=i, user_id=user.id, total_amount=30.0, shipping_address="1 Main St, Springfield 12345",
+                  shipping_cost=4.5, discount_amount=0.0, created_at=now)
+            for i in range(1, rows + 1)
+        )
+        db.add_all(
+            OrderItem(order_id=order_id, product_id=1 + n, quantity=1, price=9.99)
+            for order_id in range(1, rows + 1) for n in range(ITEMS_PER_ORDER)
+        )
+        db.commit()
+
+
+def orm_variants(db, size: int) -> dict:
+    def orm(query, schema):
+        adapter = TypeAdapter(List[schema])
+
+        def load():
+            db.expunge_all()
+            return query().limit(size).all()
+
+        return load, lambda rows: json.dumps(jsonable_encoder(adapter.validate_python(rows, from_attributes=True))).encode()
+
+    return {
+        "products": orm(lambda: db.query(Product), ProductResponse),
+        "reviews": orm(lambda: db.query(Review), ReviewResponse),
+        "orders": orm(lambda: db.query(Order).options(selectinload(Order.items)), OrderResponse),
+    }
+
+
+def _orders(db, size: int, row, item_row):
+    orders = row(db.query(*OrderRow.columns).limit(size))
+    items_by_order = {}
+    for order in orders:
+        if isinstance(order, dict):
+            items_by_order[order["id"]] = order.setdefault("items", [])
+        else:
+            items_by_order[order.id] = order.items
+    for order_id, *item in db.query(OrderItem.order_id, *OrderItemRow.columns).filter(OrderItem.order_id.in_(items_by_order)):
+        items_by_order[order_id].append(item_row(item))
+    return orders
+
+
+def column_variants(db, size: int, as_dicts: bool) -> dict:
+    if as_dicts:
+        rows = lambda read_model, query: rows_as_dicts(query)
+        item_row = lambda item: dict(zip((column.key for column in OrderItemRow.columns), item))
+    else:
+        rows = load_rows
+        item_row = lambda item: OrderItemRow(*item)
+
+    def serialize(page):
+        return FastJSONResponse(page).body
+
+    return {
+        "products": (lambda: rows(ProductRow, db.query(*ProductRow.columns).limit(size)), serialize),
+        "reviews": (lambda: rows(ReviewRow, db.query(*ReviewRow.columns).limit(size)), serialize),
+        "orders": (lambda: _orders(db, size, lambda query: rows(OrderRow, query), item_row), serialize),
+    }
+
+
+def held_bytes(load) -> int:
+    """Memory still allocated while one loaded page is referenced"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    page = load()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del page
+    return held
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    seed(Session, max(args.pages))
+
+    print(f"{'page':<16}{'variant':<8}{'pages/s':>10}{'KiB held':>11}")
+    for size in args.pages:
+        db = Session()
+        variants = {
+            "orm": orm_variants(db, size),
+            "dicts": column_variants(db, size, as_dicts=True),
+            "read": column_variants(db, size, as_dicts=False),
+        }
+        for entity in ("products", "reviews", "orders"):
+            outputs = []
+            for name, by_entity in variants.items():
+                load, serialize = by_entity[entity]
+                outputs.append(json.loads(serialize(load())))
+                iterations = max(1, args.iterations * 100 // size)
+                best = min(timeit.repeat(lambda: serialize(load()), number=iterations, repeat=3)) / iterations
+                db.expunge_all()
+                held = held_bytes(load)
+                db.expunge_all()
+                print(f"{f'{size} {entity}':<16}{name:<8}{1 / best:>10.0f}{held / 1024:>11.0f}")
+            assert outputs[0] == outputs[1] == outputs[2], f"{entity} pages differ"
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Microbenchmark: building a 100-item ProductResponse page.
+
+Compares, per page:
+- orm:  db.query(Product) -> Pydantic from_attributes validation -> jsonable_encoder -> json
+        (what a response_model route does)
+- fast: column query -> row dicts -> orjson (FastJSONResponse, used by get_products)
+
+Each variant is timed end to end (query + serialization) and for serialization
+alone, against an in-memory SQLite database.
+
+    python benchmarks/bench_serialization.py --items 100 --iterations 500
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, '.')
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Category, Product
+from app.schemas import ProductResponse
+from app.serialization import FastJSONResponse, schema_columns, rows_as_dicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        category = Category(name="Bench")
+        db.add(category)
+        db.flush()
+        db.add_all(
+            Product(name=f"Product {i}", description="A fairly typical product description " * 3,
+                    price=9.99 + i, stock=i, weight=0.5, category_id=category.id,
+                    created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+            for i in range(args.items)
+        )
+        db.commit()
+
+    adapter = TypeAdapter(List[ProductResponse])
+    columns = schema_columns(Product, ProductResponse)
+    db = Session()
+
+    def orm_query():
+        db.expunge_all()
+        return db.query(Product).limit(args.items).all()
+
+    def orm_serialize(products):
+        validated = adapter.validate_python(products, from_attributes=True)
+        return json.dumps(jsonable_encoder(validated)).encode()
+
+    def fast_query():
+        return rows_as_dicts(db.query(*columns).limit(args.items).all())
+
+    def fast_serialize(rows):
+        return FastJSONResponse(rows).body
+
+    products, rows = orm_query(), fast_query()
+    assert json.loads(orm_serialize(products)) == json.loads(fast_serialize(rows))
+
+    cases = [
+        ("orm   query + serialize", lambda: orm_serialize(orm_query())),
+        ("fast  query + serialize", lambda: fast_serialize(fast_query())),
+        ("orm   serialize only", lambda: orm_serialize(products)),
+        ("fast  serialize only", lambda: fast_serialize(rows)),
+    ]
+    print(f"{args.items}-item pages, best of 5 x {args.iterations} iterations")
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=args.iterations, repeat=5)) / args.iterations
+        print(f"{name:<26} {best * 1e6:>9.1f} us/page")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: per-quote cost of shipping quotes.
+
+Compares one quote per HTTP request (POST /shipping/calculate), the scalar
+calculate_shipping_cost in a Python loop, calculate_shipping_costs on NumPy
+arrays, and the batch endpoint (POST /shipping/quotes) end to end.
+
+    python benchmarks/bench_shipping.py [--quotes 100000] [--requests 500]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, '.')
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.shipping import calculate_shipping_cost, calculate_shipping_costs
+
+
+def per_quote_us(elapsed: float, quotes: int) -> float:
+    return elapsed / quotes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    weights = rng.uniform(0, 30, args.quotes)
+    amounts = rng.uniform(0, 200, args.quotes)
+    client = TestClient(app)
+    results = []
+
+    started = time.perf_counter()
+    for weight, amount in zip(weights[:args.requests].tolist(), amounts[:args.requests].tolist()):
+        client.post("/shipping/calculate", json={
+            "address": "Somewhere", "total_weight": weight, "total_amount": amount
+        }).raise_for_status()
+    results.append(("HTTP, one quote per request", per_quote_us(time.perf_counter() - started, args.requests)))
+
+    weight_list, amount_list = weights.tolist(), amounts.tolist()
+    started = time.perf_counter()
+    for weight, amount in zip(weight_list, amount_list):
+        calculate_shipping_cost(weight, amount)
+    results.append(("scalar function loop", per_quote_us(time.perf_counter() - started, args.quotes)))
+
+    started = time.perf_counter()
+    calculate_shipping_costs(weights, amounts)
+    results.append(("vectorized function", per_quote_us(time.perf_counter() - started, args.quotes)))
+
+    started = time.perf_counter()
+    client.post("/shipping/quotes", json={"weights": weight_list, "total_amounts": amount_list}).raise_for_status()
+    results.append(("HTTP, batch endpoint", per_quote_us(time.perf_counter() - started, args.quotes)))
+
+    baseline = results[0][1]
+    print(f"{'path':<32}{'us/quote':>12}{'speedup':>12}")
+    for name, us in results:
+        print(f"{name:<32}{us:>12.3f}{baseline / us:>11.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: process startup cost of the API.
+
+Each run starts a fresh interpreter and measures:
+- import:        `import app.main`
+- first request: GET /products/ on the new app (includes lazy router loading)
+- warm request:  the same request again
+- first register: POST /auth/register (includes loading passlib/bcrypt and one bcrypt hash)
+
+Runs both LAZY_ROUTERS=True and LAZY_ROUTERS=False against a temporary SQLite
+database and prints the median of --runs runs (milliseconds).
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = r"""
+import json, time, uuid
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+timings = {"import": imported - started}
+for name, method, url, body in (
+    ("first_request", "GET", "/products/", None),
+    ("warm_request", "GET", "/products/", None),
+    ("first_register", "POST", "/auth/register", {"email": f"{uuid.uuid4().hex}@example.com", "username": uuid.uuid4().hex, "password": "password123"}),
+):
+    start = time.perf_counter()
+    client.request(method, url, json=body).raise_for_status()
+    timings[name] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def run_probe(env) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_startup.db"
+    env["PYTHONPATH"] = os.getcwd()
+    subprocess.run([sys.executable, "-m", "app.migrations", "upgrade"], env=env, check=True, capture_output=True)
+
+    print(f"{'mode':<22} {'import':>8} {'first req':>10} {'warm req':>9} {'first register':>15}")
+    for lazy in ("True", "False"):
+        env["LAZY_ROUTERS"] = lazy
+        runs = [run_probe(env) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+        print(f"{'LAZY_ROUTERS=' + lazy:<22} {median['import']:>8.1f} {median['first_request']:>10.1f} "
+              f"{median['warm_request']:>9.1f} {median['first_register']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
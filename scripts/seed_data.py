@@ -1,148 +1,402 @@
 """
-Seed script to populate database with sample data
-Run with: python scripts/seed_data.py
+Seed script to populate database with sample data, and optionally with a
+large synthetic dataset for reproducing performance problems locally.
+
+Run with:
+    python scripts/seed_data.py
+    python scripts/seed_data.py --users 1000000 --products 200000 --reviews 5000000 \
+        --carts 300000 --orders 2000000 --seed 42
+
+The sample catalog, coupons and test users are always created. Synthetic
+rows are generated in chunks with NumPy and are identical for the same seed
+and counts: product popularity and user activity follow Zipf laws, cart and
+order sizes are heavy-tailed, and timestamps fall in the year before
+REFERENCE_TIME. They are bulk loaded with COPY on Postgres and batched
+executemany elsewhere. Every generated user has the password "password123".
 """
 
+import argparse
 import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
 sys.path.insert(0, '.')
 
-from database import SessionLocal, engine, Base
-from models import Category, Product, Coupon, User
-from utils import hash_password
-from datetime import datetime, timedelta
+from sqlalchemy import func, text
+
+from app.bulk import bulk_insert
+from app.database import SessionLocal, engine
+from app.migrations import upgrade
+from app.models import Category, Product, Coupon, User, CartItem, Order, OrderItem, OrderStatus, Review
+from app.routers.shipping import calculate_shipping_costs
+from app.utils import hash_password
+
+# Fixed so generated timestamps do not depend on when the script runs
+REFERENCE_TIME = datetime(2025, 1, 1)
+CHUNK_SIZE = 100_000
+
+# Popularity skew: the i-th most popular product is bought ~1/i^s as often
+PRODUCT_ZIPF_EXPONENT = 1.1
+USER_ZIPF_EXPONENT = 1.2
+# Cart and order sizes: P(size = k) ~ 1/k^a, capped
+CART_SIZE_EXPONENT = 2.2
+ORDER_SIZE_EXPONENT = 2.5
+MAX_ITEMS = 50
+
+RATING_PROBABILITIES = [0.06, 0.05, 0.1, 0.25, 0.54]
+ORDER_STATUSES = list(OrderStatus)
+ORDER_STATUS_PROBABILITIES = [0.05, 0.05, 0.1, 0.75, 0.05]
+
+def seed_sample_data(db):
+    """The small hand-written catalog, coupons and test users"""
+    # Create categories
+    categories = [
+        Category(name="Electronics", description="Electronic devices and gadgets"),
+        Category(name="Clothing", description="Apparel and fashion items"),
+        Category(name="Books", description="Physical and digital books"),
+        Category(name="Home & Garden", description="Home and garden items"),
+    ]
+    db.add_all(categories)
+    db.flush()
+
+    # Create products
+    products = [
+        Product(
+            name="Wireless Headphones",
+            description="High-quality wireless headphones with noise cancellation",
+            price=79.99,
+            stock=50,
+            weight=0.25,
+            category_id=categories[0].id
+        ),
+        Product(
+            name="USB-C Cable",
+            description="Durable USB-C charging cable, 2 meters long",
+            price=12.99,
+            stock=200,
+            weight=0.05,
+            category_id=categories[0].id
+        ),
+        Product(
+            name="Cotton T-Shirt",
+            description="Comfortable 100% cotton t-shirt",
+            price=19.99,
+            stock=100,
+            weight=0.2,
+            category_id=categories[1].id
+        ),
+        Product(
+            name="Running Shoes",
+            description="Professional running shoes with cushioning",
+            price=119.99,
+            stock=30,
+            weight=0.5,
+            category_id=categories[1].id
+        ),
+        Product(
+            name="Python Programming Book",
+            description="Complete guide to Python programming",
+            price=34.99,
+            stock=45,
+            weight=0.8,
+            category_id=categories[2].id
+        ),
+        Product(
+            name="Indoor Plant Pot",
+            description="Ceramic pot for indoor plants, 20cm diameter",
+            price=24.99,
+            stock=75,
+            weight=1.2,
+            category_id=categories[3].id
+        ),
+    ]
+    db.add_all(products)
+    db.flush()
+
+    # Create coupons
+    coupons = [
+        Coupon(
+            code="SUMMER20",
+            discount_percentage=20.0,
+            max_uses=100,
+            is_active=True,
+            expiry_date=datetime.utcnow() + timedelta(days=30)
+        ),
+        Coupon(
+            code="FREESHIP",
+            discount_percentage=0.0,  # Column is NOT NULL; the amount applies
+            discount_amount=5.0,
+            max_uses=50,
+            is_active=True,
+            expiry_date=datetime.utcnow() + timedelta(days=15)
+        ),
+        Coupon(
+            code="WELCOME10",
+            discount_percentage=10.0,
+            max_uses=None,
+            is_active=True,
+            expiry_date=None
+        ),
+    ]
+    db.add_all(coupons)
+    db.flush()
+
+    # Create test users
+    users = [
+        User(
+            email="user@example.com",
+            username="testuser",
+            hashed_password=hash_password("password123")
+        ),
+        User(
+            email="john@example.com",
+            username="john_doe",
+            hashed_password=hash_password("john123")
+        ),
+    ]
+    db.add_all(users)
+    db.flush()
+
+    print(f"Created {len(categories)} categories")
+    print(f"Created {len(products)} products")
+    print(f"Created {len(coupons)} coupons")
+    print(f"Created {len(users)} test users")
+
+class ZipfSampler:
+    """Draws ids with Zipf-distributed popularity; the popular ids are scattered, not the lowest"""
+
+    def __init__(self, rng, ids: np.ndarray, exponent: float):
+        weights = 1.0 / (rng.permutation(len(ids)) + 1.0) ** exponent
+        self.ids = ids
+        self.cdf = np.cumsum(weights / weights.sum())
+        self.rng = rng
+
+    def sample(self, size: int) -> np.ndarray:
+        positions = np.searchsorted(self.cdf, self.rng.random(size), side="right")
+        return self.ids[np.minimum(positions, len(self.ids) - 1)]
+
+def _sizes(rng, count: int, exponent: float) -> np.ndarray:
+    return np.minimum(rng.zipf(exponent, count), MAX_ITEMS)
+
+def _timestamps(rng, count: int) -> list:
+    seconds = rng.integers(0, 365 * 24 * 3600, count)
+    return [REFERENCE_TIME - timedelta(seconds=int(second)) for second in seconds]
+
+def _chunks(total: int):
+    for start in range(0, total, CHUNK_SIZE):
+        yield start, min(CHUNK_SIZE, total - start)
+
+def _next_id(db, model) -> int:
+    return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+class SyntheticData:
+    """Generates and bulk loads the synthetic dataset, one entity at a time"""
+
+    def __init__(self, db, seed: int):
+        self.db = db
+        self.rng = np.random.default_rng(seed)
+
+    def load(self, model, columns: tuple, rows) -> int:
+        return bulk_insert(self.db, model.__table__, columns, rows)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+    def categories(self, count: int):
+        first_id = _next_id(self.db, Category)
+        self.category_ids = np.arange(first_id, first_id + count)
+        self.load(Category, ("id", "name", "description", "created_at"), (
+            (int(category_id), f"Category {category_id}", None, REFERENCE_TIME) for category_id in self.category_ids
+        ))
 
-def seed_data():
-    """Populate database with sample data"""
+    def products(self, count: int):
+        rng = self.rng
+        first_id = _next_id(self.db, Product)
+        self.product_ids = np.arange(first_id, first_id + count)
+        # Log-normal prices (median ~$25) and weights (median ~0.6 kg)
+        self.prices = np.round(rng.lognormal(3.2, 0.9, count), 2) + 0.99
+        self.weights = np.round(rng.lognormal(-0.5, 1.0, count), 3)
+        stock = rng.integers(0, 500, count)
+        categories = ZipfSampler(rng, self.category_ids, 0.8).sample(count)
+
+        for start, size in _chunks(count):
+            created = _timestamps(rng, size)
+            self.load(Product, ("id", "name", "description", "price", "stock", "weight", "category_id", "created_at", "updated_at"), (
+                (
+                    int(self.product_ids[start + i]), f"Product {self.product_ids[start + i]}",
+                    f"Synthetic product {self.product_ids[start + i]}",
+                    float(self.prices[start + i]), int(stock[start + i]), float(self.weights[start + i]),
+                    int(categories[start + i]), created[i], created[i]
+                )
+                for i in range(size)
+            ))
+        self.popularity = ZipfSampler(rng, np.arange(count), PRODUCT_ZIPF_EXPONENT)
+
+    def users(self, count: int):
+        first_id = _next_id(self.db, User)
+        self.user_ids = np.arange(first_id, first_id + count)
+        # One bcrypt hash shared by every generated user; hashing millions would take hours
+        password = hash_password("password123")
+
+        for start, size in _chunks(count):
+            created = _timestamps(self.rng, size)
+            self.load(User, ("id", "email", "username", "hashed_password", "created_at", "updated_at"), (
+                (
+                    int(user_id), f"user{user_id}@example.com", f"user{user_id}", password, created[i], created[i]
+                )
+                for i, user_id in enumerate(self.user_ids[start:start + size])
+            ))
+        self.activity = ZipfSampler(self.rng, self.user_ids, USER_ZIPF_EXPONENT)
+
+    def reviews(self, count: int):
+        rng = self.rng
+        seen = set()
+        next_id = _next_id(self.db, Review)
+
+        for _, size in _chunks(count):
+            products = self.popularity.sample(size)
+            users = self.activity.sample(size)
+            # At most one review per (product, user), as the API enforces
+            keys = products.astype(np.int64) * (int(self.user_ids[-1]) + 1) + users
+            keep = [i for i, key in enumerate(keys.tolist()) if not (key in seen or seen.add(key))]
+            ratings = rng.choice(5, size, p=RATING_PROBABILITIES) + 1
+            created = _timestamps(rng, size)
+
+            rows = [
+                (
+                    next_id + n, int(self.product_ids[products[i]]), int(users[i]), int(ratings[i]),
+                    "Synthetic review" if ratings[i] != 3 else None, created[i], created[i]
+                )
+                for n, i in enumerate(keep)
+            ]
+            next_id += len(rows)
+            self.load(Review, ("id", "product_id", "user_id", "rating", "comment", "created_at", "updated_at"), rows)
+
+    def carts(self, count: int):
+        rng = self.rng
+        count = min(count, len(self.user_ids))
+        owners = rng.choice(self.user_ids, count, replace=False)
+        next_id = _next_id(self.db, CartItem)
+
+        for start, size in _chunks(count):
+            sizes = _sizes(rng, size, CART_SIZE_EXPONENT)
+            users = np.repeat(owners[start:start + size], sizes)
+            products = self.popularity.sample(len(users))
+            # One row per (user, product); repeats become a larger quantity
+            pairs, quantities = np.unique(np.stack([users, products], axis=1), axis=0, return_counts=True)
+            created = _timestamps(rng, len(pairs))
+
+            rows = [
+                (
+                    next_id + i, int(user_id), int(self.product_ids[product]), int(quantity),
+                    created[i], created[i]
+                )
+                for i, ((user_id, product), quantity) in enumerate(zip(pairs.tolist(), quantities.tolist()))
+            ]
+            next_id += len(rows)
+            self.load(CartItem, ("id", "user_id", "product_id", "quantity", "created_at", "updated_at"), rows)
+
+    def orders(self, count: int):
+        rng = self.rng
+        next_order_id = _next_id(self.db, Order)
+        next_item_id = _next_id(self.db, OrderItem)
+
+        for _, size in _chunks(count):
+            order_ids = np.arange(next_order_id, next_order_id + size)
+            users = self.activity.sample(size)
+            sizes = _sizes(rng, size, ORDER_SIZE_EXPONENT)
+
+            item_orders = np.repeat(np.arange(size), sizes)
+            products = self.popularity.sample(len(item_orders))
+            quantities = np.minimum(rng.zipf(3.0, len(item_orders)), 10)
+            prices = self.prices[products]
+
+            subtotals = np.bincount(item_orders, weights=prices * quantities, minlength=size)
+            weights = np.bincount(item_orders, weights=self.weights[products] * quantities, minlength=size)
+            shipping_costs, _ = calculate_shipping_costs(weights, subtotals)
+            statuses = rng.choice(len(ORDER_STATUSES), size, p=ORDER_STATUS_PROBABILITIES)
+            postal_codes = rng.integers(1000, 99999, size)
+            created = _timestamps(rng, size)
+
+            self.load(Order, (
+                "id", "user_id", "total_amount", "shipping_address", "shipping_cost",
+                "discount_amount", "coupon_code", "status", "created_at", "updated_at"
+            ), (
+                (
+                    int(order_ids[i]), int(users[i]), round(float(subtotals[i] + shipping_costs[i]), 2),
+                    f"{i % 999 + 1} Main St, Springfield {postal_codes[i]:05d}", float(shipping_costs[i]),
+                    0.0, None, ORDER_STATUSES[statuses[i]], created[i], created[i]
+                )
+                for i in range(size)
+            ))
+            self.load(OrderItem, ("id", "order_id", "product_id", "quantity", "price"), (
+                (
+                    next_item_id + i, int(order_ids[item_orders[i]]), int(self.product_ids[products[i]]),
+                    int(quantities[i]), float(prices[i])
+                )
+                for i in range(len(item_orders))
+            ))
+            next_order_id += size
+            next_item_id += len(item_orders)
+
+def clear_data(db):
+    """Delete all rows, children before parents"""
+    for model in (OrderItem, Order, Review, CartItem, Product, Category, Coupon, User):
+        db.query(model).delete()
+
+def reset_sequences(db):
+    """Move Postgres id sequences past the explicitly numbered rows"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for model in (Category, Product, User, Review, CartItem, Order, OrderItem):
+        table = model.__tablename__
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        ))
+
+def seed_data(args):
+    """Populate database with sample data and the requested synthetic rows"""
+    upgrade(engine)
     db = SessionLocal()
-    
+
     try:
         # Clear existing data
-        db.query(Product).delete()
-        db.query(Category).delete()
-        db.query(Coupon).delete()
-        db.query(User).delete()
-        
-        # Create categories
-        categories = [
-            Category(name="Electronics", description="Electronic devices and gadgets"),
-            Category(name="Clothing", description="Apparel and fashion items"),
-            Category(name="Books", description="Physical and digital books"),
-            Category(name="Home & Garden", description="Home and garden items"),
-        ]
-        db.add_all(categories)
-        db.flush()
-        
-        # Create products
-        products = [
-            Product(
-                name="Wireless Headphones",
-                description="High-quality wireless headphones with noise cancellation",
-                price=79.99,
-                stock=50,
-                weight=0.25,
-                category_id=categories[0].id
-            ),
-            Product(
-                name="USB-C Cable",
-                description="Durable USB-C charging cable, 2 meters long",
-                price=12.99,
-                stock=200,
-                weight=0.05,
-                category_id=categories[0].id
-            ),
-            Product(
-                name="Cotton T-Shirt",
-                description="Comfortable 100% cotton t-shirt",
-                price=19.99,
-                stock=100,
-                weight=0.2,
-                category_id=categories[1].id
-            ),
-            Product(
-                name="Running Shoes",
-                description="Professional running shoes with cushioning",
-                price=119.99,
-                stock=30,
-                weight=0.5,
-                category_id=categories[1].id
-            ),
-            Product(
-                name="Python Programming Book",
-                description="Complete guide to Python programming",
-                price=34.99,
-                stock=45,
-                weight=0.8,
-                category_id=categories[2].id
-            ),
-            Product(
-                name="Indoor Plant Pot",
-                description="Ceramic pot for indoor plants, 20cm diameter",
-                price=24.99,
-                stock=75,
-                weight=1.2,
-                category_id=categories[3].id
-            ),
-        ]
-        db.add_all(products)
-        db.flush()
-        
-        # Create coupons
-        coupons = [
-            Coupon(
-                code="SUMMER20",
-                discount_percentage=20.0,
-                max_uses=100,
-                is_active=True,
-                expiry_date=datetime.utcnow() + timedelta(days=30)
-            ),
-            Coupon(
-                code="FREESHIP",
-                discount_amount=5.0,
-                max_uses=50,
-                is_active=True,
-                expiry_date=datetime.utcnow() + timedelta(days=15)
-            ),
-            Coupon(
-                code="WELCOME10",
-                discount_percentage=10.0,
-                max_uses=None,
-                is_active=True,
-                expiry_date=None
-            ),
-        ]
-        db.add_all(coupons)
-        db.flush()
-        
-        # Create test users
-        users = [
-            User(
-                email="user@example.com",
-                username="testuser",
-                hashed_password=hash_password("password123")
-            ),
-            User(
-                email="john@example.com",
-                username="john_doe",
-                hashed_password=hash_password("john123")
-            ),
+        clear_data(db)
+        seed_sample_data(db)
+
+        synthetic = SyntheticData(db, args.seed)
+        steps = [
+            ("categories", synthetic.categories, args.categories if args.products else 0),
+            ("products", synthetic.products, args.products),
+            ("users", synthetic.users, args.users),
+            ("reviews", synthetic.reviews, args.reviews if args.products and args.users else 0),
+            ("carts", synthetic.carts, args.carts if args.products and args.users else 0),
+            ("orders", synthetic.orders, args.orders if args.products and args.users else 0),
         ]
-        db.add_all(users)
-        
+        for name, step, count in steps:
+            if not count:
+                continue
+            started = time.perf_counter()
+            step(count)
+            print(f"Generated {count} synthetic {name} in {time.perf_counter() - started:.1f}s")
+
+        reset_sequences(db)
         db.commit()
         print("Database seeded successfully!")
-        print(f"Created {len(categories)} categories")
-        print(f"Created {len(products)} products")
-        print(f"Created {len(coupons)} coupons")
-        print(f"Created {len(users)} test users")
-        
+
     except Exception as e:
         db.rollback()
         print(f"Error seeding database: {e}")
+        raise
     finally:
         db.close()
 
 if __name__ == "__main__":
-    seed_data()
+    parser = argparse.ArgumentParser(description="Seed the database with sample and synthetic data")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same data")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--products", type=int, default=0)
+    parser.add_argument("--users", type=int, default=0)
+    parser.add_argument("--reviews", type=int, default=0, help="Reviews to draw (repeats of a user/product pair are dropped)")
+    parser.add_argument("--carts", type=int, default=0, help="Users with a non-empty cart")
+    parser.add_argument("--orders", type=int, default=0)
+    seed_data(parser.parse_args())
@@ -0,0 +1,98 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import Base, create_async_db_engine, create_db_engine, get_async_db, get_db, get_read_db
+from app.main import app
+from app.models import Category, Product, User, CartItem, Order, OrderItem
+from app.routers import async_reads
+from app.utils import create_access_token
+
+async_app = FastAPI()
+async_app.include_router(async_reads.router)
+
+@pytest.fixture(scope="module")
+def clients(tmp_path_factory):
+    """Sync and async apps reading the same SQLite file"""
+    path = tmp_path_factory.mktemp("async") / "shop.db"
+    sync_engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    SyncSession = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+
+    with SyncSession() as db:
+        user = User(email="async@example.com", username="async", hashed_password="x")
+        category = Category(name="Async")
+        db.add_all([user, category])
+        db.flush()
+        products = [
+            Product(name=f"Item {i}", price=10.0 + i, stock=5, category_id=category.id)
+            for i in range(3)
+        ]
+        db.add_all(products)
+        db.flush()
+        db.add(CartItem(user_id=user.id, product_id=products[0].id, quantity=2))
+        order = Order(user_id=user.id, total_amount=21.0, shipping_address="1 Main St")
+        db.add(order)
+        db.flush()
+        db.add(OrderItem(order_id=order.id, product_id=products[1].id, quantity=1, price=11.0))
+        db.commit()
+        user_id, product_id = user.id, products[0].id
+
+    # NullPool: aiosqlite connections must not outlive the event loop of a request
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    def override_get_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    yield TestClient(app), TestClient(async_app), headers, user_id, product_id
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+    sync_engine.dispose()
+
+def test_async_handlers_match_sync_handlers(clients):
+    sync_client, async_client, headers, user_id, product_id = clients
+    for url in (
+        "/products/",
+        "/products/?min_price=11&limit=1",
+        f"/products/{product_id}",
+        f"/cart/?user_id={user_id}",
+        f"/orders/?user_id={user_id}",
+    ):
+        sync_response = sync_client.get(url, headers=headers)
+        async_response = async_client.get(url, headers=headers)
+        assert async_response.status_code == sync_response.status_code == 200, url
+        assert async_response.json() == sync_response.json(), url
+
+def test_async_handlers_set_cache_headers(clients):
+    sync_client, async_client, _, _, product_id = clients
+    category_id = sync_client.get(f"/products/{product_id}").json()["category_id"]
+    for url in ("/products/", f"/products/?category_id={category_id}", f"/products/{product_id}"):
+        sync_response = sync_client.get(url)
+        async_response = async_client.get(url)
+        for header in ("Cache-Control", "Surrogate-Key"):
+            assert async_response.headers.get(header) == sync_response.headers[header], (url, header)
+    assert f"category-{category_id}" in async_client.get(f"/products/?category_id={category_id}").headers["Surrogate-Key"]
+
+def test_async_handlers_errors(clients):
+    _, async_client, headers, user_id, _ = clients
+    assert async_client.get("/products/999999").status_code == 404
+    assert async_client.get(f"/orders/?user_id={user_id}").status_code == 401
+    assert async_client.get(f"/orders/?user_id={user_id + 1}", headers=headers).status_code == 403
+
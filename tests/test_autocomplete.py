@@ -0,0 +1,134 @@
+import pytest
+
+import app.routers.categories as categories
+import app.routers.products as products
+import app.routers.search as search
+from app.autocomplete import AutocompleteIndex, _Segment, _State, index_keys, normalize
+from app.models import Category, Product, User, Order, OrderItem
+
+def _names(suggestions):
+    return [suggestion["name"] for suggestion in suggestions]
+
+@pytest.fixture
+def index(session_factory):
+    with session_factory() as db:
+        audio = Category(name="Audio")
+        user = User(email="fan@example.com", username="fan", hashed_password="x")
+        db.add_all([audio, user, Category(name="Books")])
+        db.flush()
+        db.add_all([
+            Product(id=1, name="Wireless Pro Headphones", price=80, stock=5, category_id=audio.id),
+            Product(id=2, name="Headphone Stand", price=20, stock=5, category_id=audio.id),
+            Product(id=3, name="Café Crème Mug", price=10, stock=5, category_id=audio.id),
+            Product(id=4, name="Audiobook Player", price=50, stock=5, category_id=audio.id),
+        ])
+        order = Order(user_id=user.id, total_amount=1, shipping_address="1 Main St")
+        db.add(order)
+        db.flush()
+        # Headphone Stand is the best seller
+        db.add_all([
+            OrderItem(order_id=order.id, product_id=2, quantity=5, price=20),
+            OrderItem(order_id=order.id, product_id=1, quantity=1, price=80),
+        ])
+        db.commit()
+
+    index = AutocompleteIndex(session_factory)
+    with session_factory() as db:
+        index.build(db)
+    return index
+
+def test_normalization_and_keys():
+    assert normalize("  Café-Crème MUG! ") == "cafe creme mug"
+    assert index_keys("Wireless Pro Headphones") == [b"wireless pro headphones", b"pro headphones", b"headphones"]
+
+def test_prefix_of_any_word_ranked_by_popularity(index):
+    assert _names(index.suggest("head")) == ["Headphone Stand", "Wireless Pro Headphones"]
+    assert _names(index.suggest("PRO HEAD")) == ["Wireless Pro Headphones"]
+    assert _names(index.suggest("creme")) == ["Café Crème Mug"]
+    assert index.suggest("") == [] and index.suggest("zzz") == []
+
+    suggestions = index.suggest("aud")
+    assert suggestions[0] == {"type": "category", "id": 1, "name": "Audio"}
+    assert _names(suggestions[1:]) == ["Audiobook Player"]
+    assert len(index.suggest("head", limit=1)) == 1
+
+def test_updates_overlay_the_index(index):
+    index.upsert_product(2, "Tripod Stand")
+    index.upsert_product(5, "Headphone Case")
+    index.upsert_category(9, "Headwear")
+
+    assert _names(index.suggest("head")) == ["Headwear", "Wireless Pro Headphones", "Headphone Case"]
+    # The renamed best seller keeps its popularity
+    assert _names(index.suggest("stand")) == ["Tripod Stand"]
+    assert index.stats()["pending"] == 4
+
+def test_refresh_reads_changes_made_by_other_workers(index, session_factory):
+    with session_factory() as db:
+        db.get(Product, 4).name = "Headphone Amp"
+        db.add(Category(id=5, name="Headgear"))
+        db.commit()
+
+    index.refresh(Product, {4})
+    index.refresh(Category, {5})
+    assert _names(index.suggest("head")) == ["Headgear", "Headphone Stand", "Wireless Pro Headphones", "Headphone Amp"]
+
+def test_refresh_skips_unchanged_names(index, session_factory):
+    with session_factory() as db:
+        db.get(Product, 1).price = 70
+        db.commit()
+
+    index.refresh(Product, {1, 2})
+    index.refresh(Category, {1})
+    assert index.stats()["pending"] == 0 and not index._state.replaced
+
+    # A rename is indexed once, however many events follow it
+    with session_factory() as db:
+        db.get(Product, 4).name = "Headphone Amp"
+        db.commit()
+    index.refresh(Product, {4})
+    state = index._state
+    index.refresh(Product, {4})
+    assert index._state is state and index.stats()["pending"] == 2
+
+def test_changes_during_a_rebuild_are_kept(index, session_factory):
+    load = AutocompleteIndex.load
+
+    def load_while_product_is_created(db):
+        state = load(db)
+        index.upsert_product(6, "Headphone Amp")
+        return state
+
+    index.load = load_while_product_is_created
+    with session_factory() as db:
+        index.build(db)
+    assert "Headphone Amp" in _names(index.suggest("headphone"))
+
+def test_large_prefix_ranges_are_memoized():
+    index = AutocompleteIndex()
+    index._state = _State(_Segment((i, f"Item {i}", float(i % 1000)) for i in range(1, 5001)))
+
+    first = index.suggest("item", limit=5)
+    assert [suggestion["id"] for suggestion in first] == [999, 1999, 2999, 3999, 4999]
+    assert index._state.segment._memo
+    assert index.suggest("item", limit=5) == first
+
+def test_endpoint_and_api_hooks(index, api_client, monkeypatch):
+    for module in (search, products, categories):
+        monkeypatch.setattr(module, "autocomplete_index", index)
+    response = api_client.get("/search/autocomplete?q=head&limit=5")
+    assert response.status_code == 200
+    assert _names(response.json()["suggestions"]) == ["Headphone Stand", "Wireless Pro Headphones"]
+
+    created = api_client.post("/products/", json={"name": "Headband", "price": 5, "stock": 1, "category_id": 1}).json()
+    api_client.put("/products/1", json={"name": "Wireless Earbuds"})
+    names = _names(api_client.get("/search/autocomplete?q=head").json()["suggestions"])
+    assert names == ["Headphone Stand", "Headband"]
+    assert created["id"] in [s["id"] for s in api_client.get("/search/autocomplete?q=headb").json()["suggestions"]]
+
+def test_first_build_runs_in_background(index, session_factory):
+    fresh = AutocompleteIndex(session_factory)
+    with session_factory() as db:
+        fresh.ensure_built(db)
+    with fresh._rebuilding:  # held until the background build finishes
+        pass
+    assert _names(fresh.suggest("head")) == ["Headphone Stand", "Wireless Pro Headphones"]
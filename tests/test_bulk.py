@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+
+import app.bulk as bulk
+from app.bulk import ALPHABET, _copy_value, bulk_insert, create_coupons, existing_codes, generate_codes, parse_template
+from app.coupons import coupon_cache, missing_coupon_cache
+from app.models import Coupon, Order, OrderStatus, User
+from app.routers import admin
+
+@pytest.fixture
+def client(api_client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "admin-secret")
+    yield api_client
+    coupon_cache.clear()
+    missing_coupon_cache.clear()
+
+def test_generated_codes_are_unique_and_follow_template():
+    taken = set(generate_codes("X-####-Y", 500))
+    codes = generate_codes("X-####-Y", 5000, taken)
+    assert len(set(codes)) == 5000
+    assert not taken & set(codes)
+    assert all(code.startswith("X-") and code.endswith("-Y") and len(code) == 8 for code in codes)
+    assert set("".join(code[2:6] for code in codes)) <= set(ALPHABET.decode())
+
+def test_templates_are_validated():
+    assert parse_template("SPRING-####") == ("SPRING-", 4, "")
+    for template in ("NOSLOTS", "A#B#", "BAD,#####"):
+        with pytest.raises(ValueError):
+            parse_template(template)
+    with pytest.raises(ValueError, match="too few"):
+        generate_codes("##", 100)
+
+def test_create_coupons_skips_existing_codes(session_factory):
+    with session_factory() as db:
+        first = create_coupons(db, "RUN-######", 2000, discount_amount=5.0, batch_size=300)
+        second = create_coupons(db, "RUN-######", 2000, discount_percentage=10.0, batch_size=300)
+        assert not set(first) & set(second)
+        assert db.query(Coupon).count() == 4000
+        coupon = db.query(Coupon).filter(Coupon.code == first[0]).one()
+        assert (coupon.discount_amount, coupon.max_uses, coupon.current_uses) == (5.0, 1, 0)
+
+def test_bulk_endpoint_streams_csv(client):
+    # A code looked up before it exists must be usable once generated
+    assert client.post("/coupons/validate?code=ANY").status_code == 404
+
+    response = client.post(
+        "/admin/coupons/bulk",
+        json={"count": 1200, "template": "CAMP-########", "discount_percentage": 15},
+        headers={"X-Admin-Token": "admin-secret"}
+    )
+    assert response.status_code == 201
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "code"
+    assert len(set(lines[1:])) == 1200
+
+    assert client.post(f"/coupons/validate?code={lines[1]}").json()["code"] == lines[1]
+
+    response = client.post(
+        "/admin/coupons/bulk",
+        json={"count": 10, "template": "NOPLACEHOLDER", "discount_percentage": 15},
+        headers={"X-Admin-Token": "admin-secret"}
+    )
+    assert response.status_code == 400
+    assert client.post("/admin/coupons/bulk", json={"count": 10}).status_code == 403
+
+def test_existing_codes_only_reads_codes_the_template_can_generate(session_factory):
+    with session_factory() as db:
+        db.add_all(
+            Coupon(code=code, discount_percentage=10.0)
+            for code in ("AB23CD45", "SUMMER10", "WELCOME", "RUN-AB", "RUN-AB23", "X-AB2-Y", "X-AB2-Z")
+        )
+        db.commit()
+        assert existing_codes(db, "########") == {"AB23CD45", "SUMMER10", "RUN-AB23"}
+        assert existing_codes(db, "RUN-##") == {"RUN-AB"}
+        assert existing_codes(db, "X-###-Y") == {"X-AB2-Y"}
+
+def test_bulk_endpoint_conflicts_on_concurrent_duplicate(client, session_factory, monkeypatch):
+    with session_factory() as db:
+        db.add(Coupon(code="DUPE-AAAA", discount_percentage=10.0))
+        db.commit()
+    # Another request inserted this code after it was checked
+    monkeypatch.setattr(bulk, "existing_codes", lambda db, template: set())
+    monkeypatch.setattr(bulk, "generate_codes", lambda template, count, taken: ["DUPE-BBBB", "DUPE-AAAA"])
+
+    response = client.post(
+        "/admin/coupons/bulk",
+        json={"count": 2, "template": "DUPE-####", "discount_percentage": 15},
+        headers={"X-Admin-Token": "admin-secret"}
+    )
+    assert response.status_code == 409
+    with session_factory() as db:
+        assert [code for code, in db.query(Coupon.code)] == ["DUPE-AAAA"]
+
+def test_bulk_insert_loads_rows_in_batches(session_factory):
+    with session_factory() as db:
+        bulk_insert(db, User.__table__, ("id", "email", "username", "hashed_password"), [(1, "a@example.com", "a", "x")])
+        rows = ((i, 1, 10.0 + i, "1 Main St", OrderStatus.SHIPPED) for i in range(1, 8))
+        count = bulk_insert(db, Order.__table__, ("id", "user_id", "total_amount", "shipping_address", "status"), rows, batch_size=3)
+        db.commit()
+        assert count == 7
+        assert db.query(Order).filter(Order.status == OrderStatus.SHIPPED).count() == 7
+        assert db.get(Order, 7).total_amount == 17.0
+
+def test_copy_values():
+    assert [_copy_value(v) for v in (None, True, False, OrderStatus.DELIVERED, 2.5)] == ["", "t", "f", "DELIVERED", 2.5]
+    assert _copy_value(datetime(2025, 1, 1)) == datetime(2025, 1, 1)
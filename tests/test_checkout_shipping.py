@@ -0,0 +1,81 @@
+import pytest
+
+from app.models import Category, Product, User, CartItem
+from app.shipping_rates import DEFAULT_ZONE, _bucket_quote, billable_weight_bucket, quote_shipping
+from app.utils import create_access_token
+
+@pytest.fixture
+def shopper(session_factory, api_client):
+    with session_factory() as db:
+        category = Category(name="Heavy")
+        user = User(email="heavy@example.com", username="heavy", hashed_password="x")
+        db.add_all([category, user])
+        db.flush()
+        kettlebell = Product(name="Kettlebell", price=20.0, stock=10, weight=8.0, category_id=category.id)
+        rope = Product(name="Rope", price=7.5, stock=10, weight=0.35, category_id=category.id)
+        db.add_all([kettlebell, rope])
+        db.flush()
+        db.add_all([
+            CartItem(user_id=user.id, product_id=kettlebell.id, quantity=2),
+            CartItem(user_id=user.id, product_id=rope.id, quantity=3),
+        ])
+        db.commit()
+        user_id = user.id
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    return api_client, headers, user_id
+
+def test_billable_weight_rounds_up_to_step():
+    assert billable_weight_bucket(0) == 0
+    assert billable_weight_bucket(2.3) == 23
+    assert billable_weight_bucket(2.31) == 24
+    assert quote_shipping(2.3, 10.0) == (9.6, 5)
+    assert quote_shipping(2.3, 100.0) == (0.0, 3)
+
+def test_quotes_are_memoized_per_bucket():
+    _bucket_quote.cache_clear()
+    quote_shipping(1.01, 20.0)
+    quote_shipping(1.05, 30.0)
+    quote_shipping(1.09, 99.0, DEFAULT_ZONE)
+    assert _bucket_quote.cache_info().hits == 2
+    assert _bucket_quote.cache_info().currsize == 1
+
+def test_cart_shows_the_shipping_checkout_charges(shopper):
+    client, headers, user_id = shopper
+    cart = client.get(f"/cart/?user_id={user_id}", headers=headers).json()
+    # 2 x 20.0 + 3 x 7.5 = 62.5; 2 x 8 kg + 3 x 0.35 kg = 17.05 kg, billed as 17.1 kg
+    assert cart["total"] == 62.5
+    assert cart["total_weight"] == pytest.approx(17.05)
+    assert (cart["shipping_cost"], cart["estimated_days"], cart["shipping_zone"]) == (39.2, 5, "default")
+
+    order = client.post("/orders/checkout", json={"shipping_address": "1 Main St"}, headers=headers).json()
+    assert order["shipping_cost"] == cart["shipping_cost"]
+    assert order["total_amount"] == 62.5 + 39.2
+
+def test_empty_cart_totals(shopper):
+    client, headers, user_id = shopper
+    client.delete(f"/cart/?user_id={user_id}", headers=headers)
+    cart = client.get(f"/cart/?user_id={user_id}", headers=headers).json()
+    assert (cart["items"], cart["total"], cart["total_weight"], cart["shipping_cost"]) == ([], 0.0, 0.0, 0.0)
+    response = client.post("/orders/checkout", json={"shipping_address": "1 Main St"}, headers=headers)
+    assert response.status_code == 400
+
+def test_query_count_does_not_grow_with_cart_size(shopper, session_factory):
+    client, headers, user_id = shopper
+    small = client.get(f"/cart/?user_id={user_id}", headers=headers)
+    with session_factory() as db:
+        category_id = db.query(Category.id).scalar()
+        products = [Product(name=f"Plate {i}", price=5.0, stock=10, weight=1.0, category_id=category_id) for i in range(8)]
+        db.add_all(products)
+        db.flush()
+        db.add_all(CartItem(user_id=user_id, product_id=product.id, quantity=1) for product in products)
+        db.commit()
+    large = client.get(f"/cart/?user_id={user_id}", headers=headers)
+    assert len(large.json()["items"]) == 10
+    assert large.headers["X-DB-Query-Count"] == small.headers["X-DB-Query-Count"] == "3"
+
+    checkout = client.post("/orders/checkout", json={"shipping_address": "1 Main St"}, headers=headers)
+    assert len(checkout.json()["items"]) == 10
+    # User, cart items, totals, order insert, item insert, cart delete, order refresh and its items
+    assert checkout.headers["X-DB-Query-Count"] == "8"
+    assert client.get(f"/cart/?user_id={user_id}", headers=headers).json()["items"] == []
@@ -0,0 +1,72 @@
+import gzip
+
+import brotli
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+
+from app.compression import CompressedBodyCache, CompressionMiddleware, choose_encoding
+
+cache = CompressedBodyCache(max_entries=2)
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=500, cache=cache)
+
+@app.get("/large")
+def large():
+    return [{"id": i, "name": f"Product {i}"} for i in range(100)]
+
+@app.get("/small")
+def small():
+    return {"ok": True}
+
+@app.get("/binary")
+def binary():
+    return Response(b"\0" * 5000, media_type="application/octet-stream")
+
+@app.get("/text")
+def text():
+    return PlainTextResponse("hello " * 500)
+
+client = TestClient(app)
+
+def test_large_json_is_gzipped():
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json()[99]["name"] == "Product 99"
+
+def test_brotli_preferred_when_accepted():
+    response = client.get("/text", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert int(response.headers["content-length"]) < 3000
+
+def test_small_and_disallowed_bodies_are_not_compressed():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+    response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert len(response.content) == 5000
+
+def test_no_accept_encoding_means_identity():
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+def test_repeated_bodies_are_served_from_cache():
+    body = b'{"payload": "' + b"x" * 2000 + b'"}'
+    before = cache.stats()
+    first = cache.get_or_compress(body, "gzip")
+    second = cache.get_or_compress(body, "gzip")
+    assert first is second
+    assert gzip.decompress(first) == body
+    assert brotli.decompress(cache.get_or_compress(body, "br")) == body
+    stats = cache.stats()
+    assert stats["hits"] == before["hits"] + 1
+    assert stats["entries"] <= 2
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("br;q=0, gzip") == "gzip"
+    assert choose_encoding("deflate") is None
+    assert choose_encoding("") is None
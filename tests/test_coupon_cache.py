@@ -0,0 +1,98 @@
+import pytest
+
+from app.cache import MISSING, TTLCache
+from app.coupons import coupon_cache, missing_coupon_cache
+from app.models import Category, Product, User, CartItem, Coupon
+from app.query_stats import assert_max_queries
+from app.utils import create_access_token
+
+@pytest.fixture
+def client(api_client):
+    coupon_cache.clear()
+    missing_coupon_cache.clear()
+    yield api_client
+    coupon_cache.clear()
+    missing_coupon_cache.clear()
+
+def test_ttl_cache_expires_and_evicts():
+    now = [0.0]
+    cache = TTLCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", None, ttl=1)
+    assert cache.get("b") is None
+    now[0] = 2
+    assert cache.get("b") is MISSING
+    cache.set("c", 3)
+    cache.get("a")
+    cache.set("d", 4)  # evicts "c", the least recently used
+    assert cache.get("c") is MISSING
+    assert cache.get("a") == 1
+    now[0] = 11
+    assert cache.get("a") is MISSING
+
+def test_validation_is_served_from_cache(client):
+    client.post("/coupons/", json={"code": "CACHED10", "discount_percentage": 10})
+    assert client.post("/coupons/validate?code=CACHED10").status_code == 200
+    with assert_max_queries(0):
+        response = client.post("/coupons/validate?code=CACHED10")
+    assert response.json()["code"] == "CACHED10"
+
+def test_missing_codes_are_negatively_cached(client):
+    assert client.post("/coupons/validate?code=NOPE").status_code == 404
+    with assert_max_queries(0):
+        assert client.post("/coupons/validate?code=NOPE").status_code == 404
+
+    # Creating the code invalidates the cached miss
+    client.post("/coupons/", json={"code": "NOPE", "discount_percentage": 5})
+    assert client.post("/coupons/validate?code=NOPE").status_code == 200
+
+def test_checkout_enforces_usage_limit_and_refreshes_cache(client, session_factory):
+    with session_factory() as db:
+        category = Category(name="Coupons")
+        db.add(category)
+        db.flush()
+        product = Product(name="Mug", price=10.0, stock=10, category_id=category.id)
+        users = [User(email=f"coupon{i}@example.com", username=f"coupon{i}", hashed_password="x") for i in range(2)]
+        db.add_all([product, Coupon(code="ONCE", discount_percentage=50.0, max_uses=1)] + users)
+        db.flush()
+        db.add_all([CartItem(user_id=user.id, product_id=product.id, quantity=1) for user in users])
+        db.commit()
+        tokens = [create_access_token({"sub": str(user.id)}) for user in users]
+
+    assert client.post("/coupons/validate?code=ONCE").status_code == 200
+
+    order = {"shipping_address": "Somewhere", "coupon_code": "ONCE"}
+    response = client.post("/orders/checkout", json=order, headers={"Authorization": f"Bearer {tokens[0]}"})
+    assert response.status_code == 201
+    assert response.json()["discount_amount"] == 5.0
+
+    response = client.post("/orders/checkout", json=order, headers={"Authorization": f"Bearer {tokens[1]}"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Coupon usage limit reached"
+    assert client.post("/coupons/validate?code=ONCE").json()["detail"] == "Coupon usage limit reached"
+
+def test_stale_snapshot_cannot_exceed_usage_limit(client, session_factory):
+    with session_factory() as db:
+        category = Category(name="Stale")
+        db.add(category)
+        db.flush()
+        product = Product(name="Pen", price=2.0, stock=10, category_id=category.id)
+        user = User(email="stale@example.com", username="stale", hashed_password="x")
+        db.add_all([product, user, Coupon(code="STALE", discount_percentage=10.0, max_uses=1)])
+        db.flush()
+        db.add(CartItem(user_id=user.id, product_id=product.id, quantity=1))
+        db.commit()
+        token = create_access_token({"sub": str(user.id)})
+
+    # Cache the snapshot, then use up the coupon behind the cache's back (another worker)
+    assert client.post("/coupons/validate?code=STALE").status_code == 200
+    with session_factory() as db:
+        db.query(Coupon).filter(Coupon.code == "STALE").update({"current_uses": 1})
+        db.commit()
+
+    order = {"shipping_address": "Somewhere", "coupon_code": "STALE"}
+    response = client.post("/orders/checkout", json=order, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Coupon usage limit reached"
+    with session_factory() as db:
+        assert db.query(CartItem).count() == 1
@@ -0,0 +1,67 @@
+import pytest
+
+import app.http_cache as http_cache
+from app.config import CACHE_POLICY_PRODUCT, CACHE_POLICY_PRODUCT_LIST
+from app.models import User
+from app.utils import create_access_token
+
+@pytest.fixture
+def client(api_client, monkeypatch):
+    purger = http_cache.RecordingPurger()
+    monkeypatch.setattr(http_cache, "purger", purger)
+    return api_client, purger
+
+def test_catalog_reads_are_tagged(client):
+    client, purger = client
+    category = client.post("/categories/", json={"name": "Cached"}).json()
+    product = client.post("/products/", json={"name": "Lamp", "price": 20.0, "category_id": category["id"]}).json()
+
+    response = client.get(f"/products/?category_id={category['id']}")
+    assert response.headers["Cache-Control"] == f"public, {CACHE_POLICY_PRODUCT_LIST}"
+    assert set(response.headers["Surrogate-Key"].split()) == {
+        "products", f"product-{product['id']}", f"category-{category['id']}"
+    }
+
+    response = client.get(f"/products/{product['id']}")
+    assert response.headers["Cache-Control"] == f"public, {CACHE_POLICY_PRODUCT}"
+    assert response.headers["Surrogate-Key"] == f"product-{product['id']} category-{category['id']}"
+
+    assert client.get("/categories/").headers["Surrogate-Key"] == "categories"
+    assert client.get(f"/products/{product['id']}/reviews").headers["Surrogate-Key"] == f"product-{product['id']}-reviews"
+
+    # Errors are never marked cacheable
+    assert "Cache-Control" not in client.get("/products/999999").headers
+
+def test_writes_purge_affected_keys(client, session_factory):
+    client, purger = client
+    category = client.post("/categories/", json={"name": "Purged"}).json()
+    other = client.post("/categories/", json={"name": "Other"}).json()
+    assert purger.purged == [["categories"], ["categories"]]
+
+    product = client.post("/products/", json={"name": "Desk", "price": 90.0, "category_id": category["id"]}).json()
+    assert purger.purged[-1] == ["products", f"category-{category['id']}"]
+
+    client.put(f"/products/{product['id']}", json={"category_id": other["id"]})
+    assert set(purger.purged[-1]) == {
+        f"product-{product['id']}", "products", f"category-{category['id']}", f"category-{other['id']}"
+    }
+
+    with session_factory() as db:
+        user = User(email="cache@example.com", username="cache", hashed_password="x")
+        db.add(user)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    review = client.post(f"/products/{product['id']}/reviews", json={"rating": 4}, headers=headers).json()
+    assert purger.purged[-1] == [f"product-{product['id']}-reviews"]
+    client.delete(f"/products/{product['id']}/reviews/{review['id']}", headers=headers)
+    assert purger.purged[-1] == [f"product-{product['id']}-reviews"]
+    assert len(purger.purged) == 6
+
+def test_purge_failures_do_not_propagate(monkeypatch):
+    class FailingPurger(http_cache.Purger):
+        def purge(self, keys):
+            raise RuntimeError("CDN down")
+
+    monkeypatch.setattr(http_cache, "purger", FailingPurger())
+    http_cache.purge("product-1")
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from app.coupons import coupon_cache, missing_coupon_cache, invalidate_coupon
+from app.invalidation import InvalidationBus, LocalTransport, invalidation_bus
+
+# Long enough that nothing is sent or handled until the test flushes by hand
+MANUAL = 60_000
+
+class RecordingTransport(LocalTransport):
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def send(self, payload):
+        self.sent.append(json.loads(payload))
+        super().send(payload)
+
+def _workers(coalesce_ms=0, count=2):
+    transport = RecordingTransport()
+    workers = []
+    for _ in range(count):
+        bus = InvalidationBus(transport, coalesce_ms)
+        calls = []
+        bus.subscribe("product", calls.append)
+        bus.start()
+        workers.append((bus, calls))
+    return transport, workers
+
+def test_other_workers_receive_events():
+    _, [(publisher, own_calls), (_, calls), (_, third_calls)] = _workers(count=3)
+    publisher.publish("product", 7)
+    publisher.publish("category", 1)  # nobody subscribed
+
+    assert calls == third_calls == [{7}]
+    # The publisher invalidated its own cache before publishing
+    assert own_calls == []
+
+def test_bursts_are_coalesced():
+    transport, [(publisher, _), (receiver, calls)] = _workers(coalesce_ms=MANUAL)
+    for product_id in (1, 2, 1, 3):
+        publisher.publish("product", product_id)
+    publisher.flush()
+    publisher.publish("product", 4)
+    publisher.flush()
+
+    assert len(transport.sent) == 2
+    assert calls == []
+    receiver._dispatch()
+    assert calls == [{1, 2, 3, 4}]
+
+    # "Everything" wins over single ids
+    publisher.publish("product", 5)
+    publisher.publish("product")
+    publisher.flush()
+    receiver._dispatch()
+    assert calls[-1] is None
+
+def test_events_before_start_are_dropped():
+    transport = RecordingTransport()
+    bus = InvalidationBus(transport, 0)
+    bus.publish("product", 1)
+    assert transport.sent == [] and bus.stats()["published"] == 0
+
+def test_reconnect_flushes_everything():
+    transport, [(publisher, _), (receiver, calls)] = _workers()
+    transport.disconnect()
+    publisher.publish("product", 1)
+    assert calls == [] and publisher.stats()["send_errors"] == 1
+
+    transport.reconnect()
+    # The receiver cannot know what it missed
+    assert calls == [None]
+    assert receiver.stats()["flushes"] == 1
+
+def test_handler_errors_do_not_stop_other_handlers():
+    _, [(publisher, _), (receiver, calls)] = _workers()
+    failing = []
+
+    def broken(ids):
+        failing.append(ids)
+        raise RuntimeError("boom")
+
+    receiver._handlers["product"].insert(0, broken)
+    publisher.publish("product", 1)
+    assert failing == calls == [{1}]
+
+def test_malformed_messages_are_ignored():
+    calls = []
+    bus = InvalidationBus(RecordingTransport(), 0)
+    bus.subscribe("product", calls.append)
+    bus.start()
+    for payload in ("not json", "{}", '{"origin": "x", "events": [1]}'):
+        bus._on_message(payload)
+    assert calls == []
+
+@pytest.fixture
+def coupon_bus(monkeypatch):
+    """The application bus joined to a second worker on a local transport"""
+    transport = RecordingTransport()
+    monkeypatch.setattr(invalidation_bus, "started", False)
+    monkeypatch.setattr(invalidation_bus, "transport", transport)
+    monkeypatch.setattr(invalidation_bus, "window", 0)
+    other = InvalidationBus(transport, 0)
+    other_calls = []
+    other.subscribe("coupon", other_calls.append)
+    other.start()
+    invalidation_bus.start()
+    yield other, other_calls
+    coupon_cache.clear()
+    missing_coupon_cache.clear()
+
+def test_coupon_changes_reach_other_workers(coupon_bus):
+    other, other_calls = coupon_bus
+    invalidate_coupon("SAVE10")
+    assert other_calls == [{"SAVE10"}]
+
+    coupon_cache.set("SAVE10", object())
+    missing_coupon_cache.set("NOPE", None)
+    coupon_cache.set("KEEP", object())
+    other.publish("coupon", "SAVE10")
+    other.publish("coupon", "NOPE")
+
+    assert "SAVE10" not in coupon_cache._entries and "NOPE" not in missing_coupon_cache._entries
+    assert "KEEP" in coupon_cache._entries
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app.routers.admin as admin
+from app.maintenance import CartSweeper
+from app.models import Category, Product, User, CartItem
+
+OLD = datetime.utcnow() - timedelta(days=40)
+NEW = datetime.utcnow() - timedelta(days=1)
+
+# Item ages per user: "abandoned" and "gone" are stale carts, "active" has one recent change
+CARTS = {
+    "abandoned": [OLD, OLD, OLD],
+    "active": [OLD, NEW],
+    "fresh": [NEW],
+    "gone": [OLD - timedelta(days=5), OLD],
+}
+
+def _cart_users(db):
+    return sorted(user.username for user in db.query(User).join(CartItem).distinct())
+
+@pytest.fixture
+def carts(session_factory):
+    with session_factory() as db:
+        category = Category(name="Things")
+        db.add(category)
+        db.flush()
+        products = [Product(name=f"Product {i}", price=1.0, stock=5, category_id=category.id) for i in range(3)]
+        db.add_all(products)
+        for name, ages in CARTS.items():
+            user = User(email=f"{name}@example.com", username=name, hashed_password="x")
+            db.add(user)
+            db.flush()
+            db.add_all(
+                CartItem(user_id=user.id, product_id=products[i].id, quantity=1, created_at=age, updated_at=age)
+                for i, age in enumerate(ages)
+            )
+        db.commit()
+    return session_factory
+
+def _sweeper(session_factory, **kwargs):
+    pauses = []
+    sweeper = CartSweeper(session_factory, max_age_days=30, batch_size=2, pause_ms=50, sleep=pauses.append, **kwargs)
+    return sweeper, pauses
+
+def test_sweep_deletes_only_abandoned_carts_in_batches(carts):
+    sweeper, pauses = _sweeper(carts)
+    progress = sweeper.run()
+
+    assert (progress["rows_deleted"], progress["carts_deleted"], progress["rows_skipped"]) == (5, 2, 1)
+    # 6 stale rows in batches of 2, plus one empty read that ends the run
+    assert progress["batches"] == 3 and pauses == [0.05] * 3
+    with carts() as db:
+        assert _cart_users(db) == ["active", "fresh"]
+        assert db.query(CartItem).count() == 3
+
+    # Nothing left to do
+    assert sweeper.run()["rows_deleted"] == 0
+    assert sweeper.stats()["totals"]["rows_deleted"] == 5 and sweeper.stats()["totals"]["runs"] == 2
+
+def test_dry_run_and_batch_limit(carts):
+    sweeper, _ = _sweeper(carts)
+    progress = sweeper.run(dry_run=True)
+    assert (progress["rows_deleted"], progress["carts_deleted"], progress["rows_skipped"]) == (5, 2, 1)
+    assert sweeper.stats()["totals"]["rows_deleted"] == 0
+
+    progress = sweeper.run(max_batches=1)
+    assert progress["batches"] == 1 and progress["rows_deleted"] == 2
+    with carts() as db:
+        assert db.query(CartItem).count() == 6
+
+def test_stale_batch_uses_updated_at_index(carts, engine):
+    sweeper, _ = _sweeper(carts)
+    query = sweeper.stale_items_query(datetime.utcnow(), after=(OLD, 0))
+    compiled = query.compile(engine)
+    parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", parameters))
+    assert "ix_cart_items_updated_at" in plan and "TEMP B-TREE" not in plan
+
+def test_admin_reports_progress(carts, api_client, monkeypatch):
+    sweeper, _ = _sweeper(carts)
+    sweeper.run()
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "admin-secret")
+    monkeypatch.setattr(admin, "cart_sweeper", sweeper)
+
+    response = api_client.get("/admin/maintenance", headers={"X-Admin-Token": "admin-secret"})
+    assert response.status_code == 200
+    stats = response.json()["cart_sweeper"]
+    assert stats["last_run"]["carts_deleted"] == 2 and stats["running"] is None
@@ -0,0 +1,48 @@
+from sqlalchemy import inspect
+
+from app.database import Base, create_db_engine
+from app.migrations import SCHEMA_VERSION, current_version, missing_indexes, upgrade, verify_schema
+
+def _index_names(db_engine, table):
+    return {index["name"] for index in inspect(db_engine).get_indexes(table)}
+
+def test_upgrade_adds_indexes_to_existing_tables(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=db_engine)
+    # Simulate a database created before the indexes were declared
+    with db_engine.begin() as conn:
+        for name in ("ix_products_category_price", "ix_cart_items_user_product", "ix_orders_user_id"):
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+
+    assert {index.name for index in missing_indexes(db_engine)} == {
+        "ix_products_category_price", "ix_cart_items_user_product", "ix_orders_user_id"
+    }
+
+    created = upgrade(db_engine)
+    assert sorted(created) == ["ix_cart_items_user_product", "ix_orders_user_id", "ix_products_category_price"]
+    assert "ix_products_category_price" in _index_names(db_engine, "products")
+    assert missing_indexes(db_engine) == []
+    assert upgrade(db_engine) == []
+    db_engine.dispose()
+
+def test_upgrade_creates_empty_database(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    assert upgrade(db_engine) == []
+    assert "ix_reviews_product_user" in _index_names(db_engine, "reviews")
+    db_engine.dispose()
+
+def test_upgrade_stamps_schema_version(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'stamp.db'}")
+    assert current_version(db_engine) is None
+    assert "run 'python -m app.migrations upgrade'" in verify_schema(db_engine)
+
+    upgrade(db_engine)
+    assert current_version(db_engine) == SCHEMA_VERSION
+    assert verify_schema(db_engine) is None
+
+    # A database stamped by an older release is reported as drifted
+    with db_engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM schema_version")
+        conn.exec_driver_sql("INSERT INTO schema_version (version) VALUES (1)")
+    assert verify_schema(db_engine).startswith("Database schema version is 1")
+    db_engine.dispose()
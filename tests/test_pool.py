@@ -0,0 +1,77 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, text
+
+import app.routers.admin as admin
+from app.database import create_db_engine, get_pool_stats
+from app.main import app
+
+HOLD_SECONDS = 0.5
+
+def _run_clients(db_engine, clients):
+    """Each client checks out a connection and holds it; returns (successes, timeouts, peak stats)"""
+    results = {"ok": 0, "timeout": 0}
+    peak = {}
+    lock = threading.Lock()
+    start = threading.Barrier(clients)
+
+    def client():
+        start.wait()
+        try:
+            with db_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                with lock:
+                    stats = get_pool_stats(db_engine)
+                    if stats["checked_out"] > peak.get("checked_out", -1):
+                        peak.update(stats)
+                time.sleep(HOLD_SECONDS)
+            outcome = "ok"
+        except exc.TimeoutError:
+            outcome = "timeout"
+        with lock:
+            results[outcome] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, peak
+
+def test_saturated_pool_times_out_waiting_clients(tmp_path):
+    db_engine = create_db_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=1, pool_timeout=0.1
+    )
+    results, peak = _run_clients(db_engine, clients=8)
+
+    # Only size + overflow clients get a connection, the rest fail fast after pool_timeout
+    assert results == {"ok": 3, "timeout": 5}
+    assert peak["checked_out"] == 3
+    assert peak["overflow"] == 1
+
+    stats = get_pool_stats(db_engine)
+    assert stats["checked_out"] == 0
+    assert stats["connects"] == 3
+    db_engine.dispose()
+
+def test_saturated_pool_queues_clients_within_timeout(tmp_path):
+    db_engine = create_db_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=0, pool_timeout=5
+    )
+    started = time.perf_counter()
+    results, peak = _run_clients(db_engine, clients=6)
+    elapsed = time.perf_counter() - started
+
+    # Clients queue for a free connection: three waves of two
+    assert results == {"ok": 6, "timeout": 0}
+    assert peak["checked_out"] == 2
+    assert elapsed >= 3 * HOLD_SECONDS
+    db_engine.dispose()
+
+def test_admin_pool_stats(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "admin-secret")
+    response = TestClient(app).get("/admin/pool", headers={"X-Admin-Token": "admin-secret"})
+    assert response.status_code == 200
+    assert "pool_class" in response.json()
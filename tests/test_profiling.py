@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.profiling as profiling
+import app.routers.admin as admin
+from app.main import app
+from app.profiling import sign_profile_request
+
+client = TestClient(app)
+
+SHIPPING_REQUEST = {"address": "Test Address", "total_weight": 1.0, "total_amount": 10.0}
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "admin-secret")
+    return tmp_path
+
+def test_unsigned_request_is_not_profiled(profile_dir):
+    response = client.post(
+        "/shipping/calculate",
+        json=SHIPPING_REQUEST,
+        headers={"X-Profile": f"{int(time.time()) + 60}.bogus"}
+    )
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+
+def test_signed_request_is_profiled_and_downloadable(profile_dir):
+    signature = sign_profile_request("POST", "/shipping/calculate", int(time.time()) + 60)
+    response = client.post("/shipping/calculate", json=SHIPPING_REQUEST, headers={"X-Profile": signature})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    admin_headers = {"X-Admin-Token": "admin-secret"}
+    profiles = client.get("/admin/profiles", headers=admin_headers).json()
+    assert len(profiles) == 1
+    assert profiles[0]["name"].startswith(profile_id)
+
+    download = client.get(f"/admin/profiles/{profiles[0]['name']}", headers=admin_headers)
+    assert download.status_code == 200
+    assert len(download.content) == profiles[0]["size_bytes"]
+
+def test_expired_signature_is_rejected():
+    signature = sign_profile_request("POST", "/shipping/calculate", int(time.time()) - 1)
+    assert not profiling.verify_profile_header("POST", "/shipping/calculate", signature)
+
+def test_profile_directory_is_bounded(profile_dir):
+    for i in range(5):
+        (profile_dir / f"{i}.pstats").write_bytes(b"x")
+    profiling.prune_profiles(max_files=2)
+    assert len(list(profile_dir.iterdir())) == 2
+
+def test_admin_requires_token(profile_dir):
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+def test_one_coroutine_profiled_per_event_loop():
+    @profiling.profiled
+    async def endpoint():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    sessions = [profiling.ProfileSession(), profiling.ProfileSession()]
+
+    async def request(session):
+        profiling._current_session.set(session)
+        return await endpoint()
+
+    async def overlapping_requests():
+        return await asyncio.gather(*(request(session) for session in sessions))
+
+    assert asyncio.run(overlapping_requests()) == ["ok", "ok"]
+    # The second request ran while the first held the loop's profiler
+    assert [len(session._profilers) for session in sessions] == [1, 0]
+    assert not profiling._profiling_loops
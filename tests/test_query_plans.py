@@ -0,0 +1,96 @@
+"""
+Runs EXPLAIN QUERY PLAN for every SELECT the routers issue against a seeded
+SQLite database and fails if a query falls back to a full table scan that
+is not explicitly expected for that endpoint.
+"""
+
+import pytest
+
+from app.database import Base
+from app.models import Category, Product, User, CartItem, Order, OrderItem, Review, Coupon
+from app.query_stats import collect_queries
+from app.coupons import coupon_cache, missing_coupon_cache
+from app.utils import create_access_token
+
+@pytest.fixture
+def seeded(session_factory, api_client):
+    with session_factory() as db:
+        users = [User(email=f"plan{i}@example.com", username=f"plan{i}", hashed_password="x") for i in range(5)]
+        categories = [Category(name=f"Plan {i}") for i in range(3)]
+        db.add_all(users + categories)
+        db.flush()
+        products = [
+            Product(name=f"Product {i}", price=5.0 + i, stock=100, category_id=categories[i % 3].id)
+            for i in range(30)
+        ]
+        db.add_all(products)
+        db.flush()
+        for i, user in enumerate(users):
+            db.add(CartItem(user_id=user.id, product_id=products[i].id, quantity=1))
+            db.add(Review(product_id=products[0].id, user_id=user.id, rating=4))
+            order = Order(user_id=user.id, total_amount=10.0, shipping_address="Somewhere")
+            db.add(order)
+            db.flush()
+            db.add(OrderItem(order_id=order.id, product_id=products[i].id, quantity=1, price=5.0))
+        db.add(Coupon(code="PLAN10", discount_percentage=10.0))
+        db.commit()
+        user_id, product_id, category_id = users[0].id, products[0].id, categories[0].id
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    return api_client, headers, user_id, product_id, category_id
+
+def _full_scans(engine, statements):
+    """Tables read by a full scan in any of the captured SELECT statements (subqueries are not tables)"""
+    scans = set()
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith("SELECT"):
+                continue
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for row in plan:
+                detail = row[-1]
+                if detail.startswith("SCAN ") and detail.split()[1] in Base.metadata.tables:
+                    scans.add(detail.split()[1])
+    return scans
+
+def _requests(user_id, product_id, category_id):
+    """(method, url, json body, tables a full scan is acceptable for)"""
+    return [
+        # Unfiltered listings page through the whole table by design
+        ("GET", "/products/", None, {"products"}),
+        ("GET", "/categories/", None, {"categories"}),
+        # A leading-wildcard ILIKE cannot use a b-tree index
+        ("GET", "/products/?q=Product", None, {"products"}),
+        ("GET", f"/products/?category_id={category_id}&min_price=6&max_price=20", None, set()),
+        ("GET", f"/products/{product_id}", None, set()),
+        ("GET", f"/categories/{category_id}", None, set()),
+        ("GET", f"/products/{product_id}/reviews", None, set()),
+        ("GET", f"/products/{product_id}/reviews?sort=rating&min_rating=3", None, set()),
+        ("GET", f"/products/reviews/top?product_ids={product_id}&product_ids={product_id + 1}", None, set()),
+        ("GET", f"/cart/?user_id={user_id}", None, set()),
+        ("GET", f"/cart/related?user_id={user_id}", None, set()),
+        ("POST", "/cart/", {"product_id": product_id, "quantity": 1}, set()),
+        ("POST", "/cart/apply-coupon", {"user_id": user_id, "coupon_code": "PLAN10"}, set()),
+        ("POST", f"/products/{product_id + 1}/reviews", {"rating": 5}, set()),
+        ("GET", f"/orders/?user_id={user_id}", None, set()),
+        ("POST", "/coupons/validate?code=PLAN10", None, set()),
+        ("POST", "/orders/checkout", {"shipping_address": "Somewhere", "coupon_code": "PLAN10"}, set()),
+    ]
+
+def test_router_queries_use_indexes(seeded, engine):
+    client, headers, user_id, product_id, category_id = seeded
+    failures = []
+    for method, url, body, allowed_scans in _requests(user_id, product_id, category_id):
+        # Cached lookups would skip the queries under test
+        coupon_cache.clear()
+        missing_coupon_cache.clear()
+        with collect_queries(record=True) as stats:
+            response = client.request(method, url, json=body, headers=headers)
+        assert response.status_code < 400, (method, url, response.text)
+        assert stats.count > 0, (method, url)
+
+        unexpected = _full_scans(engine, stats.statements) - allowed_scans
+        if unexpected:
+            failures.append(f"{method} {url}: full scan of {', '.join(sorted(unexpected))}")
+
+    assert not failures, "\n".join(failures)
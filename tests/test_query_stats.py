@@ -0,0 +1,37 @@
+import pytest
+
+from app.query_stats import assert_max_queries, collect_queries, statement_shape
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == \
+        statement_shape("SELECT *\n  FROM t WHERE id IN (?)")
+
+def test_repeated_statements_are_flagged(engine):
+    with collect_queries() as stats:
+        with engine.connect() as conn:
+            for _ in range(7):
+                conn.exec_driver_sql("SELECT 1")
+    assert stats.count == 7
+    assert stats.repeated(threshold=5) == {"SELECT 1": 7}
+
+def test_nested_collectors_share_counts(engine):
+    with collect_queries() as outer:
+        with collect_queries() as inner:
+            with engine.connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+    assert inner.count == outer.count == 1
+
+def test_query_count_headers(api_client):
+    category = api_client.post("/categories/", json={"name": "Stats"}).json()
+    response = api_client.get("/categories/")
+    assert response.status_code == 200
+    assert response.headers["X-DB-Query-Count"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+    with assert_max_queries(1):
+        assert api_client.get(f"/categories/{category['id']}").status_code == 200
+
+def test_assert_max_queries_fails_when_exceeded(api_client):
+    with pytest.raises(AssertionError, match="Expected at most 0 queries"):
+        with assert_max_queries(0):
+            api_client.get("/categories/")
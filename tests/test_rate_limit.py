@@ -0,0 +1,143 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.rate_limit import AdmissionControl, Rate, RateLimitMiddleware, TokenBuckets, client_key, route_class
+from app.utils import create_access_token
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _admission(auth="2/60", read="3/60", write="5/60", max_in_flight=0):
+    rates = {"auth": Rate.parse(auth), "read": Rate.parse(read), "write": Rate.parse(write)}
+    return AdmissionControl(rates, TokenBuckets(), max_in_flight=max_in_flight)
+
+def _app(admission, gate=None):
+    app = FastAPI()
+
+    @app.get("/products/")
+    async def products():
+        if gate is not None:
+            await gate.wait()
+        return []
+
+    @app.post("/auth/login")
+    async def login():
+        return {}
+
+    @app.get("/")
+    async def root():
+        return {}
+
+    return RateLimitMiddleware(app, admission)
+
+def _client(asgi_app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url="http://test")
+
+def _bearer(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+def test_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    buckets = TokenBuckets(clock=clock)
+    rate = Rate.parse("3/60")  # one token every 20 seconds
+
+    assert [buckets.acquire("k", rate) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.acquire("k", rate) == pytest.approx(20.0)
+    clock.now += 10
+    assert buckets.acquire("k", rate) == pytest.approx(10.0)
+    clock.now += 10
+    assert buckets.acquire("k", rate) == 0.0
+    assert buckets.acquire("other", rate) == 0.0
+
+def test_idle_buckets_are_pruned_when_full():
+    clock = FakeClock()
+    buckets = TokenBuckets(max_clients=2, clock=clock)
+    rate = Rate.parse("1/10")
+    buckets.acquire("a", rate)
+    buckets.acquire("b", rate)
+    clock.now += 10  # both refilled
+    buckets.acquire("c", rate)
+    assert len(buckets) == 1
+
+def test_rates_and_route_classes():
+    assert Rate.parse("10/60") == Rate(10, 60.0)
+    with pytest.raises(ValueError):
+        Rate.parse("0/60")
+    assert route_class("POST", "/auth/login") == "auth"
+    assert route_class("GET", "/products/") == "read"
+    assert route_class("POST", "/cart/") == "write"
+    assert route_class("GET", "/") is None
+    assert route_class("OPTIONS", "/cart/") is None
+
+def test_client_key_prefers_verified_user():
+    scope = {"headers": [(b"authorization", _bearer(7)["Authorization"].encode())], "client": ("10.0.0.1", 1234)}
+    assert client_key(scope) == "user:7"
+    scope = {"headers": [(b"authorization", b"Bearer forged.token.value")], "client": ("10.0.0.1", 1234)}
+    assert client_key(scope) == "ip:10.0.0.1"
+
+def test_concurrent_threads_never_overspend():
+    buckets = TokenBuckets(clock=lambda: 0.0)  # frozen clock: no refill
+    rate = Rate.parse("1000/3600")
+    granted = []
+
+    def worker():
+        granted.append(sum(buckets.acquire("shared", rate) == 0.0 for _ in range(500)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(granted) == 1000
+
+def test_budgets_are_per_client_and_per_route_class():
+    admission = _admission()
+
+    async def scenario():
+        async with _client(_app(admission)) as client:
+            alice, bob = _bearer(1), _bearer(2)
+            statuses = [(await client.get("/products/", headers=alice)).status_code for _ in range(4)]
+            assert statuses == [200, 200, 200, 429]
+            limited = await client.get("/products/", headers=alice)
+            assert int(limited.headers["Retry-After"]) == 20
+            assert limited.json() == {"detail": "Too many requests"}
+
+            assert (await client.get("/products/", headers=bob)).status_code == 200
+            # Login has its own budget, keyed by IP for anonymous clients
+            logins = [(await client.post("/auth/login")).status_code for _ in range(3)]
+            assert logins == [200, 200, 429]
+            # Health check is never limited
+            assert [(await client.get("/")).status_code for _ in range(10)] == [200] * 10
+
+    asyncio.run(scenario())
+    assert admission.limited == {"read": 2, "auth": 1}
+
+def test_concurrent_requests_beyond_in_flight_cap_are_shed():
+    admission = _admission(read="100/60", max_in_flight=2)
+
+    async def scenario():
+        gate = asyncio.Event()
+        async with _client(_app(admission, gate)) as client:
+            held = [asyncio.create_task(client.get("/products/", headers=_bearer(i))) for i in range(2)]
+            while admission.in_flight < 2:
+                await asyncio.sleep(0)
+
+            shed = await asyncio.gather(*(client.get("/products/", headers=_bearer(i)) for i in range(3)))
+            assert [response.status_code for response in shed] == [503, 503, 503]
+            assert all(response.headers["Retry-After"] == "1" for response in shed)
+
+            gate.set()
+            assert [response.status_code for response in await asyncio.gather(*held)] == [200, 200]
+            assert admission.in_flight == 0
+            assert (await client.get("/products/")).status_code == 200
+
+    asyncio.run(scenario())
+    assert admission.shed == 3
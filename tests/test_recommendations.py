@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+import app.routers.cart as cart
+import app.routers.products as products
+from app.models import Category, Product, User, CartItem, Order, OrderItem, OrderStatus
+from app.recommendations import CooccurrenceCounts, RelatedProductsIndex, build_index
+
+# Baskets of product ids; products 1 and 2 are bought together most often
+BASKETS = [[1, 2, 3], [1, 2], [1, 2, 4], [3, 4], [1, 3], [2, 1, 1]]
+
+def _add_orders(db, user_id, baskets, status=OrderStatus.DELIVERED):
+    for basket in baskets:
+        order = Order(user_id=user_id, total_amount=10.0, shipping_address="1 Main St", status=status)
+        db.add(order)
+        db.flush()
+        db.add_all(OrderItem(order_id=order.id, product_id=product_id, quantity=1, price=1.0) for product_id in basket)
+    db.commit()
+
+def _rows(baskets):
+    order_ids = np.array([i for i, basket in enumerate(baskets, start=1) for _ in basket], np.int64)
+    product_ids = np.array([product_id for basket in baskets for product_id in basket], np.int64)
+    return order_ids, product_ids
+
+@pytest.fixture
+def catalog(session_factory):
+    with session_factory() as db:
+        category = Category(name="Things")
+        user = User(email="buyer@example.com", username="buyer", hashed_password="x")
+        db.add_all([category, user])
+        db.flush()
+        db.add_all(Product(id=i, name=f"Product {i}", price=float(i), stock=5, category_id=category.id) for i in range(1, 6))
+        db.commit()
+        user_id = user.id
+    return user_id
+
+def test_counts_and_top_neighbours():
+    counts = CooccurrenceCounts()
+    counts.add_orders(*_rows(BASKETS))
+    related = counts.top_neighbours(top_k=3, min_count=1)
+
+    # 1 and 2 share 4 orders; 1 and 3 share 2, 1 and 4 one
+    assert related[1].tolist() == [2, 3, 4]
+    # 4 shares one order with each of 1, 2 and 3; the least popular (3) scores highest
+    assert related[4].tolist() == [3, 2, 1]
+    # One row per id up to the highest product ever ordered
+    assert related.shape == (5, 3)
+    # Pairs below the minimum support are dropped
+    assert counts.top_neighbours(top_k=3, min_count=2)[4].tolist() == [0, 0, 0]
+
+def test_chunked_counts_match_one_pass():
+    whole = CooccurrenceCounts()
+    whole.add_orders(*_rows(BASKETS))
+    chunked = CooccurrenceCounts()
+    for start in range(0, len(BASKETS), 2):
+        order_ids, product_ids = _rows(BASKETS[start:start + 2])
+        chunked.add_orders(order_ids + start, product_ids)
+
+    assert np.array_equal(whole.top_neighbours(3, 1), chunked.top_neighbours(3, 1))
+    assert whole.pair_counts.tolist() == chunked.pair_counts.tolist()
+
+def test_incremental_build_matches_full_rebuild(catalog, session_factory, tmp_path):
+    with session_factory() as db:
+        _add_orders(db, catalog, BASKETS[:3])
+        _add_orders(db, catalog, [[4, 5], [4, 5]], status=OrderStatus.CANCELLED)
+        assert build_index(db, str(tmp_path), chunk_orders=2)["orders_to"] == 5
+
+        _add_orders(db, catalog, BASKETS[3:])
+        stats = build_index(db, str(tmp_path), chunk_orders=2)
+        assert (stats["orders_from"], stats["orders_to"]) == (5, 8)
+        incremental = np.load(tmp_path / "related.npy")
+
+        build_index(db, str(tmp_path / "full"), full=True)
+        assert np.array_equal(incremental, np.load(tmp_path / "full" / "related.npy"))
+        # Cancelled orders are not counted
+        assert 5 not in incremental[4]
+
+def test_related_endpoints(catalog, session_factory, api_client, tmp_path, monkeypatch):
+    with session_factory() as db:
+        _add_orders(db, catalog, BASKETS * 2)
+        build_index(db, str(tmp_path))
+        db.add(CartItem(user_id=catalog, product_id=1, quantity=1))
+        db.commit()
+
+    index = RelatedProductsIndex(str(tmp_path))
+    monkeypatch.setattr(products, "related_products", index)
+    monkeypatch.setattr(cart, "related_products", index)
+    response = api_client.get("/products/1/related?limit=2")
+    assert response.status_code == 200
+    assert [product["id"] for product in response.json()] == [2, 3]
+    assert api_client.get("/products/99/related").json() == []
+
+    related = [product["id"] for product in api_client.get(f"/cart/related?user_id={catalog}").json()]
+    assert related[0] == 2 and 1 not in related
+
+def test_index_is_empty_before_first_build(tmp_path):
+    assert RelatedProductsIndex(str(tmp_path)).related(1) == []
@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import app.database as database
+from app.database import Base, ReplicaRouter, create_db_engine, get_db
+from app.main import app
+from app.models import Category
+
+client = TestClient(app)
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """A primary and a replica SQLite file with the same schema but different rows"""
+    primary = create_db_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_db_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for db_engine, name in ((primary, "On primary"), (replica, "On replica")):
+        Base.metadata.create_all(bind=db_engine)
+        with sessionmaker(bind=db_engine)() as db:
+            db.add(Category(name=name))
+            db.commit()
+
+    PrimarySession = sessionmaker(autocommit=False, autoflush=False, bind=primary)
+
+    def override_get_db():
+        db = PrimarySession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides.clear()
+    app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter(primary, [replica]))
+    yield primary, replica
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+    primary.dispose()
+    replica.dispose()
+
+def _category_names(db_engine):
+    with sessionmaker(bind=db_engine)() as db:
+        return {category.name for category in db.query(Category).all()}
+
+def test_reads_go_to_replica_and_writes_to_primary(databases):
+    primary, replica = databases
+
+    response = client.get("/categories/")
+    assert [category["name"] for category in response.json()] == ["On replica"]
+
+    response = client.post("/categories/", json={"name": "Written"})
+    assert response.status_code == 201
+    assert _category_names(primary) == {"On primary", "Written"}
+    assert _category_names(replica) == {"On replica"}
+
+def test_round_robin_across_replicas(databases, tmp_path):
+    primary, replica = databases
+    second = create_db_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    router = ReplicaRouter(primary, [replica, second])
+    assert [router.read_engine() for _ in range(4)] == [replica, second, replica, second]
+    second.dispose()
+
+def test_unhealthy_replica_falls_back_to_primary(databases, tmp_path, monkeypatch):
+    primary, replica = databases
+    broken = create_db_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter(primary, [broken]))
+
+    response = client.get("/categories/")
+    assert [category["name"] for category in response.json()] == ["On primary"]
+
+def test_unhealthy_replica_is_skipped_in_rotation(databases, tmp_path):
+    primary, replica = databases
+    broken = create_db_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReplicaRouter(primary, [broken, replica])
+    assert [router.read_engine() for _ in range(3)] == [replica, replica, replica]
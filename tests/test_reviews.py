@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Category, Product, Review, User
+
+@pytest.fixture
+def seeded(session_factory, api_client):
+    with session_factory() as db:
+        category = Category(name="Reviewed")
+        db.add(category)
+        db.flush()
+        products = [Product(name=f"Reviewed {i}", price=10.0, category_id=category.id) for i in range(3)]
+        users = [User(email=f"reviewer{i}@example.com", username=f"reviewer{i}", hashed_password="x") for i in range(25)]
+        db.add_all(products + users)
+        db.flush()
+        start = datetime(2024, 1, 1)
+        for i, user in enumerate(users):
+            # Pairs of reviews share a timestamp so ties are broken by id
+            db.add(Review(product_id=products[0].id, user_id=user.id, rating=i % 5 + 1, created_at=start + timedelta(hours=i // 2)))
+            if i < 2:
+                db.add(Review(product_id=products[1].id, user_id=user.id, rating=5 - i, created_at=start))
+        db.commit()
+        product_ids = [product.id for product in products]
+
+    return api_client, product_ids
+
+def _all_pages(client, url):
+    reviews, cursor = [], None
+    while True:
+        response = client.get(f"{url}&cursor={cursor}" if cursor else url)
+        assert response.status_code == 200, response.text
+        reviews.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return reviews
+
+def test_newest_pages_cover_every_review_once(seeded):
+    client, (product_id, _, _) = seeded
+    first = client.get(f"/products/{product_id}/reviews?limit=10")
+    assert len(first.json()) == 10
+    assert "X-Next-Cursor" in first.headers
+
+    reviews = _all_pages(client, f"/products/{product_id}/reviews?limit=10")
+    assert len(reviews) == 25
+    assert len({review["id"] for review in reviews}) == 25
+    keys = [(review["created_at"], review["id"]) for review in reviews]
+    assert keys == sorted(keys, reverse=True)
+
+def test_rating_sort_and_filter(seeded):
+    client, (product_id, _, _) = seeded
+    reviews = _all_pages(client, f"/products/{product_id}/reviews?sort=rating&min_rating=4&limit=3")
+    assert len(reviews) == 10
+    assert all(review["rating"] >= 4 for review in reviews)
+    keys = [(review["rating"], review["created_at"], review["id"]) for review in reviews]
+    assert keys == sorted(keys, reverse=True)
+
+def test_cursor_must_match_sort(seeded):
+    client, (product_id, _, _) = seeded
+    cursor = client.get(f"/products/{product_id}/reviews?limit=5").headers["X-Next-Cursor"]
+    assert client.get(f"/products/{product_id}/reviews?sort=rating&cursor={cursor}").status_code == 400
+    assert client.get(f"/products/{product_id}/reviews?cursor=garbage").status_code == 400
+    assert client.get("/products/999999/reviews").status_code == 404
+
+def test_top_reviews_for_many_products(seeded):
+    client, (first, second, empty) = seeded
+    response = client.get(f"/products/reviews/top?product_ids={first}&product_ids={second}&product_ids={empty}&limit=2")
+    assert response.status_code == 200
+    top = response.json()
+    assert [review["rating"] for review in top[str(first)]] == [5, 5]
+    assert [review["rating"] for review in top[str(second)]] == [5, 4]
+    assert top[str(empty)] == []
+    assert response.headers["Surrogate-Key"] == " ".join(f"product-{i}-reviews" for i in (first, second, empty))
@@ -0,0 +1,60 @@
+import json
+from datetime import datetime
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import app.serialization as serialization
+from app.models import Product
+from app.read_models import OrderItemRow, OrderRow, ProductRow, load_rows
+from app.schemas import OrderResponse, ProductResponse
+from app.serialization import FastJSONResponse, schema_columns
+
+ROWS = [
+    {
+        "id": i,
+        "name": f"Café {i}",
+        "description": None if i % 2 else "desc",
+        "price": 9.5 + i,
+        "stock": i,
+        "weight": 0.0,
+        "category_id": 1,
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, 678 * i),
+        "updated_at": datetime(2024, 1, 2, 3, 4, 5),
+    }
+    for i in range(3)
+]
+
+def _pydantic_json(rows):
+    validated = TypeAdapter(List[ProductResponse]).validate_python(rows)
+    return json.loads(json.dumps(jsonable_encoder(validated)))
+
+def test_fast_json_matches_pydantic_output():
+    assert json.loads(FastJSONResponse(ROWS).body) == _pydantic_json(ROWS)
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    fast = FastJSONResponse(ROWS).body
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(FastJSONResponse(ROWS).body) == json.loads(fast)
+
+def test_schema_columns_follow_schema_fields():
+    columns = schema_columns(Product, ProductResponse, exclude=("updated_at",))
+    assert [column.key for column in columns] == [
+        name for name in ProductResponse.model_fields if name != "updated_at"
+    ]
+
+def test_read_models_serialize_like_dicts(monkeypatch):
+    rows = load_rows(ProductRow, [tuple(row.values()) for row in ROWS])
+    assert [column.key for column in ProductRow.columns] == list(ProductResponse.model_fields)
+    assert not hasattr(rows[0], "__dict__")
+    assert json.loads(FastJSONResponse(rows).body) == _pydantic_json(ROWS)
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(FastJSONResponse(rows).body) == _pydantic_json(ROWS)
+
+def test_related_fields_start_empty():
+    order = OrderRow(1, 2, 30.0, "1 Main St", 5.0, 0.0, None, "pending", datetime(2024, 1, 2))
+    order.items.append(OrderItemRow(7, 3, 1, 25.0))
+    assert OrderRow(*[None] * len(OrderRow.columns)).items == []
+    body = json.loads(FastJSONResponse([order]).body)
+    assert body == json.loads(json.dumps(jsonable_encoder(TypeAdapter(List[OrderResponse]).validate_python([order], from_attributes=True))))
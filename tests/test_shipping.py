@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.routers.shipping as shipping
+from app.main import app
+from app.routers.shipping import calculate_shipping_cost, calculate_shipping_costs
+from app.shipping_rates import DEFAULT_ZONE, RateTable, RateTableManager, load_rate_table
+
+RATES = """postal_from,postal_to,zone,base_cost,cost_per_kg,free_shipping_threshold,free_shipping_days,standard_days
+10000,14999,northeast,4.5,1.5,75,2,4
+90000,96199,west,7.0,2.5,,4,6
+15000,19999,northeast,4.5,1.5,75,2,4
+"""
+
+def _write_rates(path, content=RATES):
+    path.write_text(content)
+    return str(path)
+
+client = TestClient(app)
+
+def test_vectorized_costs_match_scalar_rules_exactly():
+    rng = np.random.default_rng(7)
+    weights = np.concatenate([rng.uniform(0, 50, 5000), [0.0, 0.1, 0.3, 1e-9, 1234.5678]])
+    amounts = np.concatenate([rng.uniform(0, 200, 5000), [99.99999, 100.0, 100.00001, 0.0, 99.0]])
+
+    costs, days = calculate_shipping_costs(weights, amounts)
+    expected = [calculate_shipping_cost(float(w), float(a)) for w, a in zip(weights, amounts)]
+    assert costs.tolist() == [cost for cost, _ in expected]
+    assert days.tolist() == [day for _, day in expected]
+
+def test_batch_endpoint_matches_single_quotes():
+    pairs = [(0.5, 20.0), (3.2, 100.0), (12.0, 99.5)]
+    response = client.post("/shipping/quotes", json={
+        "weights": [weight for weight, _ in pairs],
+        "total_amounts": [amount for _, amount in pairs],
+    })
+    assert response.status_code == 200
+    body = response.json()
+
+    for i, (weight, amount) in enumerate(pairs):
+        single = client.post("/shipping/calculate", json={
+            "address": "Somewhere", "total_weight": weight, "total_amount": amount
+        }).json()
+        assert body["shipping_costs"][i] == single["shipping_cost"]
+        assert body["estimated_days"][i] == single["estimated_days"]
+    assert body["method"] == "Standard Shipping"
+
+def test_batch_endpoint_rejects_bad_input():
+    assert client.post("/shipping/quotes", json={"weights": [1.0], "total_amounts": []}).status_code == 400
+    assert client.post("/shipping/quotes", json={"weights": [-1.0], "total_amounts": [10.0]}).status_code == 400
+    assert client.post("/shipping/quotes", json={"weights": [], "total_amounts": []}).json()["shipping_costs"] == []
+
+def test_rate_table_lookup(tmp_path):
+    table = load_rate_table(_write_rates(tmp_path / "rates.csv"))
+    assert len(table) == 3
+    assert table.lookup("10000").name == "northeast"
+    assert table.lookup("19999").name == "northeast"
+    assert table.lookup("94 105").name == "west"
+    assert table.lookup("96200") is DEFAULT_ZONE
+    assert table.lookup("00501") is DEFAULT_ZONE
+    assert table.lookup(None) is DEFAULT_ZONE
+    # Rows of the same zone share one Zone object
+    assert table.lookup("12000") is table.lookup("17000")
+
+def test_rate_table_rejects_bad_files(tmp_path):
+    with pytest.raises(ValueError, match="overlaps"):
+        RateTable([("100", "200", DEFAULT_ZONE), ("150", "300", DEFAULT_ZONE)])
+    conflicting = RATES + "20000,20999,west,9.0,2.5,,4,6\n"
+    with pytest.raises(ValueError, match="conflicting rates"):
+        load_rate_table(_write_rates(tmp_path / "rates.csv", conflicting))
+
+def test_zone_costs_match_scalar_rules(tmp_path):
+    table = load_rate_table(_write_rates(tmp_path / "rates.csv"))
+    rng = np.random.default_rng(3)
+    codes = [f"{code:05d}" for code in rng.integers(0, 99999, 3000)]
+    weights = rng.uniform(0, 40, 3000)
+    amounts = rng.uniform(0, 150, 3000)
+    zones = [table.lookup(code) for code in codes]
+
+    costs, days = calculate_shipping_costs(weights, amounts, zones)
+    expected = [calculate_shipping_cost(float(w), float(a), zone) for w, a, zone in zip(weights, amounts, zones)]
+    assert costs.tolist() == [cost for cost, _ in expected]
+    assert days.tolist() == [day for _, day in expected]
+
+def test_hot_reload_swaps_table_and_keeps_it_on_error(tmp_path):
+    path = _write_rates(tmp_path / "rates.csv")
+    manager = RateTableManager(path, check_interval=0)
+    assert manager.lookup("12345").name == "northeast"
+
+    _write_rates(tmp_path / "rates.csv", RATES.replace("northeast", "east"))
+    os.utime(path, (0, manager.loaded_mtime + 10))
+    manager.reload()
+    assert manager.lookup("12345").name == "east"
+
+    _write_rates(tmp_path / "rates.csv", "not,a,rate,table\n1,2,3,4\n")
+    with pytest.raises(ValueError):
+        manager.reload()
+    assert manager.lookup("12345").name == "east"
+
+def test_endpoints_quote_by_destination(tmp_path, monkeypatch):
+    monkeypatch.setattr(shipping, "rate_tables", RateTableManager(_write_rates(tmp_path / "rates.csv")))
+
+    response = client.post("/shipping/calculate", json={
+        "address": "1 Main St, Albany, NY 12207", "total_weight": 2.0, "total_amount": 50.0
+    }).json()
+    assert (response["zone"], response["shipping_cost"], response["estimated_days"]) == ("northeast", 7.5, 4)
+
+    response = client.post("/shipping/calculate", json={
+        "address": "Somewhere", "postal_code": "94105", "total_weight": 2.0, "total_amount": 500.0
+    }).json()
+    assert (response["zone"], response["shipping_cost"]) == ("west", 12.0)
+
+    response = client.post("/shipping/quotes", json={
+        "weights": [2.0, 2.0], "total_amounts": [50.0, 50.0], "postal_codes": ["12207", "00501"]
+    }).json()
+    assert response["zones"] == ["northeast", "default"]
+    assert response["shipping_costs"] == [7.5, 9.0]
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import event
+
+import app.routers.products as products
+from app.models import Category, Product
+from app.singleflight import CachedLoader, SingleFlight
+
+HERD = 64
+
+def _herd(call, size=HERD):
+    """Run call() from `size` threads released at the same moment"""
+    start = threading.Barrier(size)
+
+    def run(_):
+        start.wait()
+        return call()
+
+    with ThreadPoolExecutor(size) as pool:
+        return list(pool.map(run, range(size)))
+
+def test_thundering_herd_runs_one_load_per_key():
+    flight = SingleFlight()
+    loads = {"a": 0, "b": 0}
+
+    def load(key):
+        loads[key] += 1
+        time.sleep(0.2)
+        return key.upper()
+
+    results = _herd(lambda: [flight.do(key, lambda: load(key)) for key in ("a", "b")])
+    assert results == [["A", "B"]] * HERD
+    assert loads == {"a": 1, "b": 1}
+    assert flight.shared == 2 * (HERD - 1)
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+    attempts = []
+
+    def fail():
+        attempts.append(1)
+        time.sleep(0.1)
+        raise ValueError("database is down")
+
+    def call():
+        try:
+            flight.do("key", fail)
+        except ValueError as e:
+            return str(e)
+
+    assert set(_herd(call, 16)) == {"database is down"}
+    assert len(attempts) == 1
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+def test_async_herd_runs_one_load():
+    loader = CachedLoader(100, ttl=0)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    async def herd():
+        return await asyncio.gather(*(loader.get_async(1, load) for _ in range(HERD)))
+
+    assert asyncio.run(herd()) == [{"id": 1}] * HERD
+    assert len(loads) == 1
+    # Nothing is cached with a TTL of 0
+    asyncio.run(herd())
+    assert len(loads) == 2
+
+def test_early_refresh_before_expiry():
+    now = [0.0]
+    draw = [0.0]
+    loader = CachedLoader(100, ttl=10, beta=1.0, clock=lambda: now[0], random=lambda: draw[0])
+    loads = []
+
+    def load():
+        loads.append(now[0])
+        now[0] += 1  # each load takes a second
+        return len(loads)
+
+    assert loader.get("key", load) == 1
+    now[0] = 5
+    # ln(1 - 0) == 0: never early
+    assert loader.get("key", load) == 1
+    # A draw this close to 1 refreshes up to ~14 load times (seconds) before expiry at 11
+    draw[0] = 1 - 1e-6
+    assert loader.get("key", load) == 2
+    assert loader.early_refreshes == 1
+
+    disabled = CachedLoader(100, ttl=10, beta=0, clock=lambda: now[0], random=lambda: draw[0])
+    disabled.get("key", load)
+    assert disabled.get("key", load) == 3
+
+def test_invalidation_during_a_load_is_not_overwritten():
+    loader = CachedLoader(100, ttl=60)
+
+    def load():
+        loader.invalidate("key")  # a write lands while the old value is being read
+        return "old"
+
+    assert loader.get("key", load) == "old"
+    assert loader.get("key", lambda: "new") == "new"
+
+@pytest.fixture
+def client(session_factory, api_client, monkeypatch):
+    with session_factory() as db:
+        category = Category(name="Hot")
+        db.add(category)
+        db.flush()
+        db.add(Product(id=1, name="Limited Sneakers", price=99.0, stock=5, category_id=category.id))
+        db.commit()
+
+    for name in ("product_loader", "product_list_loader"):
+        monkeypatch.setattr(products, name, CachedLoader(100, ttl=0))
+    return api_client
+
+def test_endpoint_herd_makes_one_query_per_key(client, engine):
+    queries = []
+
+    def slow_product_reads(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM products" in statement:
+            queries.append(statement)
+            time.sleep(0.3)
+
+    event.listen(engine, "before_cursor_execute", slow_product_reads)
+    try:
+        details = _herd(lambda: client.get("/products/1"))
+        pages = _herd(lambda: client.get("/products/?limit=5"))
+    finally:
+        event.remove(engine, "before_cursor_execute", slow_product_reads)
+
+    assert {response.status_code for response in details + pages} == {200}
+    assert {response.json()["name"] for response in details} == {"Limited Sneakers"}
+    assert len(queries) == 2
+
+def test_cached_products_follow_updates(client, session_factory, monkeypatch):
+    monkeypatch.setattr(products, "product_loader", CachedLoader(100, ttl=60))
+    monkeypatch.setattr(products, "product_list_loader", CachedLoader(100, ttl=60))
+    assert client.get("/products/1").json()["price"] == 99.0
+    assert client.get("/products/").json()[0]["price"] == 99.0
+
+    client.put("/products/1", json={"price": 79.0})
+    assert client.get("/products/1").json()["price"] == 79.0
+    assert client.get("/products/").json()[0]["price"] == 79.0
+
+    # Another worker changed it
+    with session_factory() as db:
+        db.get(Product, 1).price = 59.0
+        db.commit()
+    products.invalidate_products({1})
+    assert client.get("/products/1").json()["price"] == 59.0
@@ -0,0 +1,32 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.router_loader import RouterLoader, LazyRouterMiddleware
+
+def _lazy_app():
+    app = FastAPI()
+    loader = RouterLoader(app, {"shipping": ["app.routers.shipping"], "categories": ["app.routers.categories"]})
+    app.add_middleware(LazyRouterMiddleware, loader=loader)
+    return app, loader
+
+def test_routers_load_on_first_request_under_their_prefix():
+    app, loader = _lazy_app()
+    client = TestClient(app)
+    assert loader.loaded == set()
+
+    response = client.post(
+        "/shipping/calculate",
+        json={"address": "Test Address", "total_weight": 5.0, "total_amount": 50.0}
+    )
+    assert response.status_code == 200
+    assert loader.loaded == {"shipping"}
+
+    assert client.get("/unknown").status_code == 404
+    assert loader.loaded == {"shipping"}
+
+def test_openapi_loads_every_router():
+    app, loader = _lazy_app()
+    paths = TestClient(app).get("/openapi.json").json()["paths"]
+    assert loader.complete
+    assert "/shipping/calculate" in paths
+    assert "/categories/" in paths